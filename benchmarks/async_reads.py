@@ -0,0 +1,164 @@
+"""
+Compare concurrent-connection throughput of the sync (WSGI) and async (ASGI)
+read paths.
+
+Seeds a SQLite database, then serves it with one gunicorn process using
+threads (WSGI) and with one uvicorn process (ASGI), and drives each with
+keep-alive connections that request driver detail, status, list and stats
+pages:
+
+    python -m benchmarks.async_reads --drivers 20000 --connections 200 --duration 10
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(path, count):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='benchmarks.settings', BENCHMARK_DATABASE=path)
+    subprocess.run(
+        [sys.executable, 'manage.py', 'migrate', '--verbosity', '0'],
+        cwd=ROOT, env=env, check=True
+    )
+    script = (
+        'import django; django.setup()\n'
+        'from drivers.models import Driver\n'
+        'from drivers import counters\n'
+        'types = ["Bike", "Auto", "Hatchback", "Sedan", "SUV"]\n'
+        f'Driver.objects.bulk_create([Driver(name=f"Driver {{i}}", phone=f"{{9000000000 + i}}", '
+        f'vehicle_type=types[i % 5], vehicle_plate=f"KA{{i:08d}}", is_active=i % 4 != 0) '
+        f'for i in range({count})], batch_size=2000)\n'
+        'counters.rebuild()\n'
+    )
+    subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, check=True)
+    return env
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, port, env, threads):
+    if kind == 'wsgi':
+        command = [
+            sys.executable, '-m', 'gunicorn', 'driver_service.wsgi:application',
+            '--bind', f'127.0.0.1:{port}', '--workers', '1',
+            '--worker-class', 'gthread', '--threads', str(threads),
+            '--log-level', 'warning',
+        ]
+    else:
+        command = [
+            sys.executable, '-m', 'uvicorn', 'driver_service.asgi:application',
+            '--host', '127.0.0.1', '--port', str(port), '--workers', '1',
+            '--log-level', 'warning', '--no-access-log',
+        ]
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'{kind} server did not start')
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    headers = {}
+    for line in head.split(b'\r\n')[1:]:
+        if b':' in line:
+            name, value = line.split(b':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if b'content-length' in headers:
+        await reader.readexactly(int(headers[b'content-length']))
+    elif headers.get(b'transfer-encoding') == b'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status
+
+
+async def client(port, paths, stop_at, latencies, errors):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        while time.monotonic() < stop_at:
+            path = random.choice(paths)
+            started = time.perf_counter()
+            writer.write(
+                f'GET {path} HTTP/1.1\r\nHost: localhost\r\nAccept: application/json\r\n\r\n'.encode()
+            )
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def load(port, paths, connections, duration):
+    latencies = []
+    errors = []
+    stop_at = time.monotonic() + duration
+    await asyncio.gather(*[
+        client(port, paths, stop_at, latencies, errors) for _ in range(connections)
+    ])
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--drivers', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads for the WSGI run')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = seed(os.path.join(directory, 'benchmark.sqlite3'), args.drivers)
+        hot_ids = random.sample(range(1, args.drivers + 1), min(1000, args.drivers))
+        paths = (
+            [f'/api/v1/drivers/{driver_id}/' for driver_id in hot_ids]
+            + [f'/api/v1/drivers/{driver_id}/status/' for driver_id in hot_ids]
+            + ['/api/v1/drivers/?page=1', '/api/v1/drivers/active/?page=2', '/api/v1/drivers/stats/'] * 50
+        )
+
+        print(f'{args.drivers} drivers, {args.connections} connections, {args.duration:.0f}s per run')
+        for kind in ['wsgi', 'asgi']:
+            port = free_port()
+            server = start_server(kind, port, env, args.threads)
+            try:
+                # Warm the driver cache and connections
+                asyncio.run(load(port, paths, 10, 1))
+                latencies, errors = asyncio.run(load(port, paths, args.connections, args.duration))
+            finally:
+                server.terminate()
+                server.wait()
+
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+            print(
+                f'{kind}: {len(latencies) / args.duration:9,.0f} req/s  '
+                f'p50 {statistics.median(latencies) * 1000:7.1f} ms  '
+                f'p99 {p99 * 1000:7.1f} ms  errors {len(errors)}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+Generate synthetic driver fleets shaped after the seed dataset.
+
+Vehicle types and the active ratio are drawn from the frequencies in
+``rhfd_drivers.csv``, and the number of trips per driver and the trips
+themselves (zones, status, distance, fare per km, surge) are resampled from
+``rhfd_trips.csv``. Output uses the seed CSV formats, so it loads with
+``load_drivers`` and ``load_driver_zones``. The same ``--seed`` always gives
+the same fleet:
+
+    python -m benchmarks.fleet --drivers 1000000 --output fleet_drivers.csv --trips-output fleet_trips.csv
+"""
+
+import argparse
+import csv
+import os
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEED_DIRECTORY = os.path.join(ROOT, 'rhfd_seed dataset')
+
+DRIVER_FIELDS = ['driver_id', 'name', 'phone', 'vehicle_type', 'vehicle_plate', 'is_active']
+TRIP_FIELDS = [
+    'trip_id', 'rider_id', 'driver_id', 'pickup_zone', 'drop_zone', 'status',
+    'requested_at', 'distance_km', 'base_fare', 'surge_multiplier', 'total_fare',
+]
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+FIRST_NAMES = [
+    'Aarav', 'Aditi', 'Akash', 'Ananya', 'Arjun', 'Bhavya', 'Deepak', 'Divya',
+    'Farhan', 'Gaurav', 'Harini', 'Ishaan', 'Kavya', 'Kiran', 'Lakshmi', 'Manoj',
+    'Meera', 'Naveen', 'Neha', 'Pooja', 'Prakash', 'Priya', 'Rahul', 'Ramesh',
+    'Rohan', 'Sanjay', 'Shreya', 'Suresh', 'Tanvi', 'Varun', 'Vikram', 'Zoya',
+]
+LAST_NAMES = [
+    'Acharya', 'Bhat', 'Das', 'Gowda', 'Hegde', 'Iyer', 'Joshi', 'Kamath',
+    'Khan', 'Kulkarni', 'Menon', 'Nair', 'Patil', 'Rao', 'Reddy', 'Shetty',
+    'Singh', 'Sharma', 'Shenoy', 'Verma',
+]
+
+
+class SeedProfile:
+    """
+    Distributions read from the seed dataset.
+    """
+
+    def __init__(self, directory=SEED_DIRECTORY):
+        with open(os.path.join(directory, 'rhfd_drivers.csv'), encoding='utf-8') as f:
+            drivers = list(csv.DictReader(f))
+        with open(os.path.join(directory, 'rhfd_trips.csv'), encoding='utf-8') as f:
+            trips = list(csv.DictReader(f))
+
+        vehicle_types = Counter(row['vehicle_type'] for row in drivers)
+        self.vehicle_types = list(vehicle_types)
+        self.vehicle_type_weights = list(vehicle_types.values())
+        self.active_ratio = sum(row['is_active'] == 'True' for row in drivers) / len(drivers)
+
+        # Trips per driver, including drivers with no trips
+        per_driver = Counter(row['driver_id'] for row in trips)
+        trip_counts = Counter(per_driver.get(row['driver_id'], 0) for row in drivers)
+        self.trip_counts = list(trip_counts)
+        self.trip_count_weights = list(trip_counts.values())
+
+        # Trips are resampled whole, so zones, status, distance, fare per km
+        # and surge keep their joint distribution
+        self.trips = [
+            (
+                row['pickup_zone'],
+                row['drop_zone'],
+                row['status'],
+                float(row['distance_km']),
+                float(row['base_fare']) / float(row['distance_km']),
+                float(row['surge_multiplier']),
+            )
+            for row in trips
+        ]
+        requested = [datetime.strptime(row['requested_at'], DATETIME_FORMAT) for row in trips]
+        self.first_request = min(requested)
+        self.request_span = (max(requested) - self.first_request).total_seconds()
+        self.riders_per_driver = len({row['rider_id'] for row in trips}) / len(drivers)
+
+    def summary(self):
+        total = sum(self.vehicle_type_weights)
+        return {
+            'vehicle_types': {
+                vehicle_type: round(weight / total, 4)
+                for vehicle_type, weight in zip(self.vehicle_types, self.vehicle_type_weights)
+            },
+            'active_ratio': round(self.active_ratio, 4),
+            'mean_trips_per_driver': round(
+                sum(c * w for c, w in zip(self.trip_counts, self.trip_count_weights))
+                / sum(self.trip_count_weights),
+                4
+            ),
+        }
+
+
+def vehicle_plate(index):
+    """
+    Return a unique plate in the seed's "KA98DX4733" format for ``index``.
+    """
+    number = index % 10000
+    letters = index // 10000 % 676
+    district = index // 6760000 % 100
+    return f'KA{district:02d}{chr(65 + letters // 26)}{chr(65 + letters % 26)}{number:04d}'
+
+
+def driver_rows(count, profile, seed=0):
+    """
+    Yield ``count`` driver rows with IDs 1..count.
+    """
+    rng = random.Random(seed)
+    for index in range(count):
+        yield {
+            'driver_id': index + 1,
+            'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'phone': str(6000000000 + index),
+            'vehicle_type': rng.choices(profile.vehicle_types, profile.vehicle_type_weights)[0],
+            'vehicle_plate': vehicle_plate(index),
+            'is_active': rng.random() < profile.active_ratio,
+        }
+
+
+def trip_rows(driver_count, profile, seed=0):
+    """
+    Yield trips for drivers 1..driver_count, in driver order.
+    """
+    rng = random.Random(seed + 1)
+    rider_count = max(1, round(driver_count * profile.riders_per_driver))
+    trip_id = 0
+    for driver_id in range(1, driver_count + 1):
+        trips = rng.choices(profile.trip_counts, profile.trip_count_weights)[0]
+        for _ in range(trips):
+            pickup, drop, status, distance, fare_per_km, surge = rng.choice(profile.trips)
+            distance = round(distance * rng.uniform(0.8, 1.2), 2)
+            base_fare = round(distance * fare_per_km, 2)
+            trip_id += 1
+            yield {
+                'trip_id': trip_id,
+                'rider_id': rng.randint(1, rider_count),
+                'driver_id': driver_id,
+                'pickup_zone': pickup,
+                'drop_zone': drop,
+                'status': status,
+                'requested_at': (
+                    profile.first_request + timedelta(seconds=rng.uniform(0, profile.request_span))
+                ).strftime(DATETIME_FORMAT),
+                'distance_km': distance,
+                'base_fare': base_fare,
+                'surge_multiplier': surge,
+                'total_fare': round(base_fare * surge, 2),
+            }
+
+
+def write_csv(path, fieldnames, rows):
+    """
+    Write ``rows`` to ``path`` and return the number written.
+    """
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--drivers', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='fleet_drivers.csv')
+    parser.add_argument('--trips-output', help='Also write trips to this file')
+    args = parser.parse_args()
+
+    profile = SeedProfile()
+    written = write_csv(args.output, DRIVER_FIELDS, driver_rows(args.drivers, profile, args.seed))
+    print(f'{written:,} drivers written to {args.output}')
+    if args.trips_output:
+        written = write_csv(args.trips_output, TRIP_FIELDS, trip_rows(args.drivers, profile, args.seed))
+        print(f'{written:,} trips written to {args.trips_output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare list encoding paths.
+
+Times DriverListSerializer + JSONRenderer against ``values()`` rows + the
+orjson renderer on an in-memory SQLite database:
+
+    python -m benchmarks.list_encoding --drivers 20000 --page-size 100
+"""
+
+import argparse
+import os
+import sys
+import time
+import django
+from django.conf import settings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'driver_service.settings')
+
+
+def setup():
+    settings.DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def create_drivers(count):
+    from drivers.models import Driver
+
+    vehicle_types = ['Sedan', 'SUV', 'Hatchback', 'Auto', 'Bike']
+    Driver.objects.bulk_create(
+        [
+            Driver(
+                name=f'Driver {i}',
+                phone=f'{9000000000 + i}',
+                vehicle_type=vehicle_types[i % len(vehicle_types)],
+                vehicle_plate=f'KA{i:08d}',
+                is_active=i % 4 != 0,
+            )
+            for i in range(count)
+        ],
+        batch_size=2000,
+    )
+
+
+def timed(label, func, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f'{label:<36} {best * 1000:9.2f} ms  {rows / best:12,.0f} rows/sec')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--drivers', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+    create_drivers(args.drivers)
+
+    from rest_framework.renderers import JSONRenderer
+    from drivers.models import Driver
+    from drivers.renderers import ORJSONRenderer
+    from drivers.serializers import DriverListSerializer
+
+    fields = DriverListSerializer.Meta.fields
+    queryset = Driver.objects.order_by('-driver_id')
+
+    for size in [args.page_size, args.drivers]:
+        print(f'\n{size} rows')
+        timed(
+            'serializer + JSONRenderer',
+            lambda: JSONRenderer().render(DriverListSerializer(queryset[:size], many=True).data),
+            size,
+            args.repeat,
+        )
+        timed(
+            'values() + JSONRenderer',
+            lambda: JSONRenderer().render(list(queryset.values(*fields)[:size])),
+            size,
+            args.repeat,
+        )
+        timed(
+            'values() + ORJSONRenderer',
+            lambda: ORJSONRenderer().render(list(queryset.values(*fields)[:size])),
+            size,
+            args.repeat,
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+"""
+Settings for benchmark servers: the project settings with the database taken
+from BENCHMARK_DATABASE and debug tooling off.
+"""
+
+import os
+
+from driver_service.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+
+DATABASES['default'].update(  # noqa: F405
+    ENGINE='django.db.backends.sqlite3',
+    NAME=os.environ['BENCHMARK_DATABASE'],
+)
+
+# Keep the trip analytics snapshot with the benchmark database
+ANALYTICS_CACHE_DIR = os.path.join(os.path.dirname(os.environ['BENCHMARK_DATABASE']), 'analytics_cache')
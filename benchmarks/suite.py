@@ -0,0 +1,278 @@
+"""
+Time the service's key paths against a synthetic fleet.
+
+Generates a fleet with ``benchmarks.fleet`` and loads it into a fresh SQLite
+database with ``load_drivers``. It then times list, filter, search,
+ranking and cursor pages, stats, retrieve, status flips and the full
+export through Django's test client, in one process and with no network.
+With ``--trips`` it also loads a trips file and times ``available`` and the
+trip analytics report. Results are written as JSON. Pass a previous run as ``--compare`` to fail on
+regressions:
+
+    python -m benchmarks.suite --drivers 100000 --output results.json
+    python -m benchmarks.suite --drivers 100000 --output new.json --compare results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from io import StringIO
+
+from . import fleet
+
+ROOT = fleet.ROOT
+
+
+def setup(database):
+    sys.path.insert(0, ROOT)
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'benchmarks.settings'
+    os.environ['BENCHMARK_DATABASE'] = database
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(latencies, errors, rows=None):
+    """
+    Return the JSON result for a list of per-request latencies in seconds.
+    """
+    latencies = sorted(latencies)
+    total = sum(latencies)
+    result = {
+        'iterations': len(latencies),
+        'errors': errors,
+        'mean_ms': round(total / len(latencies) * 1000, 3),
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p95_ms': round(latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3),
+        'requests_per_sec': round(len(latencies) / total, 1),
+    }
+    if rows is not None:
+        result['rows_per_sec'] = round(rows * len(latencies) / total, 1)
+    return result
+
+
+def measure(request, iterations, warmup=2, rows=None):
+    """
+    Time ``request(i)`` ``iterations`` times after ``warmup`` untimed calls.
+
+    ``request`` returns the response; non-2xx responses count as errors.
+    """
+    for i in range(warmup):
+        request(i)
+    latencies = []
+    errors = 0
+    for i in range(iterations):
+        start = time.perf_counter()
+        response = request(i)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        latencies.append(time.perf_counter() - start)
+        if not 200 <= response.status_code < 300:
+            errors += 1
+    return summarize(latencies, errors, rows)
+
+
+def time_command(*args):
+    from django.core.management import call_command
+    start = time.perf_counter()
+    call_command(*args, stdout=StringIO(), stderr=StringIO())
+    return time.perf_counter() - start
+
+
+def run(args, directory):
+    profile = fleet.SeedProfile()
+    drivers_csv = os.path.join(directory, 'drivers.csv')
+    fleet.write_csv(drivers_csv, fleet.DRIVER_FIELDS, fleet.driver_rows(args.drivers, profile, args.seed))
+
+    setup(os.path.join(directory, 'benchmark.sqlite3'))
+    from django.db import connection
+    from django.test import Client
+    from drivers.models import Driver
+
+    results = {}
+    load_args = ['load_drivers', drivers_csv, '--batch-size', str(args.batch_size)]
+    if args.workers:
+        load_args += ['--workers', str(args.workers)]
+    elapsed = time_command(*load_args)
+    results['load_drivers'] = {
+        'rows': args.drivers,
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': round(args.drivers / elapsed, 1),
+    }
+
+    if args.trips:
+        trips_csv = os.path.join(directory, 'trips.csv')
+        trips = fleet.write_csv(trips_csv, fleet.TRIP_FIELDS, fleet.trip_rows(args.drivers, profile, args.seed))
+        for command in [
+            ('load_driver_zones', trips_csv),
+            ('load_trips', '--trips', trips_csv),
+            ('build_trip_analytics',),
+        ]:
+            elapsed = time_command(*command)
+            results[command[0]] = {
+                'rows': trips,
+                'seconds': round(elapsed, 3),
+                'rows_per_sec': round(trips / elapsed, 1),
+            }
+
+    rng = random.Random(args.seed)
+    client = Client(HTTP_ACCEPT='application/json')
+    n = args.iterations
+    ids = [rng.randint(1, args.drivers) for _ in range(n + 2)]
+    names = [rng.choice(fleet.LAST_NAMES).lower() for _ in range(n + 2)]
+    page_size = 10
+    deep_page = max(1, args.drivers // page_size // 2)
+
+    paths = {
+        'list_first_page': lambda i: client.get('/api/v1/drivers/'),
+        'list_deep_page': lambda i: client.get('/api/v1/drivers/', {'page': deep_page}),
+        'list_cursor_page': lambda i: client.get('/api/v1/drivers/', {'pagination': 'cursor'}),
+        'filter_active_vehicle_type': lambda i: client.get(
+            '/api/v1/drivers/active/', {'vehicle_type': 'Sedan'}
+        ),
+        'filter_by_vehicle_type': lambda i: client.get(
+            '/api/v1/drivers/by_vehicle_type/', {'vehicle_type': 'SUV'}
+        ),
+        'search': lambda i: client.get('/api/v1/drivers/', {'search': names[i]}),
+        'rank_by_rating': lambda i: client.get(
+            '/api/v1/drivers/', {'ordering': '-average_rating', 'pagination': 'cursor'}
+        ),
+        'stats': lambda i: client.get('/api/v1/drivers/stats/'),
+        'retrieve': lambda i: client.get(f'/api/v1/drivers/{ids[i]}/'),
+        'retrieve_cached': lambda i: client.get(f'/api/v1/drivers/{ids[0]}/'),
+        'status': lambda i: client.get(f'/api/v1/drivers/{ids[i]}/status/'),
+        'status_flip': lambda i: client.post(f'/api/v1/drivers/{ids[i]}/toggle_status/'),
+    }
+    if args.trips:
+        paths['available'] = lambda i: client.get(
+            '/api/v1/drivers/available/', {'zone': 'HSR', 'vehicle_type': 'Sedan'}
+        )
+        # Distinct windows, so each request aggregates the snapshot
+        paths['analytics'] = lambda i: client.get(
+            '/api/v1/drivers/analytics/', {'window_hours': 24 * 30 + i}
+        )
+    for name, request in paths.items():
+        results[name] = measure(request, n)
+
+    results['export_ndjson'] = measure(
+        lambda i: client.get('/api/v1/drivers/export/', {'format': 'ndjson'}),
+        args.export_iterations,
+        warmup=0,
+        rows=Driver.objects.count()
+    )
+
+    import django
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': f'{connection.vendor} {connection.Database.sqlite_version}',
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'drivers': args.drivers,
+            'seed': args.seed,
+            'iterations': n,
+            'fleet': profile.summary(),
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    Print each path against ``baseline`` and return the regressed ones.
+
+    Latency paths regress when their p50 grows by more than ``threshold``
+    times; loads regress when their rows/sec shrinks by as much.
+    """
+    regressions = []
+    print(f"\nagainst {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    for name, result in report['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        if 'p50_ms' in result:
+            ratio = result['p50_ms'] / before['p50_ms']
+            detail = f"p50 {before['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms"
+        else:
+            ratio = before['rows_per_sec'] / result['rows_per_sec']
+            detail = f"{before['rows_per_sec']:,.0f} -> {result['rows_per_sec']:,.0f} rows/s"
+        regressed = ratio > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<28} {detail:<36} x{ratio:5.2f}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def print_report(report):
+    meta = report['meta']
+    print(f"{meta['drivers']:,} drivers, {meta['database']}, commit {meta['commit']}")
+    for name, result in report['results'].items():
+        if 'p50_ms' in result:
+            line = (
+                f"p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+                f"{result['requests_per_sec']:9,.1f} req/s"
+            )
+            if 'rows_per_sec' in result:
+                line += f"  {result['rows_per_sec']:12,.0f} rows/s"
+            if result['errors']:
+                line += f"  errors {result['errors']}"
+        else:
+            line = f"{result['seconds']:9.2f} s  {result['rows_per_sec']:12,.0f} rows/s"
+        print(f'{name:<28} {line}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--drivers', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=100, help='Timed requests per path')
+    parser.add_argument('--export-iterations', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=5000, help='load_drivers --batch-size')
+    parser.add_argument('--workers', type=int, default=None, help='load_drivers --workers')
+    parser.add_argument('--trips', action='store_true', help='Also load trips and time available and analytics')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--compare', help='A previous JSON report to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25, help='Slowdown ratio counted as a regression')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        report = run(args, directory)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
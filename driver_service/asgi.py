@@ -3,6 +3,12 @@ ASGI config for driver_service project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests under ``/api/`` are handled with the ``ASYNC_API_MIDDLEWARE`` stack
+and the async driver read views; everything else (admin, static files) goes
+through the full ``MIDDLEWARE`` stack. Serve with::
+
+    uvicorn driver_service.asgi:application
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -13,5 +19,34 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'driver_service.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+from django.core.handlers.asgi import ASGIHandler  # noqa: E402
+
+
+class APIHandler(ASGIHandler):
+    """
+    ASGIHandler that loads ``ASYNC_API_MIDDLEWARE`` instead of ``MIDDLEWARE``.
+    """
+
+    def load_middleware(self, is_async=False):
+        """
+        Build the middleware chain with ``settings.MIDDLEWARE`` swapped for
+        ``ASYNC_API_MIDDLEWARE``, restoring it once the chain is built.
+        """
+        middleware = settings.MIDDLEWARE
+        settings.MIDDLEWARE = settings.ASYNC_API_MIDDLEWARE
+        try:
+            super().load_middleware(is_async)
+        finally:
+            settings.MIDDLEWARE = middleware
+
+
+api_application = APIHandler()
+
 
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'].startswith('/api/'):
+        return await api_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -2,7 +2,9 @@
 Django settings for driver_service project.
 """
 
+from importlib.util import find_spec
 from pathlib import Path
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -11,13 +13,15 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
 
+# Settings marked with config() are read from the environment or a .env file.
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-driver-service-key-change-in-production'
+SECRET_KEY = config('SECRET_KEY', default='django-insecure-driver-service-key-change-in-production')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = config('DEBUG', default=True, cast=bool)
 
-ALLOWED_HOSTS = ['*']
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='*', cast=Csv())
 
 
 # Application definition
@@ -40,17 +44,36 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
+    'drivers.middleware.HealthCheckMiddleware',
+    'drivers.middleware.RequestMetricsMiddleware',
+    'drivers.middleware.AsyncURLConfMiddleware',
+    'drivers.middleware.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
-    'django.middleware.common.CommonMiddleware',
+    'drivers.middleware.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'drivers.middleware.XFrameOptionsMiddleware',
+]
+
+# Middleware for /api/ requests served through asgi.py. The API is anonymous,
+# so the session, CSRF, auth and messages middleware (each a thread hop per
+# request under ASGI) are left out; DRF checks CSRF itself for
+# session-authenticated requests.
+ASYNC_API_MIDDLEWARE = [
+    'drivers.middleware.HealthCheckMiddleware',
+    'drivers.middleware.RequestMetricsMiddleware',
+    'drivers.middleware.AsyncURLConfMiddleware',
+    'drivers.middleware.SecurityMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'drivers.middleware.CommonMiddleware',
+    'drivers.middleware.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'driver_service.urls'
+# Used instead for requests served through asgi.py (async read views)
+ASYNC_ROOT_URLCONF = 'driver_service.urls_async'
 
 TEMPLATES = [
     {
@@ -76,8 +99,16 @@ WSGI_APPLICATION = 'driver_service.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': config('DB_ENGINE', default='django.db.backends.sqlite3'),
+        'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+        'USER': config('DB_USER', default=''),
+        'PASSWORD': config('DB_PASSWORD', default=''),
+        'HOST': config('DB_HOST', default=''),
+        'PORT': config('DB_PORT', default=''),
+        # Keep connections open between requests instead of connecting per
+        # request, and check a reused connection is alive before using it
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -134,7 +165,7 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'drivers.renderers.ORJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
@@ -144,6 +175,96 @@ REST_FRAMEWORK = {
     ],
 }
 
+# The driver change feed holds back rows stamped in the last N seconds, so
+# slow transactions that commit after a newer one are not skipped
+DRIVER_CHANGES_SETTLE_SECONDS = 5
+
+# Driver status stream (Server-Sent Events): events buffered per listener
+# before it is disconnected as too slow, idle keep-alive interval, and
+# maximum connection length before the client reconnects
+DRIVER_STREAM_QUEUE_SIZE = 100
+DRIVER_STREAM_HEARTBEAT_SECONDS = 15
+DRIVER_STREAM_MAX_SECONDS = 300
+
+# Caches. The "drivers" cache holds the per-driver rows read by retrieve,
+# details and status; local memory evicts the least recently used entries
+# beyond MAX_ENTRIES. Set DRIVER_CACHE_REDIS_URL to share it between processes
+# (Redis should then run with an allkeys-lru maxmemory policy).
+DRIVER_CACHE_ALIAS = 'drivers'
+DRIVER_CACHE_TIMEOUT = 300
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'drivers': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'drivers',
+        'TIMEOUT': DRIVER_CACHE_TIMEOUT,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
+DRIVER_CACHE_REDIS_URL = config('DRIVER_CACHE_REDIS_URL', default='')
+if DRIVER_CACHE_REDIS_URL:
+    CACHES['drivers'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': DRIVER_CACHE_REDIS_URL,
+        'TIMEOUT': DRIVER_CACHE_TIMEOUT,
+        'KEY_PREFIX': 'driver_service',
+    }
+
+# Offer MessagePack responses (Accept: application/msgpack) when msgpack is installed
+if find_spec('msgpack') is not None:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(1, 'drivers.renderers.MessagePackRenderer')
+
+# Seconds before each process reloads its in-memory available-driver index,
+# picking up status changes made by other server processes
+DRIVER_AVAILABILITY_REFRESH_SECONDS = 30
+
+# /readyz: seconds to wait for the database to answer SELECT 1, and seconds
+# a result is reused before the database is queried again
+READINESS_TIMEOUT_SECONDS = 1.0
+READINESS_CACHE_SECONDS = 2.0
+
+# Request instrumentation: fraction of requests broken down into database,
+# serializer and render time (Server-Timing header and a JSON log line),
+# queries logged as slow (milliseconds, empty to disable), and the path
+# serving the latency histograms in Prometheus text format
+INSTRUMENTATION_SAMPLE_RATE = config('INSTRUMENTATION_SAMPLE_RATE', default=0.0, cast=float)
+SLOW_QUERY_THRESHOLD_MS = config(
+    'SLOW_QUERY_THRESHOLD_MS',
+    default='200',
+    cast=lambda value: float(value) if value else None
+)
+INSTRUMENTATION_METRICS_PATH = '/metrics'
+
+# Trip analytics: directory holding the columnar trip and payment snapshot
+# memory-mapped by every process, and seconds before a process checks
+# whether trips, ratings or payments changed since the snapshot was built
+ANALYTICS_CACHE_DIR = config('ANALYTICS_CACHE_DIR', default=str(BASE_DIR / 'analytics_cache'))
+ANALYTICS_REFRESH_SECONDS = config('ANALYTICS_REFRESH_SECONDS', default=300, cast=int)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'drivers.instrumentation': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
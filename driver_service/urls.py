@@ -12,7 +12,7 @@ router.register(r'drivers', DriverViewSet, basename='driver')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/v1/', include(router.urls)),
     path('api/v1/', include('drivers.urls')),
+    path('api/v1/', include(router.urls)),
 ]
 
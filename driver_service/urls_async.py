@@ -0,0 +1,19 @@
+"""
+URL configuration for requests served through asgi.py.
+
+The DriverViewSet read endpoints are routed to their async versions in
+drivers.async_views; every other URL is taken from driver_service.urls.
+"""
+from django.urls import re_path
+from drivers import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    re_path(r'^api/v1/drivers/$', async_views.driver_list, name='driver-list'),
+    re_path(r'^api/v1/drivers/active/$', async_views.driver_active, name='driver-active'),
+    re_path(r'^api/v1/drivers/inactive/$', async_views.driver_inactive, name='driver-inactive'),
+    re_path(r'^api/v1/drivers/stats/$', async_views.driver_stats, name='driver-stats'),
+    # Numeric IDs only, so named list routes still reach the router
+    re_path(r'^api/v1/drivers/(?P<pk>[0-9]+)/$', async_views.driver_detail, name='driver-detail'),
+    re_path(r'^api/v1/drivers/(?P<pk>[0-9]+)/status/$', async_views.driver_status, name='driver-driver-status'),
+] + sync_urlpatterns
@@ -59,7 +59,7 @@ class DriverAdmin(admin.ModelAdmin):
         """
         Custom action to activate selected drivers.
         """
-        count = queryset.update(is_active=True)
+        count = len(queryset.set_active(True))
         self.message_user(request, f'{count} driver(s) activated successfully.')
     activate_drivers.short_description = 'Activate selected drivers'
     
@@ -67,7 +67,7 @@ class DriverAdmin(admin.ModelAdmin):
         """
         Custom action to deactivate selected drivers.
         """
-        count = queryset.update(is_active=False)
+        count = len(queryset.set_active(False))
         self.message_user(request, f'{count} driver(s) deactivated successfully.')
     deactivate_drivers.short_description = 'Deactivate selected drivers'
 
@@ -0,0 +1,562 @@
+"""
+Fleet analytics over trips and payments, computed on columnar NumPy arrays.
+
+Trips and payments are read once into one array per column (zones and
+statuses dictionary-encoded as small integers, times as local wall-clock
+seconds) and saved as ``.npy`` files under ``ANALYTICS_CACHE_DIR``. Every
+process memory-maps the same snapshot, so it is read from the page cache
+rather than the database, and each report is a handful of ``bincount`` and
+sort passes over whole columns instead of per-row ORM work. Payments are
+joined to their trips once, when the snapshot is built.
+
+Every write to trips, ratings or payments refreshes the driver's
+``DriverPerformance`` row, so the latest refresh (read from its index)
+together with the latest driver deletion stamps the source tables. Each
+process checks that stamp at most every ``ANALYTICS_REFRESH_SECONDS``. When
+it moved, requests keep reading the stale snapshot while a background
+thread rebuilds it; requests never build one. ``build_trip_analytics``
+builds it ahead of time, and until a first snapshot exists reports raise
+``SnapshotUnavailable``. Builds hold a lock file in ``ANALYTICS_CACHE_DIR``,
+so one process at a time builds and prunes old snapshots. Reports are
+cached per snapshot and window.
+"""
+
+import calendar
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+from itertools import islice
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+from .models import DriverPerformance, DriverTombstone, Payment, Trip
+from .trip_choices import CANCELLED, COMPLETED, PAYMENT_METHODS, PAYMENT_STATUSES, SUCCESS, TRIP_STATUSES
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: builds are only serialized within a process
+    fcntl = None
+
+logger = logging.getLogger('drivers.analytics')
+
+READ_CHUNK_SIZE = 100000
+
+# Longest accepted report window: ten years of hours
+MAX_WINDOW_HOURS = 24 * 366 * 10
+
+# Drivers listed in the utilisation leaderboard
+TOP_DRIVERS = 10
+
+TRIP_COLUMNS = {
+    'trip_id': np.int64,
+    'driver_id': np.int64,
+    'pickup_zone': np.int32,
+    'status': np.int8,
+    'requested_at': np.int64,
+    'distance_km': np.float64,
+    'surge_multiplier': np.float64,
+    'total_fare': np.float64,
+}
+
+PAYMENT_COLUMNS = {
+    'trip_id': np.int64,
+    'amount': np.float64,
+    'method': np.int8,
+    'status': np.int8,
+}
+
+# Derived at build time: each payment's row in the trip columns, or -1
+PAYMENT_TRIP_ROW = 'trip_row'
+
+POINTER_FILE = 'CURRENT'
+
+LOCK_FILE = '.lock'
+
+
+class SnapshotUnavailable(Exception):
+    """
+    No snapshot has been built yet; one is being built in the background.
+    """
+
+
+@contextmanager
+def build_lock(directory, blocking=True):
+    """
+    Hold the exclusive build lock of ``directory``.
+
+    Yields False without waiting if ``blocking`` is false and another
+    process or thread holds it.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK_FILE), 'a') as f:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def local_seconds(value):
+    """
+    Return an aware datetime as seconds since the epoch on the local wall
+    clock, so ``// 3600 % 24`` is its local hour of day.
+    """
+    return calendar.timegm(timezone.localtime(value).timetuple())
+
+
+def from_local_seconds(seconds):
+    return timezone.make_aware(datetime(1970, 1, 1) + timedelta(seconds=int(seconds))).isoformat()
+
+
+def read_columns(queryset, columns, converters, chunk_size=READ_CHUNK_SIZE):
+    """
+    Read ``columns`` ({field: dtype}) of ``queryset`` into one array each.
+
+    ``converters`` maps fields to functions applied to each value first.
+    Rows are streamed in chunks, so only one chunk of Python objects is
+    alive at a time.
+    """
+    parts = {name: [] for name in columns}
+    rows = queryset.values_list(*columns).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        for (name, dtype), values in zip(columns.items(), zip(*chunk)):
+            convert = converters.get(name)
+            if convert is not None:
+                values = map(convert, values)
+            parts[name].append(np.fromiter(values, dtype=dtype, count=len(chunk)))
+    return {
+        name: np.concatenate(parts[name]) if parts[name] else np.empty(0, dtype=dtype)
+        for name, dtype in columns.items()
+    }
+
+
+def source_stamp():
+    """
+    Return a value that changes whenever trips, ratings or payments do.
+    """
+    refreshed = DriverPerformance.objects.aggregate(value=Max('updated_at'))['value']
+    deleted = DriverTombstone.objects.aggregate(value=Max('id'))['value']
+    return f"{refreshed.isoformat() if refreshed else ''}.{deleted or 0}"
+
+
+class Snapshot:
+    """
+    Trip and payment columns with their zone names and build metadata.
+    """
+
+    def __init__(self, trips, payments, zones, meta):
+        self.trips = trips
+        self.payments = payments
+        self.zones = zones
+        self.meta = meta
+
+    @property
+    def version(self):
+        return self.meta['version']
+
+    @classmethod
+    def from_database(cls, chunk_size=READ_CHUNK_SIZE):
+        """
+        Read trips (ordered by trip_id) and payments from the database.
+        """
+        source = source_stamp()
+        zone_codes = {}
+        statuses = {status: code for code, status in enumerate(TRIP_STATUSES)}
+        trips = read_columns(
+            Trip.objects.order_by('trip_id'),
+            TRIP_COLUMNS,
+            {
+                'pickup_zone': lambda zone: zone_codes.setdefault(zone, len(zone_codes)),
+                'status': statuses.__getitem__,
+                'requested_at': local_seconds,
+            },
+            chunk_size
+        )
+        payments = read_columns(
+            Payment.objects.order_by('trip_id'),
+            PAYMENT_COLUMNS,
+            {
+                'method': {method: code for code, method in enumerate(PAYMENT_METHODS)}.__getitem__,
+                'status': {status: code for code, status in enumerate(PAYMENT_STATUSES)}.__getitem__,
+            },
+            chunk_size
+        )
+        payments[PAYMENT_TRIP_ROW] = trip_rows(trips['trip_id'], payments['trip_id'])
+        meta = {
+            'version': uuid.uuid4().hex,
+            'source': source,
+            'built_at': timezone.now().isoformat(),
+            'trips': len(trips['trip_id']),
+            'payments': len(payments['trip_id']),
+        }
+        return cls(trips, payments, list(zone_codes), meta)
+
+    def save(self, directory):
+        """
+        Write the snapshot under ``directory`` and make it the current one.
+
+        Call it holding ``build_lock(directory)``. Each snapshot gets its
+        own subdirectory and the ``CURRENT`` pointer is replaced atomically,
+        so readers never see a partial snapshot. Snapshots older than the
+        previous one are removed; processes still mapping them keep their
+        open files.
+        """
+        previous = current_version(directory)
+        path = os.path.join(directory, self.version)
+        os.makedirs(path)
+        for table, columns in (('trips', self.trips), ('payments', self.payments)):
+            for name, values in columns.items():
+                np.save(os.path.join(path, f'{table}.{name}.npy'), values)
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({**self.meta, 'zones': self.zones}, f)
+
+        pointer = os.path.join(directory, f'.{POINTER_FILE}.{self.version}')
+        with open(pointer, 'w', encoding='utf-8') as f:
+            f.write(self.version)
+        os.replace(pointer, os.path.join(directory, POINTER_FILE))
+
+        # Kept for readers that read the old pointer but have not opened it yet
+        keep = {POINTER_FILE, self.version, previous}
+        for name in os.listdir(directory):
+            if name not in keep and not name.startswith('.'):
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+    @classmethod
+    def open(cls, directory):
+        """
+        Memory-map the current snapshot under ``directory``, or return None.
+        """
+        version = current_version(directory)
+        if version is None:
+            return None
+        path = os.path.join(directory, version)
+        try:
+            with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+            columns = {
+                table: {
+                    name: np.load(os.path.join(path, f'{table}.{name}.npy'), mmap_mode='r')
+                    for name in table_columns
+                }
+                for table, table_columns in (
+                    ('trips', list(TRIP_COLUMNS)),
+                    ('payments', [*PAYMENT_COLUMNS, PAYMENT_TRIP_ROW]),
+                )
+            }
+        except (OSError, ValueError):
+            return None
+        zones = meta.pop('zones')
+        return cls(columns['trips'], columns['payments'], zones, meta)
+
+
+def current_version(directory):
+    """
+    Return the version named by the ``CURRENT`` pointer, or None.
+    """
+    try:
+        with open(os.path.join(directory, POINTER_FILE), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def trip_rows(trip_ids, payment_trip_ids):
+    """
+    Return the row of each payment's trip in the sorted ``trip_ids``, or -1
+    for trips missing from the snapshot.
+
+    Payments are read ordered by trip, so this binary search walks the trip
+    column in order rather than jumping around it.
+    """
+    rows = np.searchsorted(trip_ids, payment_trip_ids)
+    rows[rows == len(trip_ids)] = 0
+    if len(trip_ids):
+        rows[trip_ids[rows] != payment_trip_ids] = -1
+    else:
+        rows[:] = -1
+    return rows
+
+
+def distinct(values):
+    """
+    Return the sorted distinct ``values``.
+
+    Sorting and comparing neighbours is faster than ``np.unique`` on large
+    integer arrays.
+    """
+    values = np.sort(values)
+    if not len(values):
+        return values
+    keep = np.empty(len(values), dtype=bool)
+    keep[0] = True
+    np.not_equal(values[1:], values[:-1], out=keep[1:])
+    return values[keep]
+
+
+def ratio(numerator, denominator):
+    """
+    Return ``numerator / denominator`` as a list of rounded floats, with
+    None where the denominator is zero.
+    """
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    values = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
+    return [
+        round(float(value), 4) if divisor else None
+        for value, divisor in zip(values.tolist(), denominator.tolist())
+    ]
+
+
+def by_zone(zones, values):
+    return {zone: values[code] for zone, code in sorted((zone, code) for code, zone in enumerate(zones))}
+
+
+def summarize(snapshot, window_hours=None):
+    """
+    Aggregate a snapshot's trips requested in the last ``window_hours``
+    hours before its latest trip (all trips if None), and their payments.
+    """
+    trips = snapshot.trips
+    zones = snapshot.zones
+    zone_count = len(zones)
+    times = trips['requested_at']
+
+    # Whole clock hours, local time
+    end_hour = int(times.max()) // 3600 if len(times) else 0
+    if window_hours is None:
+        first_hour = int(times.min()) // 3600 if len(times) else 0
+        selected = None
+        columns = trips
+    else:
+        first_hour = end_hour - window_hours + 1
+        selected = times >= first_hour * 3600
+        columns = {name: values[selected] for name, values in trips.items()}
+    span_hours = end_hour - first_hour + 1
+
+    hours = columns['requested_at'] // 3600
+    zone = columns['pickup_zone']
+    status = columns['status']
+    completed = status == TRIP_STATUSES.index(COMPLETED)
+    cancelled = status == TRIP_STATUSES.index(CANCELLED)
+
+    # Zone x hour-of-day cells
+    cells = zone.astype(np.int64) * 24 + hours % 24
+    demand = np.bincount(cells, minlength=zone_count * 24).reshape(zone_count, 24)
+    surge = np.bincount(
+        cells, weights=columns['surge_multiplier'], minlength=zone_count * 24
+    ).reshape(zone_count, 24)
+
+    # Fares per km of completed trips with a distance
+    fared = completed & (columns['distance_km'] > 0)
+    fares = np.bincount(zone[fared], weights=columns['total_fare'][fared], minlength=zone_count)
+    distances = np.bincount(zone[fared], weights=columns['distance_km'][fared], minlength=zone_count)
+
+    # A driver is busy in an hour when one of their uncancelled trips was
+    # requested in it
+    busy = ~cancelled
+    keys = distinct(columns['driver_id'][busy] * span_hours + (hours[busy] - first_hour))
+    drivers = keys // span_hours
+    driver_ids = distinct(drivers)
+    busy_hours = np.diff(np.searchsorted(drivers, driver_ids, side='right'), prepend=0)
+    utilisation = busy_hours / span_hours
+    top = np.argsort(-busy_hours, kind='stable')[:TOP_DRIVERS]
+
+    # Payments of the selected trips, through their precomputed trip rows
+    payments = snapshot.payments
+    positions = payments[PAYMENT_TRIP_ROW]
+    joined = positions >= 0
+    if selected is not None:
+        joined &= selected[positions]
+    succeeded = joined & (payments['status'] == PAYMENT_STATUSES.index(SUCCESS))
+    amounts = payments['amount'][succeeded]
+    collected_by_method = np.bincount(
+        payments['method'][succeeded], weights=amounts, minlength=len(PAYMENT_METHODS)
+    )
+    collected_by_zone = np.bincount(
+        trips['pickup_zone'][positions[succeeded]], weights=amounts, minlength=zone_count
+    )
+    payment_count = int(joined.sum())
+
+    return {
+        'window': {
+            'start': from_local_seconds(first_hour * 3600),
+            'end': from_local_seconds((end_hour + 1) * 3600),
+            'hours': span_hours,
+        } if len(times) else None,
+        'trips': len(hours),
+        'completed_trips': int(completed.sum()),
+        'cancelled_trips': int(cancelled.sum()),
+        'zones': sorted(zones),
+        'demand': by_zone(zones, demand.tolist()),
+        'surge': {
+            'average': round(float(columns['surge_multiplier'].mean()), 4) if len(hours) else None,
+            'by_zone': by_zone(zones, ratio(surge.sum(axis=1), demand.sum(axis=1))),
+            'by_hour': ratio(surge.sum(axis=0), demand.sum(axis=0)),
+        },
+        'fare_per_km': {
+            'average': ratio([fares.sum()], [distances.sum()])[0],
+            'by_zone': by_zone(zones, ratio(fares, distances)),
+        },
+        'payments': {
+            'count': payment_count,
+            'success_rate': ratio([succeeded.sum()], [payment_count])[0],
+            'collected': round(float(amounts.sum()), 2),
+            'by_method': {
+                method: round(value, 2)
+                for method, value in zip(PAYMENT_METHODS, collected_by_method.tolist())
+            },
+            'by_zone': by_zone(zones, [round(value, 2) for value in collected_by_zone.tolist()]),
+        },
+        'utilisation': {
+            'drivers': len(driver_ids),
+            'average': round(float(utilisation.mean()), 4) if len(driver_ids) else None,
+            'p50': round(float(np.percentile(utilisation, 50)), 4) if len(driver_ids) else None,
+            'p90': round(float(np.percentile(utilisation, 90)), 4) if len(driver_ids) else None,
+            'top': [
+                {
+                    'driver_id': int(driver_ids[index]),
+                    'busy_hours': int(busy_hours[index]),
+                    'utilisation': round(float(utilisation[index]), 4),
+                }
+                for index in top.tolist()
+            ],
+        },
+    }
+
+
+class TripAnalytics:
+    """
+    The current snapshot of this process and the reports computed from it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = None
+        self._refreshing = False
+
+    @property
+    def directory(self):
+        return str(settings.ANALYTICS_CACHE_DIR)
+
+    def build(self, chunk_size=READ_CHUNK_SIZE):
+        """
+        Read a new snapshot from the database, save it and use it.
+
+        Waits for a build running in another process to finish first.
+        """
+        with build_lock(self.directory):
+            return self._build(chunk_size)
+
+    def refresh(self):
+        """
+        Build a new snapshot unless it is current or another process is
+        building one. Returns the snapshot built, or None.
+        """
+        with build_lock(self.directory, blocking=False) as locked:
+            if not locked:
+                return None
+            snapshot = Snapshot.open(self.directory)
+            if snapshot is not None and snapshot.meta['source'] == source_stamp():
+                self._use(snapshot)
+                return None
+            return self._build()
+
+    def _build(self, chunk_size=READ_CHUNK_SIZE):
+        snapshot = Snapshot.from_database(chunk_size)
+        snapshot.save(self.directory)
+        return self._use(Snapshot.open(self.directory) or snapshot)
+
+    def _use(self, snapshot):
+        with self._lock:
+            self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+        return snapshot
+
+    def start_refresh(self):
+        """
+        Run ``refresh`` in a background thread, unless one is running.
+        """
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_worker, name='trip-analytics', daemon=True).start()
+
+    def _refresh_worker(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception('Trip analytics snapshot build failed')
+        finally:
+            with self._lock:
+                self._refreshing = False
+            connection.close()
+
+    def clear(self):
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = None
+
+    def snapshot(self):
+        """
+        Return the current snapshot, opening it if this process has none or
+        ``ANALYTICS_REFRESH_SECONDS`` have passed since the last check.
+
+        A missing snapshot, or one older than the source tables, is rebuilt
+        in the background; until a first one exists this raises
+        ``SnapshotUnavailable``.
+        """
+        refresh_seconds = getattr(settings, 'ANALYTICS_REFRESH_SECONDS', 300)
+        with self._lock:
+            checked_at = self._checked_at
+            if checked_at is not None and time.monotonic() - checked_at <= refresh_seconds:
+                return self._snapshot
+
+        # The build command or another process may have rebuilt it
+        snapshot = Snapshot.open(self.directory)
+        if snapshot is None or snapshot.meta['source'] != source_stamp():
+            self.start_refresh()
+        with self._lock:
+            if snapshot is not None:
+                if self._snapshot is None or self._snapshot.version != snapshot.version:
+                    self._snapshot = snapshot
+                self._checked_at = time.monotonic()
+            if self._snapshot is None:
+                raise SnapshotUnavailable
+            return self._snapshot
+
+    def report(self, window_hours=None):
+        """
+        Return the report of trips in the last ``window_hours`` hours.
+        """
+        snapshot = self.snapshot()
+        key = f'trip_analytics:{snapshot.version}:{window_hours or "all"}'
+        report = cache.get(key)
+        if report is None:
+            report = {'built_at': snapshot.meta['built_at'], **summarize(snapshot, window_hours)}
+            cache.set(key, report)
+        return report
+
+
+trip_analytics = TripAnalytics()
@@ -5,3 +5,8 @@ class DriversConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'drivers'
 
+    def ready(self):
+        # Connect signal receivers
+        from . import (  # noqa: F401
+            availability, cache, counters, events, feed, instrumentation, performance, receivers, search
+        )
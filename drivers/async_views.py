@@ -0,0 +1,274 @@
+"""
+Async versions of the DriverViewSet read actions.
+
+Requests served through ``asgi.py`` are routed here by
+``AsyncURLConfMiddleware``. Each view sets up a DriverViewSet for the request
+the way DRF's dispatch does and reuses its filtering, ``?fields=``,
+pagination, conditional-GET and rendering code, so responses are identical
+to the sync views. Database reads go through the async ORM, cached drivers
+are served without leaving the event loop, and JSON/MessagePack bodies are
+rendered inline instead of in a worker thread.
+
+Methods other than GET and HEAD are passed to the sync view for the same
+URL.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponse
+from django.urls import resolve
+from rest_framework.response import Response
+from . import counters
+from .cache import driver_cache
+from .instrumentation import span
+from .serializers import DriverSerializer
+from .views import DriverViewSet
+
+
+class PrefetchedRows:
+    """
+    The count and one slice of a queryset, fetched ahead with the async ORM,
+    in the shape Django's Paginator reads them.
+    """
+
+    def __init__(self, count, start=0, stop=0, rows=()):
+        self._count = count
+        self.window = slice(start, stop)
+        self.rows = rows
+
+    def count(self):
+        return self._count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, key):
+        if key != self.window:
+            raise IndexError(f'Only {self.window} was prefetched')
+        return self.rows
+
+
+async def paginate(view, rows):
+    """
+    Async version of ``view.paginate_queryset(rows)``.
+    """
+    paginator = view.paginator
+    if paginator is None:
+        return None
+    request = view.request
+    if paginator.use_cursor(request):
+        return await sync_to_async(paginator.paginate_queryset)(rows, request, view)
+
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return None
+
+    # Work out the page's slice as Paginator.page() will, then fetch it
+    count = await rows.acount()
+    probe = paginator.django_paginator_class(PrefetchedRows(count), page_size)
+    try:
+        number = probe.validate_number(paginator.get_page_number(request, probe))
+    except InvalidPage:
+        # paginate_queryset raises NotFound without slicing
+        prefetched = PrefetchedRows(count)
+    else:
+        bottom = (number - 1) * page_size
+        top = bottom + page_size
+        if top + probe.orphans >= count:
+            top = count
+        prefetched = PrefetchedRows(count, bottom, top, [row async for row in rows[bottom:top]])
+
+    return paginator.paginate_queryset(prefetched, request, view)
+
+
+def make_view(request, action, kwargs):
+    """
+    Set up a DriverViewSet for ``action`` as DRF's dispatch would.
+    """
+    detail = 'pk' in kwargs
+    handler = getattr(DriverViewSet, action)
+    # The initkwargs the router passes to as_view()
+    initkwargs = getattr(handler, 'kwargs', {'suffix': 'Instance' if detail else 'List'})
+    view = DriverViewSet(
+        basename='driver',
+        detail=detail,
+        action_map={'get': action, 'head': action},
+        args=(),
+        kwargs=kwargs,
+        format_kwarg=None,
+        **initkwargs
+    )
+    view.request = view.initialize_request(request, **kwargs)
+    view.headers = view.default_response_headers
+    return view
+
+
+async def initial(view, kwargs):
+    """
+    Run the view's content negotiation, versioning, authentication,
+    permission and throttle checks, as DRF's dispatch does.
+
+    Authenticating credentials may query the database, so requests carrying
+    an Authorization header are checked in a worker thread; anonymous
+    requests stay on the event loop.
+    """
+    if 'HTTP_AUTHORIZATION' in view.request.META:
+        await sync_to_async(view.initial)(view.request, **kwargs)
+    else:
+        view.initial(view.request, **kwargs)
+
+
+async def render(response):
+    """
+    Render a DRF response and return it as a plain HttpResponse, so the
+    handler does not render it again in a worker thread.
+    """
+    if not hasattr(response, 'render'):
+        return response
+    with span('render'):
+        if response.accepted_renderer.format == 'api':
+            # The browsable API reads forms and pagination from the view
+            await sync_to_async(response.render)()
+        else:
+            response.render()
+
+    rendered = HttpResponse(response.content, status=response.status_code)
+    for header, value in response.items():
+        rendered[header] = value
+    return rendered
+
+
+def async_read(action):
+    """
+    Wrap ``handler(view, **kwargs)`` as an async view for ``action``.
+    """
+    def decorator(handler):
+        async def async_view(request, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                match = resolve(request.path_info, urlconf=settings.ROOT_URLCONF)
+                return await sync_to_async(match.func)(request, *match.args, **match.kwargs)
+
+            view = make_view(request, action, kwargs)
+            try:
+                await initial(view, kwargs)
+                response = await handler(view, **kwargs)
+            except Exception as exc:
+                response = view.handle_exception(exc)
+
+            response = view.finalize_response(view.request, response)
+            return await render(response)
+
+        # DRF checks CSRF itself, for session-authenticated requests only
+        async_view.csrf_exempt = True
+        async_view.__name__ = handler.__name__
+        async_view.__doc__ = handler.__doc__
+        return async_view
+    return decorator
+
+
+async def list_response(view, queryset):
+    """
+    Async version of ``DriverViewSet.list_response``.
+    """
+    fields, columns, rows = view.list_rows(queryset)
+    etag = None
+    if view.versions_collection():
+        version = {}
+        for versioned, aggregates in view.collection_aggregates(queryset):
+            version.update(await versioned.aaggregate(**aggregates))
+        etag = view.collection_etag(version)
+
+    response = view.not_modified(etag, None) if etag is not None else None
+    if response is None:
+        page = await paginate(view, rows)
+        if page is not None:
+            response = view.get_paginated_response(view.trim_rows(page, fields, columns))
+        else:
+            response = Response(view.trim_rows([row async for row in rows], fields, columns))
+    if etag is None:
+        return response
+    return view.set_validators(response, etag, None)
+
+
+async def get_driver(view, pk):
+    """
+    Async version of ``DriverViewSet.get_object`` for cached reads.
+    """
+    try:
+        driver_id = int(pk)
+    except (TypeError, ValueError):
+        raise Http404
+    driver = await driver_cache.aget(driver_id, view.get_queryset())
+    if driver is None:
+        raise Http404
+    view.check_object_permissions(view.request, driver)
+    return driver
+
+
+@async_read('list')
+async def driver_list(view):
+    """
+    List drivers.
+    """
+    return await list_response(view, view.filter_queryset(view.get_queryset()))
+
+
+@async_read('active')
+async def driver_active(view):
+    """
+    Get all active drivers.
+    """
+    return await list_response(view, view.filter_queryset(view.queryset.filter(is_active=True)))
+
+
+@async_read('inactive')
+async def driver_inactive(view):
+    """
+    Get all inactive drivers.
+    """
+    return await list_response(view, view.filter_queryset(view.queryset.filter(is_active=False)))
+
+
+@async_read('retrieve')
+async def driver_detail(view, pk):
+    """
+    Get a driver.
+    """
+    fields = view.get_sparse_fields(DriverSerializer.Meta.fields)
+    driver = await get_driver(view, pk)
+    etag, last_modified = view.driver_validators(driver)
+
+    response = view.not_modified(etag, last_modified)
+    if response is None:
+        response = Response(DriverSerializer(driver, fields=fields).data)
+    return view.set_validators(response, etag, last_modified)
+
+
+@async_read('driver_status')
+async def driver_status(view, pk):
+    """
+    Get the status of a specific driver.
+    """
+    fields = view.get_status_fields()
+    driver = await get_driver(view, pk)
+    etag, last_modified = view.driver_validators(driver)
+
+    response = view.not_modified(etag, last_modified)
+    if response is None:
+        response = Response(view.status_data(driver, fields))
+    return view.set_validators(response, etag, last_modified)
+
+
+@async_read('stats')
+async def driver_stats(view):
+    """
+    Get driver statistics.
+    """
+    stats = view.sparse(await counters.aget_stats())
+    etag = view.stats_etag(stats)
+
+    response = view.not_modified(etag, None)
+    if response is None:
+        response = Response(stats)
+    return view.set_validators(response, etag, None)
@@ -0,0 +1,205 @@
+"""
+In-memory index of available drivers by zone and vehicle type.
+
+Active drivers with a known ``last_zone`` are bucketed by (zone, vehicle_type)
+so dispatch can fetch candidates without querying the drivers table. The
+index is loaded by the first lookup and follows ``drivers_changed`` once the
+writing transaction commits. To pick up writes made by other server
+processes, it is reloaded in a background thread once it is older than
+``DRIVER_AVAILABILITY_REFRESH_SECONDS``. Lookups keep reading the old index
+meanwhile, and changes applied during a reload are replayed on the new one.
+"""
+
+import logging
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.db import connection, transaction
+from django.dispatch import receiver
+from .models import Driver
+from .signals import drivers_changed
+
+
+logger = logging.getLogger('drivers.availability')
+
+
+def bucket_key(zone, vehicle_type):
+    return zone.casefold(), vehicle_type.casefold()
+
+
+class AvailableDriverIndex:
+    """
+    Active drivers grouped by (zone, vehicle_type).
+
+    Buckets keep insertion order, so the drivers that became available
+    first are offered first.
+    """
+
+    def __init__(self, refresh_seconds=None):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        # Held while reading the table, so only one load runs at a time
+        self._load_lock = threading.Lock()
+        self._buckets = defaultdict(dict)
+        self._driver_keys = {}
+        self._loaded_at = None
+        # Changes applied while a load reads the table, or None
+        self._pending = None
+        self._reloading = False
+
+    @staticmethod
+    def _add(buckets, driver_keys, driver_id, zone, vehicle_type):
+        key = bucket_key(zone, vehicle_type)
+        buckets[key][driver_id] = vehicle_type
+        driver_keys[driver_id] = key
+
+    def _remove(self, driver_id):
+        key = self._driver_keys.pop(driver_id, None)
+        if key is not None:
+            bucket = self._buckets[key]
+            bucket.pop(driver_id, None)
+            if not bucket:
+                del self._buckets[key]
+
+    def rows(self):
+        """
+        Return the ``(driver_id, last_zone, vehicle_type)`` of available drivers.
+        """
+        return (
+            Driver.objects.filter(is_active=True)
+            .exclude(last_zone='')
+            .order_by('updated_at')
+            .values_list('driver_id', 'last_zone', 'vehicle_type')
+            .iterator()
+        )
+
+    def load(self):
+        """
+        Rebuild the index from the drivers table.
+        """
+        with self._load_lock:
+            self._load()
+
+    def _load(self):
+        with self._lock:
+            self._pending = []
+        try:
+            buckets = defaultdict(dict)
+            driver_keys = {}
+            for driver_id, zone, vehicle_type in self.rows():
+                self._add(buckets, driver_keys, driver_id, zone, vehicle_type)
+        finally:
+            with self._lock:
+                pending, self._pending = self._pending, None
+
+        with self._lock:
+            self._buckets = buckets
+            self._driver_keys = driver_keys
+            # The rows may predate these changes
+            for change in pending:
+                self._apply(change)
+            self._loaded_at = time.monotonic()
+
+    def clear(self):
+        """
+        Drop the index so the next lookup reloads it.
+        """
+        with self._lock:
+            self._buckets = defaultdict(dict)
+            self._driver_keys = {}
+            self._loaded_at = None
+
+    def ensure_loaded(self):
+        """
+        Load the index if it was never loaded, and start reloading it in the
+        background if it is older than ``refresh_seconds``.
+        """
+        loaded_at = self._loaded_at
+        if loaded_at is None:
+            # Concurrent first lookups wait for a single load
+            with self._load_lock:
+                if self._loaded_at is None:
+                    self._load()
+        elif self.refresh_seconds is not None and time.monotonic() - loaded_at > self.refresh_seconds:
+            self.start_reload()
+
+    def start_reload(self):
+        """
+        Run ``load`` in a background thread, unless one is running.
+        """
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(target=self._reload_worker, name='driver-availability', daemon=True).start()
+
+    def _reload_worker(self):
+        try:
+            self.load()
+        except Exception:
+            logger.exception('Available driver index reload failed')
+        finally:
+            with self._lock:
+                self._reloading = False
+            connection.close()
+
+    def apply(self, changes):
+        """
+        Update the index from a list of DriverChange.
+        """
+        with self._lock:
+            if self._pending is not None:
+                self._pending.extend(changes)
+            if self._loaded_at is None:
+                return
+            for change in changes:
+                self._apply(change)
+
+    def _apply(self, change):
+        self._remove(change.driver_id)
+        after = change.after
+        if after is not None and after['is_active'] and after['last_zone']:
+            self._add(
+                self._buckets,
+                self._driver_keys,
+                change.driver_id,
+                after['last_zone'],
+                after['vehicle_type']
+            )
+
+    def candidates(self, zone, vehicle_type=None, limit=10):
+        """
+        Return up to ``limit`` ``(driver_id, vehicle_type)`` pairs in a zone.
+        """
+        self.ensure_loaded()
+        zone_key = zone.casefold()
+        with self._lock:
+            if vehicle_type:
+                buckets = [self._buckets.get(bucket_key(zone, vehicle_type), {})]
+            else:
+                buckets = [
+                    bucket for (bucket_zone, _), bucket in self._buckets.items()
+                    if bucket_zone == zone_key
+                ]
+
+            results = []
+            for bucket in buckets:
+                for driver_id, driver_vehicle_type in bucket.items():
+                    if len(results) >= limit:
+                        return results
+                    results.append((driver_id, driver_vehicle_type))
+            return results
+
+
+available_drivers = AvailableDriverIndex(
+    refresh_seconds=getattr(settings, 'DRIVER_AVAILABILITY_REFRESH_SECONDS', 30)
+)
+
+
+@receiver(drivers_changed)
+def update_available_drivers(sender, changes, **kwargs):
+    """
+    Apply driver changes to the index once they are committed.
+    """
+    transaction.on_commit(lambda: available_drivers.apply(changes))
@@ -0,0 +1,200 @@
+"""
+Read-through cache of driver rows.
+
+``retrieve``, ``details`` and ``driver_status`` read drivers through
+``DriverCache``, which keeps each driver's column values in the Django cache
+named by ``DRIVER_CACHE_ALIAS``, together with its ``DriverPerformance``
+row. The local-memory backend gives a per-process
+LRU cache bounded by ``MAX_ENTRIES``; pointing the alias at a shared backend
+(Redis, Memcached) shares it between processes. Entries expire after the
+alias's ``TIMEOUT`` and are deleted whenever ``drivers_changed`` reports a
+write or ``drivers.performance`` refreshes the driver, both immediately and
+again once the transaction commits.
+
+Each cached row is stored with the driver's version token, which is a
+separate key created before a miss reads the database and deleted on every
+invalidation. A miss that read the row before a write committed stores it
+under a token that no longer exists, so it is never served.
+"""
+
+import threading
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.dispatch import receiver
+from .models import Driver, DriverPerformance
+from .signals import drivers_changed
+
+
+class DriverCache:
+    """
+    Per-driver cache of the values of every concrete column of the driver
+    and of its performance row, read with one joined query.
+
+    Hit and miss counts are kept per process.
+    """
+
+    key_format = 'driver:{}'
+    version_key_format = 'driver:{}:version'
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.driver_field_names = [field.attname for field in Driver._meta.concrete_fields]
+        self.performance_field_names = [field.attname for field in DriverPerformance._meta.concrete_fields]
+        self.field_names = self.driver_field_names + [
+            f'performance__{name}' for name in self.performance_field_names
+        ]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def key(self, driver_id):
+        return self.key_format.format(driver_id)
+
+    def version_key(self, driver_id):
+        return self.version_key_format.format(driver_id)
+
+    def get(self, driver_id, queryset=None):
+        """
+        Return the driver with ``driver_id``, or None if it does not exist.
+
+        ``queryset`` is used to load the driver on a miss.
+        """
+        if queryset is None:
+            queryset = Driver.objects.all()
+
+        cache = self.cache
+        key, version_key = self.key(driver_id), self.version_key(driver_id)
+        found = cache.get_many([key, version_key])
+        version = found.get(version_key)
+        entry = found.get(key)
+        if self._is_hit(entry, version):
+            return self.build(queryset.db, entry[1])
+
+        if version is None:
+            # Taken before the read, so a write committing meanwhile retires it
+            version = uuid.uuid4().hex
+            if not cache.add(version_key, version):
+                version = cache.get(version_key, version)
+        values = queryset.filter(pk=driver_id).values_list(*self.field_names).first()
+        if values is None:
+            return None
+        cache.set(key, (version, values))
+        return self.build(queryset.db, values)
+
+    async def aget(self, driver_id, queryset=None):
+        """
+        Async version of ``get``.
+
+        Local-memory lookups are plain dict reads and run inline on the
+        event loop; other backends and database reads are awaited.
+        """
+        if queryset is None:
+            queryset = Driver.objects.all()
+
+        cache = self.cache
+        inline = isinstance(cache, LocMemCache)
+        key, version_key = self.key(driver_id), self.version_key(driver_id)
+        keys = [key, version_key]
+        found = cache.get_many(keys) if inline else await cache.aget_many(keys)
+        version = found.get(version_key)
+        entry = found.get(key)
+        if self._is_hit(entry, version):
+            return self.build(queryset.db, entry[1])
+
+        if version is None:
+            version = uuid.uuid4().hex
+            if inline:
+                if not cache.add(version_key, version):
+                    version = cache.get(version_key, version)
+            elif not await cache.aadd(version_key, version):
+                version = await cache.aget(version_key, version)
+        values = await queryset.filter(pk=driver_id).values_list(*self.field_names).afirst()
+        if values is None:
+            return None
+        if inline:
+            cache.set(key, (version, values))
+        else:
+            await cache.aset(key, (version, values))
+        return self.build(queryset.db, values)
+
+    def build(self, db, values):
+        """
+        Return the Driver for cached ``values``, with its performance row
+        attached so serializing it needs no query.
+        """
+        count = len(self.driver_field_names)
+        driver = Driver.from_db(db, self.driver_field_names, values[:count])
+        performance = values[count:]
+        if performance[0] is None:
+            # No row: reading driver.performance raises DoesNotExist without a query
+            Driver.performance.related.set_cached_value(driver, None)
+        else:
+            driver.performance = DriverPerformance.from_db(db, self.performance_field_names, performance)
+        return driver
+
+    def _is_hit(self, entry, version):
+        hit = (
+            entry is not None
+            and version is not None
+            and entry[0] == version
+            and len(entry[1]) == len(self.field_names)
+        )
+        self._count(hit)
+        return hit
+
+    def invalidate(self, driver_ids):
+        """
+        Drop the cached rows and version tokens of ``driver_ids``.
+        """
+        keys = []
+        for driver_id in driver_ids:
+            keys += [self.key(driver_id), self.version_key(driver_id)]
+        self.cache.delete_many(keys)
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        """
+        Return this process's hit/miss counters.
+        """
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            'backend': self.cache.__class__.__name__,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+driver_cache = DriverCache(getattr(settings, 'DRIVER_CACHE_ALIAS', 'default'))
+
+
+@receiver(drivers_changed)
+def invalidate_driver_cache(sender, changes, **kwargs):
+    """
+    Evict changed drivers now and again after commit. A miss that read the
+    old row before the commit stores it under the retired version token,
+    where it is never served.
+    """
+    driver_ids = [change.driver_id for change in changes]
+    driver_cache.invalidate(driver_ids)
+    transaction.on_commit(lambda: driver_cache.invalidate(driver_ids))
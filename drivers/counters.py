@@ -0,0 +1,144 @@
+"""
+Incrementally maintained driver statistics.
+
+Counts of drivers per (vehicle_type, is_active) are kept in the
+``DriverStatsCounter`` table and adjusted from ``drivers_changed``, so the
+stats endpoint reads a handful of rows instead of scanning ``drivers``.
+
+Each count is split over ``COUNTER_SHARDS`` rows and every batch of changes
+adjusts one of them, picked at random, so concurrent status writes rarely
+wait on the same row. Rows are always updated in key order, so writes that
+flip drivers in opposite directions cannot deadlock.
+"""
+
+import random
+from collections import Counter
+from django.db import transaction
+from django.db.models import Count, F
+from django.dispatch import receiver
+from .models import Driver, DriverStatsCounter
+from .signals import drivers_changed
+
+
+COUNTER_SHARDS = 8
+
+
+@receiver(drivers_changed)
+def update_counters(sender, changes, **kwargs):
+    """
+    Apply the counter deltas implied by a batch of driver changes.
+    """
+    deltas = Counter()
+    for change in changes:
+        if change.before is not None:
+            deltas[(change.before['vehicle_type'], change.before['is_active'])] -= 1
+        if change.after is not None:
+            deltas[(change.after['vehicle_type'], change.after['is_active'])] += 1
+    apply_deltas(deltas)
+
+
+def apply_deltas(deltas):
+    """
+    Add ``deltas`` ({(vehicle_type, is_active): delta}) to the stored counters.
+    """
+    shard = random.randrange(COUNTER_SHARDS)
+    for (vehicle_type, is_active), delta in sorted(deltas.items()):
+        if delta == 0:
+            continue
+        counters = DriverStatsCounter.objects.filter(
+            vehicle_type=vehicle_type,
+            is_active=is_active,
+            shard=shard
+        )
+        if not counters.update(count=F('count') + delta):
+            DriverStatsCounter.objects.get_or_create(
+                vehicle_type=vehicle_type,
+                is_active=is_active,
+                shard=shard
+            )
+            counters.update(count=F('count') + delta)
+
+
+def get_stats():
+    """
+    Return driver statistics in the format of the stats endpoint.
+    """
+    return summarize(DriverStatsCounter.objects.all())
+
+
+async def aget_stats():
+    """
+    Async version of ``get_stats``.
+    """
+    return summarize([counter async for counter in DriverStatsCounter.objects.all()])
+
+
+def summarize(counters):
+    """
+    Build the stats endpoint response from DriverStatsCounter rows.
+    """
+    # Add up the shards of each count
+    counts = Counter()
+    for counter in counters:
+        counts[(counter.vehicle_type, counter.is_active)] += counter.count
+    
+    vehicle_type_counts = Counter()
+    active_vehicle_type_counts = Counter()
+    for (vehicle_type, is_active), count in counts.items():
+        if not count:
+            continue
+        vehicle_type_counts[vehicle_type] += count
+        if is_active:
+            active_vehicle_type_counts[vehicle_type] += count
+    
+    total_drivers = sum(vehicle_type_counts.values())
+    active_drivers = sum(active_vehicle_type_counts.values())
+    
+    return {
+        'total_drivers': total_drivers,
+        'active_drivers': active_drivers,
+        'inactive_drivers': total_drivers - active_drivers,
+        'vehicle_type_distribution': dict(vehicle_type_counts.most_common()),
+        'active_vehicle_type_distribution': dict(active_vehicle_type_counts.most_common()),
+    }
+
+
+def count_drivers():
+    """
+    Count drivers per (vehicle_type, is_active) straight from the drivers table.
+    """
+    rows = (
+        Driver.objects.order_by()
+        .values('vehicle_type', 'is_active')
+        .annotate(count=Count('driver_id'))
+    )
+    return {(row['vehicle_type'], row['is_active']): row['count'] for row in rows}
+
+
+def rebuild():
+    """
+    Recompute every counter from the drivers table.
+    
+    Returns the drift that was corrected, as {(vehicle_type, is_active):
+    actual - stored} for every counter that was wrong.
+    """
+    with transaction.atomic():
+        stored = Counter()
+        for counter in DriverStatsCounter.objects.select_for_update():
+            stored[(counter.vehicle_type, counter.is_active)] += counter.count
+        actual = count_drivers()
+        
+        drift = {}
+        for key in set(stored) | set(actual):
+            difference = actual.get(key, 0) - stored.get(key, 0)
+            if difference:
+                drift[key] = difference
+        
+        if drift:
+            DriverStatsCounter.objects.all().delete()
+            DriverStatsCounter.objects.bulk_create(
+                DriverStatsCounter(vehicle_type=vehicle_type, is_active=is_active, count=count)
+                for (vehicle_type, is_active), count in actual.items()
+            )
+    
+    return drift
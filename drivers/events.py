@@ -0,0 +1,179 @@
+"""
+In-process pub/sub of driver status transitions.
+
+Committed ``drivers_changed`` batches are turned into status events (a driver
+becoming active or inactive, including creates and deletes) and offered to
+every subscriber whose filters match. Each subscriber owns a bounded
+``asyncio.Queue`` on its event loop. A subscriber that falls
+``DRIVER_STREAM_QUEUE_SIZE`` events behind has its backlog dropped and is
+sent ``OVERFLOW``, so one slow client can never hold memory or slow down
+writers; it reconnects and catches up from the change feed.
+
+Only writes handled by this process are published.
+"""
+
+import asyncio
+import json
+import threading
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import receiver
+from .signals import drivers_changed
+
+
+OVERFLOW = object()
+
+
+def status_event(change):
+    """
+    Return the status event for a DriverChange, or None if the driver's
+    status did not change.
+    """
+    was_active = change.before is not None and change.before['is_active']
+    values = change.after if change.after is not None else change.before
+    is_active = change.after is not None and change.after['is_active']
+    if was_active == is_active:
+        return None
+    return {
+        'driver_id': change.driver_id,
+        'is_active': is_active,
+        'vehicle_type': values['vehicle_type'],
+        'last_zone': values['last_zone'],
+    }
+
+
+class Subscriber:
+    """
+    A bounded queue of events for one stream, optionally filtered by
+    vehicle type and zone.
+    """
+
+    def __init__(self, loop, max_size, vehicle_type=None, zone=None):
+        self.loop = loop
+        self.queue = asyncio.Queue(max_size)
+        self.vehicle_type = vehicle_type.casefold() if vehicle_type else None
+        self.zone = zone.casefold() if zone else None
+        self.overflowed = False
+
+    def wants(self, event):
+        return (
+            (self.vehicle_type is None or event['vehicle_type'].casefold() == self.vehicle_type)
+            and (self.zone is None or event['last_zone'].casefold() == self.zone)
+        )
+
+    def offer(self, event):
+        """
+        Queue ``event``; on overflow drop the backlog and queue ``OVERFLOW``.
+
+        Runs on the subscriber's event loop.
+        """
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+
+class DriverEventBroker:
+    """
+    Fan-out of status events to subscribers on any event loop.
+    """
+
+    def __init__(self, max_queue_size=100):
+        self.max_queue_size = max_queue_size
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self, vehicle_type=None, zone=None):
+        """
+        Register a subscriber on the running event loop.
+        """
+        subscriber = Subscriber(
+            asyncio.get_running_loop(),
+            self.max_queue_size,
+            vehicle_type=vehicle_type,
+            zone=zone
+        )
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, events):
+        """
+        Offer ``events`` to matching subscribers. Safe to call from any thread.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            for event in events:
+                if subscriber.wants(event):
+                    try:
+                        subscriber.loop.call_soon_threadsafe(subscriber.offer, event)
+                    except RuntimeError:
+                        # The subscriber's loop has closed
+                        self.unsubscribe(subscriber)
+                        break
+
+
+driver_events = DriverEventBroker(
+    max_queue_size=getattr(settings, 'DRIVER_STREAM_QUEUE_SIZE', 100)
+)
+
+
+async def iter_sse(vehicle_type=None, zone=None):
+    """
+    Yield Server-Sent Events for status transitions until the stream's
+    time limit, sending a comment every heartbeat interval while idle.
+
+    Streams end after ``DRIVER_STREAM_MAX_SECONDS`` and EventSource clients
+    reconnect after ``retry``, so connections whose client went away are
+    released even where the server does not report disconnects.
+    """
+    heartbeat = getattr(settings, 'DRIVER_STREAM_HEARTBEAT_SECONDS', 15)
+    max_seconds = getattr(settings, 'DRIVER_STREAM_MAX_SECONDS', 300)
+    dumps = json.JSONEncoder(separators=(',', ':')).encode
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_seconds
+    subscriber = driver_events.subscribe(vehicle_type=vehicle_type, zone=zone)
+    try:
+        yield 'retry: 1000\n\n'
+        while True:
+            timeout = min(heartbeat, deadline - loop.time())
+            if timeout <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if event is OVERFLOW:
+                yield 'event: overflow\ndata: {}\n\n'
+                break
+            yield f'event: status\ndata: {dumps(event)}\n\n'
+    finally:
+        driver_events.unsubscribe(subscriber)
+
+
+@receiver(drivers_changed)
+def publish_status_events(sender, changes, **kwargs):
+    """
+    Publish status transitions once they are committed.
+    """
+    if not driver_events.subscriber_count:
+        return
+    events = [event for event in map(status_event, changes) if event is not None]
+    if events:
+        transaction.on_commit(lambda: driver_events.publish(events))
@@ -0,0 +1,116 @@
+"""
+Incremental change feed over the drivers table.
+
+Changes are read in (timestamp, kind, id) order: driver rows by
+(updated_at, UPSERT, driver_id) from the ``driver_updated_at_idx`` index and
+deletes by (deleted_at, DELETE, id) from ``DriverTombstone``. A cursor encodes
+the position of the last change handed out, so each poll reads only the
+changes after it.
+
+Rows stamped less than ``DRIVER_CHANGES_SETTLE_SECONDS`` ago are held back
+until the next poll. A transaction that stamped its rows earlier but
+commits later than a concurrent one is then still picked up instead of
+being skipped by a cursor that has already moved past its timestamp.
+"""
+
+import heapq
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Driver, DriverTombstone
+from .signals import drivers_changed
+
+
+UPSERT = 0
+DELETE = 1
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(position):
+    """
+    Encode a (timestamp, kind, id) position as an opaque cursor.
+    """
+    timestamp, kind, pk = position
+    micros = (timestamp - EPOCH) // timedelta(microseconds=1)
+    return urlsafe_b64encode(f'{micros}.{kind}.{pk}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor from ``encode_cursor``; raise InvalidCursor if malformed.
+    """
+    try:
+        micros, kind, pk = (int(part) for part in urlsafe_b64decode(cursor.encode()).decode().split('.'))
+    except ValueError:
+        raise InvalidCursor(cursor)
+    if kind not in (UPSERT, DELETE):
+        raise InvalidCursor(cursor)
+    return EPOCH + timedelta(microseconds=micros), kind, pk
+
+
+def settle_horizon():
+    """
+    Return the time before which changes are settled: every transaction
+    that stamped rows earlier has committed.
+    """
+    settle_seconds = getattr(settings, 'DRIVER_CHANGES_SETTLE_SECONDS', 5)
+    return timezone.now() - timedelta(seconds=settle_seconds)
+
+
+def get_changes(since=None, limit=500):
+    """
+    Return up to ``limit`` changes after the position ``since``, and whether
+    more are waiting.
+
+    Each change is a ``(position, driver_id, driver)`` tuple where ``driver``
+    is the current Driver, or None for a delete.
+    """
+    horizon = settle_horizon()
+    drivers = Driver.objects.filter(updated_at__lte=horizon)
+    tombstones = DriverTombstone.objects.filter(deleted_at__lte=horizon)
+
+    if since is not None:
+        timestamp, kind, pk = since
+        if kind == UPSERT:
+            drivers = drivers.filter(updated_at__gte=timestamp).exclude(
+                updated_at=timestamp,
+                driver_id__lte=pk
+            )
+            tombstones = tombstones.filter(deleted_at__gte=timestamp)
+        else:
+            drivers = drivers.filter(updated_at__gt=timestamp)
+            tombstones = tombstones.filter(deleted_at__gte=timestamp).exclude(
+                deleted_at=timestamp,
+                pk__lte=pk
+            )
+
+    # One extra row per source tells whether more changes are waiting
+    drivers = drivers.order_by('updated_at', 'driver_id')[:limit + 1]
+    tombstones = tombstones.order_by('deleted_at', 'id')[:limit + 1]
+    changes = list(heapq.merge(
+        [((driver.updated_at, UPSERT, driver.driver_id), driver.driver_id, driver) for driver in drivers],
+        [((tombstone.deleted_at, DELETE, tombstone.pk), tombstone.driver_id, None) for tombstone in tombstones],
+        key=lambda change: change[0]
+    ))
+    return changes[:limit], len(changes) > limit
+
+
+@receiver(drivers_changed)
+def record_deletes(sender, changes, **kwargs):
+    """
+    Write a tombstone for every deleted driver, in the deleting transaction.
+    """
+    tombstones = [
+        DriverTombstone(driver_id=change.driver_id)
+        for change in changes
+        if change.after is None
+    ]
+    if tombstones:
+        DriverTombstone.objects.bulk_create(tombstones)
@@ -0,0 +1,94 @@
+import django_filters
+from django_filters.fields import ChoiceField
+from rest_framework.filters import OrderingFilter, SearchFilter
+from .models import Driver
+from .search import search_drivers
+from .vehicle_types import canonical_vehicle_type
+
+
+class VehicleTypeChoiceField(ChoiceField):
+    """
+    Form field that maps any capitalization to the canonical vehicle type.
+    """
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        return canonical_vehicle_type(value) or value
+
+
+class VehicleTypeFilter(django_filters.ChoiceFilter):
+    """
+    Exact match on the canonical vehicle type, so the filter can use the
+    vehicle type indexes.
+    """
+    field_class = VehicleTypeChoiceField
+
+
+class DriverFilterSet(django_filters.FilterSet):
+    vehicle_type = VehicleTypeFilter(choices=Driver.VEHICLE_TYPE_CHOICES)
+
+    class Meta:
+        model = Driver
+        fields = ['is_active', 'vehicle_type']
+
+
+class DriverSearchFilter(SearchFilter):
+    """
+    SearchFilter answered from the driver search token index.
+    
+    Matches the same drivers as ``icontains`` over name, phone and vehicle
+    plate, and accepts ``?q=`` as an alias of ``?search=``.
+    """
+    search_alias_param = 'q'
+
+    def get_search_terms(self, request):
+        params = (
+            request.query_params.get(self.search_param)
+            or request.query_params.get(self.search_alias_param, '')
+        )
+        params = params.replace('\x00', '')  # strip null characters
+        params = params.replace(',', ' ')
+        return params.split()
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+        return search_drivers(queryset, search_terms)
+
+
+def orders_by_performance(ordering):
+    """
+    Return True if any term of ``ordering`` is a DriverPerformance column.
+    """
+    return any(term.lstrip('-').startswith('performance__') for term in ordering)
+
+
+class DriverOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that can rank drivers by their precomputed performance.
+    
+    Names in the view's ``ordering_aliases`` ("-average_rating") order by the
+    ``DriverPerformance`` column they map to, so rankings read one indexed
+    row per driver and never touch trips. Rankings have many ties (every
+    unrated driver averages 0), so they end with the driver id in the
+    direction of their first term, which keeps pages stable. The id is read
+    from the performance row, the last column of its ranking indexes.
+    """
+    
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        aliases = getattr(view, 'ordering_aliases', {})
+        fields = [
+            ('-' if term.startswith('-') else '') + aliases.get(term.lstrip('-'), term.lstrip('-'))
+            for term in fields
+        ]
+        return super().remove_invalid_fields(queryset, fields, view, request)
+    
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and orders_by_performance(ordering) and not any(
+            term.lstrip('-') in ('driver_id', 'pk', 'performance__driver_id') for term in ordering
+        ):
+            tie_breaker = 'performance__driver_id'
+            ordering = [*ordering, f'-{tie_breaker}' if ordering[0].startswith('-') else tie_breaker]
+        return ordering
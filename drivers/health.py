@@ -0,0 +1,111 @@
+"""
+Liveness and readiness checks for the Kubernetes probes.
+
+``/healthz`` reports that the process is serving requests and never touches
+the database. ``/readyz`` runs ``SELECT 1`` on a dedicated thread and waits
+at most ``READINESS_TIMEOUT_SECONDS`` for it; the result is reused for
+``READINESS_CACHE_SECONDS``, so frequent probes cost no queries. A check
+that hangs is not started again until it finishes, so a stuck database
+cannot tie up more than the one thread.
+
+Both are answered by ``HealthCheckMiddleware`` before the rest of the
+middleware, URL resolution and DRF.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+
+class ReadinessCheck:
+    """
+    Cached ``SELECT 1`` against the default database.
+    """
+
+    def __init__(self, timeout=1.0, cache_seconds=2.0):
+        self.timeout = timeout
+        self.cache_seconds = cache_seconds
+        self._lock = threading.Lock()
+        self._executor = None
+        self._future = None
+        self._result = None
+        self._checked_at = None
+
+    def query(self):
+        """
+        Run the check on the calling thread. Return None, or the error.
+        """
+        try:
+            connection.close_if_unusable_or_obsolete()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        except DatabaseError as exc:
+            # Reconnect on the next check
+            connection.close()
+            return str(exc)
+        return None
+
+    def _start(self):
+        """
+        Return the cached result, or the future of the running check.
+        """
+        with self._lock:
+            if self._result is not None and time.monotonic() - self._checked_at < self.cache_seconds:
+                return self._result, None
+            if self._future is None:
+                if self._executor is None:
+                    # Created on first use, so preforked workers each get their own
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='readyz')
+                self._future = self._executor.submit(self.query)
+            return None, self._future
+
+    def _finish(self, future, error, timed_out=False):
+        if timed_out:
+            error = f'Database did not respond within {self.timeout}s'
+        result = (error is None, error)
+        with self._lock:
+            if not timed_out and self._future is future:
+                self._future = None
+            self._result = result
+            self._checked_at = time.monotonic()
+        return result
+
+    def check(self):
+        """
+        Return ``(ready, error)``.
+        """
+        result, future = self._start()
+        if result is not None:
+            return result
+        try:
+            return self._finish(future, future.result(self.timeout))
+        except TimeoutError:
+            return self._finish(future, None, timed_out=True)
+
+    async def acheck(self):
+        """
+        Async version of ``check``.
+        """
+        result, future = self._start()
+        if result is not None:
+            return result
+        try:
+            error = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+        except asyncio.TimeoutError:
+            return self._finish(future, None, timed_out=True)
+        return self._finish(future, error)
+
+    def reset(self):
+        with self._lock:
+            self._result = None
+            self._checked_at = None
+
+
+readiness = ReadinessCheck(
+    timeout=getattr(settings, 'READINESS_TIMEOUT_SECONDS', 1.0),
+    cache_seconds=getattr(settings, 'READINESS_CACHE_SECONDS', 2.0)
+)
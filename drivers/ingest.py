@@ -0,0 +1,250 @@
+"""
+Helpers for loading driver, trip, rating and payment records from CSV files.
+
+These functions are shared by the ``load_drivers`` and ``load_trips``
+management commands. They do not touch the ORM, so they can run inside
+worker processes.
+"""
+
+import csv
+import io
+import os
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from .trip_choices import PAYMENT_METHODS, PAYMENT_STATUSES, TRIP_STATUSES
+from .vehicle_types import VEHICLE_TYPES, canonical_vehicle_type
+
+
+DRIVER_FIELDS = [
+    'name',
+    'phone',
+    'vehicle_type',
+    'vehicle_plate',
+    'is_active',
+]
+
+TRUTHY_VALUES = ['true', '1', 'yes']
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def parse_driver_row(row):
+    """
+    Convert a CSV row into a ``(driver_id, defaults)`` pair.
+
+    Phone numbers, vehicle types and vehicle plates are validated and
+    normalized the same way ``DriverCreateUpdateSerializer`` does it. Raises
+    an exception describing the problem if the row is malformed.
+    """
+    driver_id = int(row['driver_id'])
+    defaults = {
+        'name': row['name'],
+        'phone': normalize_phone(row['phone']),
+        'vehicle_type': normalize_vehicle_type(row['vehicle_type']),
+        'vehicle_plate': normalize_vehicle_plate(row['vehicle_plate']),
+        'is_active': row['is_active'].lower() in TRUTHY_VALUES,
+    }
+    return driver_id, defaults
+
+
+def normalize_phone(value):
+    """
+    Validate phone number format.
+    """
+    if not value.isdigit():
+        raise ValueError("Phone number must contain only digits")
+    if len(value) != 10:
+        raise ValueError("Phone number must be exactly 10 digits")
+    return value
+
+
+def normalize_vehicle_type(value):
+    """
+    Validate vehicle type and return its canonical spelling.
+    """
+    vehicle_type = canonical_vehicle_type(value)
+    if vehicle_type is None:
+        raise ValueError(f"Vehicle type must be one of {', '.join(VEHICLE_TYPES)}")
+    return vehicle_type
+
+
+def normalize_vehicle_plate(value):
+    """
+    Validate vehicle plate format and upper-case it.
+    """
+    if not value or len(value.strip()) == 0:
+        raise ValueError("Vehicle plate cannot be empty")
+    return value.strip().upper()
+
+
+def parse_trip_row(row):
+    """
+    Convert a trips CSV row into a ``(trip_id, defaults)`` pair.
+
+    ``requested_at`` is returned naive, in the seed data's local time.
+    """
+    trip_id = int(row['trip_id'])
+    defaults = {
+        'rider_id': int(row['rider_id']),
+        'driver_id': int(row['driver_id']),
+        'pickup_zone': normalize_zone(row['pickup_zone']),
+        'drop_zone': normalize_zone(row['drop_zone']),
+        'status': normalize_choice(row['status'], TRIP_STATUSES, 'Trip status'),
+        'requested_at': parse_datetime(row['requested_at']),
+        'distance_km': parse_amount(row['distance_km'], 'Distance'),
+        'base_fare': parse_amount(row['base_fare'], 'Base fare'),
+        'surge_multiplier': parse_amount(row['surge_multiplier'], 'Surge multiplier'),
+        'total_fare': parse_amount(row['total_fare'], 'Total fare'),
+    }
+    return trip_id, defaults
+
+
+def parse_rating_row(row):
+    """
+    Convert a ratings CSV row into a ``(rating_id, defaults)`` pair.
+    """
+    rating_id = int(row['rating_id'])
+    rider_rating = row['rider_rating'].strip()
+    defaults = {
+        'trip_id': int(row['trip_id']),
+        'rider_rating': parse_stars(rider_rating, 'Rider rating') if rider_rating else None,
+        'driver_rating': parse_stars(row['driver_rating'], 'Driver rating'),
+        'comment': row['comment'].strip(),
+    }
+    return rating_id, defaults
+
+
+def parse_payment_row(row):
+    """
+    Convert a payments CSV row into a ``(payment_id, defaults)`` pair.
+
+    ``created_at`` is returned naive, in the seed data's local time.
+    """
+    payment_id = int(row['payment_id'])
+    reference = row['reference'].strip()
+    if not reference:
+        raise ValueError("Payment reference cannot be empty")
+    defaults = {
+        'trip_id': int(row['trip_id']),
+        'amount': parse_amount(row['amount'], 'Amount'),
+        'method': normalize_choice(row['method'], PAYMENT_METHODS, 'Payment method'),
+        'status': normalize_choice(row['status'], PAYMENT_STATUSES, 'Payment status'),
+        'reference': reference,
+        'created_at': parse_datetime(row['created_at']),
+    }
+    return payment_id, defaults
+
+
+def normalize_zone(value):
+    """
+    Validate a zone name and strip surrounding whitespace.
+    """
+    value = value.strip()
+    if not value:
+        raise ValueError("Zone cannot be empty")
+    return value
+
+
+def normalize_choice(value, choices, label):
+    """
+    Validate an upper-case choice value, accepting any capitalization.
+    """
+    value = value.strip().upper()
+    if value not in choices:
+        raise ValueError(f"{label} must be one of {', '.join(choices)}")
+    return value
+
+
+def parse_datetime(value):
+    """
+    Parse a naive ``DATETIME_FORMAT`` timestamp.
+    """
+    return datetime.strptime(value.strip(), DATETIME_FORMAT)
+
+
+def parse_amount(value, label):
+    """
+    Parse a non-negative decimal amount.
+    """
+    try:
+        amount = Decimal(value.strip())
+    except InvalidOperation:
+        raise ValueError(f"{label} must be a number")
+    if not amount.is_finite() or amount < 0:
+        raise ValueError(f"{label} must be a non-negative number")
+    return amount
+
+
+def parse_stars(value, label):
+    """
+    Parse a 1-5 star rating.
+    """
+    stars = int(value)
+    if not 1 <= stars <= 5:
+        raise ValueError(f"{label} must be between 1 and 5")
+    return stars
+
+
+def iter_row_chunks(reader, size):
+    """
+    Yield lists of ``(line_num, row)`` pairs of at most ``size`` rows.
+    """
+    rows = ((reader.line_num, row) for row in reader)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def split_csv_file(path, chunk_bytes):
+    """
+    Split a CSV file into byte ranges that start and end on line boundaries.
+
+    Returns the header's field names and a list of ``(start, end)`` offsets
+    covering every data line. Quoted fields spanning several lines are not
+    supported.
+    """
+    with open(path, 'rb') as file:
+        header = file.readline().decode('utf-8')
+        size = os.fstat(file.fileno()).st_size
+        start = file.tell()
+        ranges = []
+        
+        while start < size:
+            file.seek(min(start + chunk_bytes, size))
+            if file.tell() < size:
+                file.readline()
+            end = file.tell()
+            ranges.append((start, end))
+            start = end
+    
+    fieldnames = next(csv.reader([header]))
+    return fieldnames, ranges
+
+
+def parse_csv_range(path, start, end, fieldnames):
+    """
+    Parse and validate the rows stored between two byte offsets.
+
+    Returns ``(parsed, errors, line_count)`` where ``parsed`` holds
+    ``(line_num, driver_id, defaults)`` tuples, ``errors`` holds
+    ``(line_num, message)`` pairs and line numbers are relative to ``start``.
+    """
+    with open(path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start).decode('utf-8')
+    
+    reader = csv.DictReader(io.StringIO(data, newline=''), fieldnames=fieldnames)
+    parsed = []
+    errors = []
+    for row in reader:
+        try:
+            driver_id, defaults = parse_driver_row(row)
+        except Exception as e:
+            errors.append((reader.line_num, str(e)))
+            continue
+        parsed.append((reader.line_num, driver_id, defaults))
+    
+    return parsed, errors, reader.line_num
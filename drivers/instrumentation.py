@@ -0,0 +1,173 @@
+"""
+Per-request timing of SQL, serialization and rendering.
+
+``RequestMetricsMiddleware`` times every request into a per-endpoint latency
+histogram, served in Prometheus text format at ``/metrics``. A fraction
+``INSTRUMENTATION_SAMPLE_RATE`` of requests is also broken down into database
+query count and time, serializer time and render time, which are sent as a
+``Server-Timing`` header and logged as one JSON line to the
+``drivers.instrumentation`` logger. Queries slower than
+``SLOW_QUERY_THRESHOLD_MS`` are logged whether or not the request is sampled.
+
+Unsampled requests pay for two clock reads per request and per query.
+Histograms are per process; with several workers each reports its own.
+"""
+
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+logger = logging.getLogger('drivers.instrumentation')
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+current_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Timings collected for one sampled request.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.spans = {}
+
+    def add_span(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def server_timing(self, total_seconds):
+        """
+        Return the ``Server-Timing`` header value.
+        """
+        entries = [f'db;dur={self.query_seconds * 1000:.2f};desc="{self.queries} queries"']
+        entries += [f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.spans.items()]
+        entries.append(f'total;dur={total_seconds * 1000:.2f}')
+        return ', '.join(entries)
+
+    def as_dict(self):
+        return {
+            'db_queries': self.queries,
+            'db_ms': round(self.query_seconds * 1000, 3),
+            **{f'{name}_ms': round(seconds * 1000, 3) for name, seconds in self.spans.items()},
+        }
+
+
+@contextmanager
+def span(name):
+    """
+    Add the time spent in the block, less its database time, to span
+    ``name`` of the current sampled request.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    query_seconds = metrics.query_seconds
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.add_span(name, elapsed - (metrics.query_seconds - query_seconds))
+
+
+def time_queries(execute, sql, params, many, context):
+    """
+    Database execute wrapper counting queries of sampled requests and
+    logging slow ones.
+    """
+    metrics = current_metrics.get()
+    threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+    if metrics is None and threshold is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - start
+        if metrics is not None:
+            metrics.queries += 1
+            metrics.query_seconds += elapsed
+        if threshold is not None and elapsed * 1000 >= threshold:
+            logger.warning(json.dumps({
+                'event': 'slow_query',
+                'duration_ms': round(elapsed * 1000, 3),
+                'sql': sql[:1000],
+                'alias': context['connection'].alias,
+            }))
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    connection.execute_wrappers.append(time_queries)
+
+
+class LatencyHistograms:
+    """
+    Request latency histograms keyed by (endpoint, method).
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, endpoint, method, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get((endpoint, method))
+            if histogram is None:
+                # Per-bucket counts (the last is +Inf), then sum
+                histogram = self._histograms[(endpoint, method)] = [[0] * (len(self.buckets) + 1), 0.0]
+            histogram[0][index] += 1
+            histogram[1] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self):
+        """
+        Return the histograms in Prometheus text exposition format.
+        """
+        name = 'driver_service_request_duration_seconds'
+        lines = [
+            f'# HELP {name} Request latency by endpoint and method.',
+            f'# TYPE {name} histogram',
+        ]
+        with self._lock:
+            histograms = sorted((key, list(counts), total) for key, (counts, total) in self._histograms.items())
+        for (endpoint, method), counts, total in histograms:
+            labels = f'endpoint="{endpoint}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip([*map(repr, self.buckets), '+Inf'], counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{labels}}} {total!r}')
+            lines.append(f'{name}_count{{{labels}}} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+request_latency = LatencyHistograms()
+
+
+def endpoint_name(request):
+    """
+    Return the URL name a request resolved to, or ``unmatched``.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.url_name or match.view_name
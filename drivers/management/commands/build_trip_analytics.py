@@ -0,0 +1,67 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from drivers.analytics import MAX_WINDOW_HOURS, READ_CHUNK_SIZE, summarize, trip_analytics
+
+
+class Command(BaseCommand):
+    help = 'Build the columnar trip analytics snapshot and print its report'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=READ_CHUNK_SIZE,
+            help='Rows read from the database at a time'
+        )
+        parser.add_argument(
+            '--window-hours',
+            type=int,
+            default=None,
+            help='Report on trips of the last N hours only (default: all trips)'
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the full report as JSON'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive integer')
+        window_hours = options['window_hours']
+        if window_hours is not None and not 1 <= window_hours <= MAX_WINDOW_HOURS:
+            raise CommandError(f'--window-hours must be between 1 and {MAX_WINDOW_HOURS}')
+
+        started = time.monotonic()
+        snapshot = trip_analytics.build(options['chunk_size'])
+        built = time.monotonic() - started
+        started = time.monotonic()
+        report = summarize(snapshot, window_hours)
+        summarized = time.monotonic() - started
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        rows = snapshot.meta['trips'] + snapshot.meta['payments']
+        rate = rows / built if built > 0 else 0
+        self.stdout.write(
+            self.style.SUCCESS(f'\nBuilt trip analytics snapshot in {trip_analytics.directory}')
+        )
+        self.stdout.write(f"  Trips: {snapshot.meta['trips']}")
+        self.stdout.write(f"  Payments: {snapshot.meta['payments']}")
+        self.stdout.write(f'  Read {rows} rows in {built:.2f}s ({rate:.0f} rows/sec)')
+        self.stdout.write(f'  Aggregated in {summarized * 1000:.1f}ms')
+        if not report['trips']:
+            return
+
+        window = report['window']
+        self.stdout.write(f"\n{report['trips']} trips from {window['start']} to {window['end']}")
+        self.stdout.write(f"  Average surge: {report['surge']['average']}")
+        self.stdout.write(f"  Fare per km: {report['fare_per_km']['average']}")
+        self.stdout.write(f"  Collected: {report['payments']['collected']}")
+        self.stdout.write(
+            f"  Utilisation: {report['utilisation']['average']} average, "
+            f"{report['utilisation']['p90']} p90 over {report['utilisation']['drivers']} drivers"
+        )
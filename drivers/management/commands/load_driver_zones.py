@@ -0,0 +1,121 @@
+import csv
+import os
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from drivers.models import Driver
+from drivers.signals import DriverChange, drivers_changed
+
+
+# Trips still in progress leave the driver at the pickup zone
+FINISHED_TRIP_STATUSES = ['COMPLETED']
+UPDATE_CHUNK_SIZE = 500
+
+
+def trip_zone(row):
+    """
+    Return the zone a trip leaves its driver in.
+    """
+    if row['status'] in FINISHED_TRIP_STATUSES:
+        return row['drop_zone']
+    return row['pickup_zone']
+
+
+class Command(BaseCommand):
+    help = "Set each driver's last known zone from a trips CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'csv_file',
+            type=str,
+            nargs='?',
+            default=None,
+            help='Path to the CSV file containing trip data'
+        )
+
+    def handle(self, *args, **options):
+        csv_file = options['csv_file']
+
+        if not csv_file:
+            possible_paths = [
+                'rhfd_seed dataset/rhfd_trips.csv',
+                '../AssignmentStatement/rhfd_seed dataset/rhfd_trips.csv',
+                'rhfd_trips.csv',
+            ]
+            csv_file = next((path for path in possible_paths if os.path.exists(path)), None)
+
+            if not csv_file:
+                raise CommandError(
+                    'CSV file not found. Please provide the path to the CSV file:\n'
+                    'python manage.py load_driver_zones <path_to_csv>'
+                )
+
+        if not os.path.exists(csv_file):
+            raise CommandError(f'CSV file "{csv_file}" does not exist')
+
+        # Latest (requested_at, zone) per driver
+        latest = {}
+        error_count = 0
+        try:
+            with open(csv_file, 'r', encoding='utf-8') as file:
+                reader = csv.DictReader(file)
+                for row in reader:
+                    try:
+                        driver_id = int(row['driver_id'])
+                        seen = (row['requested_at'], trip_zone(row))
+                    except Exception as e:
+                        error_count += 1
+                        self.stdout.write(
+                            self.style.ERROR(
+                                f'Error processing row {reader.line_num}: {str(e)}'
+                            )
+                        )
+                        continue
+                    if driver_id not in latest or seen > latest[driver_id]:
+                        latest[driver_id] = seen
+        except Exception as e:
+            raise CommandError(f'Error reading CSV file: {str(e)}')
+
+        zones = {driver_id: zone for driver_id, (_, zone) in latest.items()}
+        updated_count = 0
+        driver_ids = sorted(zones)
+        for start in range(0, len(driver_ids), UPDATE_CHUNK_SIZE):
+            updated_count += self.update_zones(
+                {driver_id: zones[driver_id] for driver_id in driver_ids[start:start + UPDATE_CHUNK_SIZE]}
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\nSuccessfully loaded driver zones from {csv_file}')
+        )
+        self.stdout.write(f'  Updated: {updated_count}')
+        if error_count > 0:
+            self.stdout.write(
+                self.style.WARNING(f'  Errors: {error_count}')
+            )
+
+    def update_zones(self, zones):
+        """
+        Apply a chunk of {driver_id: zone} and return how many drivers changed.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            rows = (
+                Driver.objects.filter(driver_id__in=zones)
+                .select_for_update()
+                .values('driver_id', *Driver.TRACKED_FIELDS)
+            )
+            changes = []
+            drivers = []
+            for row in rows:
+                driver_id = row.pop('driver_id')
+                zone = zones[driver_id]
+                if row['last_zone'] == zone:
+                    continue
+                changes.append(DriverChange(driver_id, row, {**row, 'last_zone': zone}))
+                drivers.append(Driver(driver_id=driver_id, last_zone=zone, updated_at=now))
+
+            if drivers:
+                Driver.objects.bulk_update(drivers, ['last_zone', 'updated_at'])
+                drivers_changed.send(sender=Driver, changes=changes)
+
+        return len(drivers)
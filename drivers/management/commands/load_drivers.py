@@ -1,7 +1,25 @@
 import csv
+import multiprocessing
 import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from drivers.ingest import (
+    DRIVER_FIELDS,
+    iter_row_chunks,
+    parse_csv_range,
+    parse_driver_row,
+    split_csv_file,
+)
 from drivers.models import Driver
+from drivers.signals import DriverChange, drivers_changed
+
+
+DEFAULT_PARALLEL_BATCH_SIZE = 1000
+MIN_RANGE_BYTES = 64 * 1024
 
 
 class Command(BaseCommand):
@@ -20,6 +38,18 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing drivers before loading'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Load rows in bulk, this many rows per transaction'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Parse and validate rows in this many worker processes'
+        )
 
     def handle(self, *args, **options):
         csv_file = options['csv_file']
@@ -48,6 +78,16 @@ class Command(BaseCommand):
         if not os.path.exists(csv_file):
             raise CommandError(f'CSV file "{csv_file}" does not exist')
 
+        batch_size = options['batch_size']
+        if batch_size is not None and batch_size < 1:
+            raise CommandError('--batch-size must be a positive integer')
+        
+        workers = options['workers']
+        if workers is not None:
+            if workers < 1:
+                raise CommandError('--workers must be a positive integer')
+            batch_size = batch_size or DEFAULT_PARALLEL_BATCH_SIZE
+
         # Clear existing drivers if requested
         if options['clear']:
             Driver.objects.all().delete()
@@ -56,62 +96,232 @@ class Command(BaseCommand):
             )
 
         # Load drivers from CSV
-        created_count = 0
-        updated_count = 0
-        error_count = 0
+        self.created_count = 0
+        self.updated_count = 0
+        self.error_count = 0
+        started = time.monotonic()
         
         try:
-            with open(csv_file, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                
-                for row in reader:
-                    try:
-                        driver_id = int(row['driver_id'])
-                        name = row['name']
-                        phone = row['phone']
-                        vehicle_type = row['vehicle_type']
-                        vehicle_plate = row['vehicle_plate']
-                        is_active = row['is_active'].lower() in ['true', '1', 'yes']
-                        
-                        # Try to get existing driver
-                        driver, created = Driver.objects.update_or_create(
-                            driver_id=driver_id,
-                            defaults={
-                                'name': name,
-                                'phone': phone,
-                                'vehicle_type': vehicle_type,
-                                'vehicle_plate': vehicle_plate,
-                                'is_active': is_active,
-                            }
-                        )
-                        
-                        if created:
-                            created_count += 1
-                        else:
-                            updated_count += 1
-                        
-                    except Exception as e:
-                        error_count += 1
-                        self.stdout.write(
-                            self.style.ERROR(
-                                f'Error processing row {reader.line_num}: {str(e)}'
-                            )
-                        )
-                        continue
+            if workers:
+                self.load_parallel(csv_file, batch_size, workers)
+            else:
+                with open(csv_file, 'r', encoding='utf-8') as file:
+                    reader = csv.DictReader(file)
+                    
+                    if batch_size:
+                        self.load_batched(reader, batch_size)
+                    else:
+                        self.load_serial(reader)
         
         except Exception as e:
             raise CommandError(f'Error reading CSV file: {str(e)}')
         
+        elapsed = time.monotonic() - started
+        processed = self.created_count + self.updated_count + self.error_count
+        rate = processed / elapsed if elapsed > 0 else 0
+        
         # Print summary
         self.stdout.write(
             self.style.SUCCESS(
                 f'\nSuccessfully loaded drivers from {csv_file}'
             )
         )
-        self.stdout.write(f'  Created: {created_count}')
-        self.stdout.write(f'  Updated: {updated_count}')
-        if error_count > 0:
+        self.stdout.write(f'  Created: {self.created_count}')
+        self.stdout.write(f'  Updated: {self.updated_count}')
+        if self.error_count > 0:
             self.stdout.write(
-                self.style.WARNING(f'  Errors: {error_count}')
+                self.style.WARNING(f'  Errors: {self.error_count}')
+            )
+        self.stdout.write(
+            f'  Processed {processed} rows in {elapsed:.2f}s ({rate:.0f} rows/sec)'
+        )
+
+    def report_error(self, line_num, error):
+        """
+        Record a failed row and print it with its CSV line number.
+        """
+        self.error_count += 1
+        self.stdout.write(
+            self.style.ERROR(
+                f'Error processing row {line_num}: {str(error)}'
+            )
+        )
+
+    def load_serial(self, reader):
+        """
+        Load rows one at a time with ``update_or_create``.
+        """
+        for row in reader:
+            try:
+                driver_id, defaults = parse_driver_row(row)
+                
+                # Try to get existing driver
+                driver, created = Driver.objects.update_or_create(
+                    driver_id=driver_id,
+                    defaults=defaults
+                )
+                
+                if created:
+                    self.created_count += 1
+                else:
+                    self.updated_count += 1
+                
+            except Exception as e:
+                self.report_error(reader.line_num, e)
+                continue
+
+    def load_batched(self, reader, batch_size):
+        """
+        Load rows in chunks of ``batch_size``, one transaction per chunk.
+        """
+        for chunk in iter_row_chunks(reader, batch_size):
+            parsed = []
+            for line_num, row in chunk:
+                try:
+                    driver_id, defaults = parse_driver_row(row)
+                except Exception as e:
+                    self.report_error(line_num, e)
+                    continue
+                parsed.append((line_num, driver_id, defaults))
+            
+            if parsed:
+                self.write_batch(parsed)
+
+    def load_parallel(self, csv_file, batch_size, workers):
+        """
+        Parse the file in a process pool and write it from this process.
+
+        The file is split into byte ranges at line boundaries. Ranges are
+        handed to the workers a few at a time and their results are consumed
+        in file order, so memory stays bounded and line numbers in error
+        messages match the other loading modes.
+        """
+        size = os.path.getsize(csv_file)
+        chunk_bytes = max(MIN_RANGE_BYTES, size // (workers * 4) + 1)
+        fieldnames, ranges = split_csv_file(csv_file, chunk_bytes)
+        
+        line_offset = 1  # the header line
+        pending = []
+        # Spawned workers don't inherit this process' database connections
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = deque(
+                executor.submit(parse_csv_range, csv_file, start, end, fieldnames)
+                for start, end in ranges[:workers * 2]
             )
+            queued = ranges[workers * 2:]
+            queued.reverse()
+            
+            while futures:
+                parsed, errors, line_count = futures.popleft().result()
+                if queued:
+                    start, end = queued.pop()
+                    futures.append(
+                        executor.submit(parse_csv_range, csv_file, start, end, fieldnames)
+                    )
+                
+                for line_num, message in errors:
+                    self.report_error(line_offset + line_num, message)
+                for line_num, driver_id, defaults in parsed:
+                    pending.append((line_offset + line_num, driver_id, defaults))
+                line_offset += line_count
+                
+                while len(pending) >= batch_size:
+                    self.write_batch(pending[:batch_size])
+                    del pending[:batch_size]
+        
+        if pending:
+            self.write_batch(pending)
+
+    def write_batch(self, parsed):
+        """
+        Write a parsed chunk with bulk queries.
+
+        If the bulk write violates a constraint the chunk is replayed row by
+        row, so the offending rows are reported just like the serial path.
+        """
+        try:
+            with transaction.atomic():
+                created, updated = self.bulk_upsert(parsed)
+        except DatabaseError:
+            with transaction.atomic():
+                self.write_rows(parsed)
+            return
+        
+        self.created_count += created
+        self.updated_count += updated
+
+    def bulk_upsert(self, parsed):
+        """
+        Diff the chunk against existing rows and write it in bulk.
+
+        Uses a native ``INSERT ... ON CONFLICT`` upsert when the database
+        supports it, otherwise ``bulk_create`` plus ``bulk_update``.
+        """
+        existing = {
+            row.pop('driver_id'): row
+            for row in Driver.objects.filter(
+                driver_id__in={driver_id for _, driver_id, _ in parsed}
+            ).values('driver_id', *Driver.TRACKED_FIELDS)
+        }
+        now = timezone.now()
+        drivers = {}
+        created = 0
+        updated = 0
+        
+        for line_num, driver_id, defaults in parsed:
+            if driver_id in existing or driver_id in drivers:
+                updated += 1
+            else:
+                created += 1
+            # Columns missing from the CSV, such as last_zone, keep their
+            # stored values, so the reported change carries them too
+            values = {**existing.get(driver_id, {}), **defaults}
+            drivers[driver_id] = Driver(driver_id=driver_id, updated_at=now, **values)
+        
+        if connection.features.supports_update_conflicts_with_target:
+            Driver.objects.bulk_create(
+                drivers.values(),
+                update_conflicts=True,
+                unique_fields=['driver_id'],
+                update_fields=DRIVER_FIELDS + ['updated_at'],
+            )
+        else:
+            Driver.objects.bulk_create(
+                [driver for driver_id, driver in drivers.items() if driver_id not in existing]
+            )
+            Driver.objects.bulk_update(
+                [driver for driver_id, driver in drivers.items() if driver_id in existing],
+                DRIVER_FIELDS + ['updated_at']
+            )
+        
+        drivers_changed.send(
+            sender=Driver,
+            changes=[
+                DriverChange(driver_id, existing.get(driver_id), driver.tracked_values())
+                for driver_id, driver in drivers.items()
+            ]
+        )
+        
+        return created, updated
+
+    def write_rows(self, parsed):
+        """
+        Write a parsed chunk row by row, isolating failures in savepoints.
+        """
+        for line_num, driver_id, defaults in parsed:
+            try:
+                with transaction.atomic():
+                    driver, created = Driver.objects.update_or_create(
+                        driver_id=driver_id,
+                        defaults=defaults
+                    )
+            except Exception as e:
+                self.report_error(line_num, e)
+                continue
+            
+            if created:
+                self.created_count += 1
+            else:
+                self.updated_count += 1
 
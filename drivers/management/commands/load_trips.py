@@ -0,0 +1,233 @@
+import csv
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+from drivers import performance
+from drivers.ingest import iter_row_chunks, parse_payment_row, parse_rating_row, parse_trip_row
+from drivers.models import Driver, Payment, Rating, Trip
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+# (option, model, row parser, referenced column, naive datetime columns),
+# in load order: ratings and payments refer to trips
+TABLES = [
+    ('trips', Trip, parse_trip_row, 'driver_id', ['requested_at']),
+    ('ratings', Rating, parse_rating_row, 'trip_id', []),
+    ('payments', Payment, parse_payment_row, 'trip_id', ['created_at']),
+]
+
+SEED_DIRECTORIES = [
+    'rhfd_seed dataset',
+    '../AssignmentStatement/rhfd_seed dataset',
+    '.',
+]
+
+
+class Command(BaseCommand):
+    help = 'Load trips, ratings and payments from CSV files and refresh driver performance'
+
+    def add_arguments(self, parser):
+        for option, model, parse_row, reference, aware_fields in TABLES:
+            parser.add_argument(
+                f'--{option}',
+                type=str,
+                default=None,
+                help=f'Path to the CSV file containing {option} (default: rhfd_{option}.csv in the seed dataset)'
+            )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Rows written per transaction'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be a positive integer')
+
+        files = {option: options[option] for option, *_ in TABLES if options[option]}
+        if not files:
+            files = self.find_seed_files()
+        for path in files.values():
+            if not os.path.exists(path):
+                raise CommandError(f'CSV file "{path}" does not exist')
+
+        for option, model, parse_row, reference, aware_fields in TABLES:
+            if option not in files:
+                continue
+            self.created_count = 0
+            self.updated_count = 0
+            self.error_count = 0
+            started = time.monotonic()
+            try:
+                with open(files[option], 'r', encoding='utf-8') as file:
+                    reader = csv.DictReader(file)
+                    for chunk in iter_row_chunks(reader, batch_size):
+                        parsed = self.parse_chunk(chunk, parse_row, aware_fields)
+                        if parsed:
+                            self.write_batch(model, reference, parsed)
+            except Exception as e:
+                raise CommandError(f'Error reading CSV file: {str(e)}')
+
+            elapsed = time.monotonic() - started
+            processed = self.created_count + self.updated_count + self.error_count
+            rate = processed / elapsed if elapsed > 0 else 0
+            self.stdout.write(
+                self.style.SUCCESS(f'\nSuccessfully loaded {option} from {files[option]}')
+            )
+            self.stdout.write(f'  Created: {self.created_count}')
+            self.stdout.write(f'  Updated: {self.updated_count}')
+            if self.error_count > 0:
+                self.stdout.write(
+                    self.style.WARNING(f'  Errors: {self.error_count}')
+                )
+            self.stdout.write(
+                f'  Processed {processed} rows in {elapsed:.2f}s ({rate:.0f} rows/sec)'
+            )
+
+    def find_seed_files(self):
+        """
+        Return the seed dataset's trips, ratings and payments files.
+        """
+        for directory in SEED_DIRECTORIES:
+            trips = os.path.join(directory, 'rhfd_trips.csv')
+            if os.path.exists(trips):
+                files = {}
+                for option, *_ in TABLES:
+                    path = os.path.join(directory, f'rhfd_{option}.csv')
+                    if os.path.exists(path):
+                        files[option] = path
+                return files
+        raise CommandError(
+            'CSV files not found. Please provide the paths to the CSV files:\n'
+            'python manage.py load_trips --trips <path> [--ratings <path>] [--payments <path>]'
+        )
+
+    def report_error(self, line_num, error):
+        """
+        Record a failed row and print it with its CSV line number.
+        """
+        self.error_count += 1
+        self.stdout.write(
+            self.style.ERROR(
+                f'Error processing row {line_num}: {str(error)}'
+            )
+        )
+
+    def parse_chunk(self, chunk, parse_row, aware_fields):
+        """
+        Parse a chunk of ``(line_num, row)`` pairs into ``(line_num, pk, defaults)``.
+        """
+        parsed = []
+        for line_num, row in chunk:
+            try:
+                pk, defaults = parse_row(row)
+                for field in aware_fields:
+                    defaults[field] = timezone.make_aware(defaults[field])
+            except Exception as e:
+                self.report_error(line_num, e)
+                continue
+            parsed.append((line_num, pk, defaults))
+        return parsed
+
+    def driver_ids(self, reference, values):
+        """
+        Map referenced ids to their drivers, leaving out ids that do not exist.
+        """
+        if reference == 'driver_id':
+            return {
+                driver_id: driver_id
+                for driver_id in Driver.objects.filter(pk__in=values).values_list('pk', flat=True)
+            }
+        return dict(Trip.objects.filter(pk__in=values).values_list('trip_id', 'driver_id'))
+
+    def write_batch(self, model, reference, parsed):
+        """
+        Write a parsed chunk and refresh the performance of its drivers, in
+        one transaction.
+
+        Rows referring to missing drivers or trips are reported and skipped.
+        If the bulk write violates a constraint the chunk is replayed row by
+        row, so the offending rows are reported.
+        """
+        with transaction.atomic():
+            drivers = self.driver_ids(reference, {defaults[reference] for _, _, defaults in parsed})
+            rows = []
+            for line_num, pk, defaults in parsed:
+                if defaults[reference] not in drivers:
+                    label = 'Driver' if reference == 'driver_id' else 'Trip'
+                    self.report_error(line_num, f'{label} {defaults[reference]} does not exist')
+                    continue
+                rows.append((line_num, pk, defaults))
+
+            # Rows being replaced may have belonged to other drivers
+            existing = dict(
+                model.objects.filter(pk__in={pk for _, pk, _ in rows}).values_list('pk', reference)
+            )
+            try:
+                with transaction.atomic():
+                    self.bulk_upsert(model, rows, existing)
+            except DatabaseError:
+                self.write_rows(model, rows)
+
+            changed = set(drivers.values())
+            changed.update(self.driver_ids(reference, set(existing.values())).values())
+            performance.refresh(changed)
+
+    def bulk_upsert(self, model, rows, existing):
+        """
+        Write a chunk with a native upsert when the database supports it,
+        otherwise ``bulk_create`` plus ``bulk_update``.
+        """
+        instances = {}
+        created = 0
+        updated = 0
+        for line_num, pk, defaults in rows:
+            if pk in existing or pk in instances:
+                updated += 1
+            else:
+                created += 1
+            instances[pk] = model(pk=pk, **defaults)
+        if not instances:
+            return
+        fields = list(rows[0][2])
+
+        if connection.features.supports_update_conflicts_with_target:
+            model.objects.bulk_create(
+                instances.values(),
+                update_conflicts=True,
+                unique_fields=[model._meta.pk.name],
+                update_fields=fields,
+            )
+        else:
+            model.objects.bulk_create(
+                [instance for pk, instance in instances.items() if pk not in existing]
+            )
+            model.objects.bulk_update(
+                [instance for pk, instance in instances.items() if pk in existing],
+                fields
+            )
+
+        self.created_count += created
+        self.updated_count += updated
+
+    def write_rows(self, model, rows):
+        """
+        Write a chunk row by row, isolating failures in savepoints.
+        """
+        for line_num, pk, defaults in rows:
+            try:
+                with transaction.atomic():
+                    instance, created = model.objects.update_or_create(pk=pk, defaults=defaults)
+            except Exception as e:
+                self.report_error(line_num, e)
+                continue
+
+            if created:
+                self.created_count += 1
+            else:
+                self.updated_count += 1
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from drivers import performance
+
+
+class Command(BaseCommand):
+    help = 'Recompute every driver performance row from the trips, ratings and payments tables'
+
+    def handle(self, *args, **options):
+        refreshed = performance.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt performance aggregates of {refreshed} drivers')
+        )
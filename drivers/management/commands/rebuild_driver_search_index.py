@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from drivers import search
+from drivers.models import DriverSearchToken
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the driver search token index from the drivers table'
+
+    def handle(self, *args, **options):
+        search.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rebuilt driver search index with {DriverSearchToken.objects.count()} tokens'
+            )
+        )
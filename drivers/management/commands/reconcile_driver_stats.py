@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from drivers import counters
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the driver statistics counters and report any drift'
+
+    def handle(self, *args, **options):
+        drift = counters.rebuild()
+        
+        if not drift:
+            self.stdout.write(
+                self.style.SUCCESS('Driver statistics counters are in sync')
+            )
+            return
+        
+        for (vehicle_type, is_active), difference in sorted(drift.items()):
+            status = 'active' if is_active else 'inactive'
+            self.stdout.write(
+                self.style.WARNING(
+                    f'  {vehicle_type} ({status}): stored count off by {-difference:+d}'
+                )
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt driver statistics counters, fixed {len(drift)} counter(s)')
+        )
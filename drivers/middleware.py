@@ -0,0 +1,171 @@
+import json
+import random
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.middleware import clickjacking, common, security
+from django.utils.decorators import sync_and_async_middleware
+from .health import readiness
+from .instrumentation import (
+    RequestMetrics,
+    current_metrics,
+    endpoint_name,
+    logger as instrumentation_logger,
+    request_latency,
+)
+
+
+def health_response(ready, error=None):
+    data = {'status': 'ok'} if ready else {'status': 'unavailable', 'error': error}
+    response = JsonResponse(data, status=200 if ready else 503)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@sync_and_async_middleware
+def HealthCheckMiddleware(get_response):
+    """
+    Answer GET and HEAD on ``/healthz`` and ``/readyz`` before any other
+    middleware, so probes skip host validation, sessions, URL resolution and
+    DRF.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            if request.method in ('GET', 'HEAD'):
+                if request.path == '/healthz':
+                    return health_response(True)
+                if request.path == '/readyz':
+                    return health_response(*await readiness.acheck())
+            return await get_response(request)
+    else:
+        def middleware(request):
+            if request.method in ('GET', 'HEAD'):
+                if request.path == '/healthz':
+                    return health_response(True)
+                if request.path == '/readyz':
+                    return health_response(*readiness.check())
+            return get_response(request)
+    return middleware
+
+
+class RequestMetricsMiddleware:
+    """
+    Time requests into the latency histograms, break sampled requests down
+    into database, serializer and render time, and serve ``/metrics``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if self.is_metrics_request(request):
+            return self.metrics_response()
+        metrics, token, started = self.start()
+        response = self.get_response(request)
+        return self.finish(request, response, metrics, token, started)
+
+    async def __acall__(self, request):
+        if self.is_metrics_request(request):
+            return self.metrics_response()
+        metrics, token, started = self.start()
+        response = await self.get_response(request)
+        return self.finish(request, response, metrics, token, started)
+
+    def process_template_response(self, request, response):
+        # Called just before a DRF response is rendered
+        metrics = current_metrics.get()
+        if metrics is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: metrics.add_span('render', time.perf_counter() - started)
+            )
+        return response
+
+    def is_metrics_request(self, request):
+        path = getattr(settings, 'INSTRUMENTATION_METRICS_PATH', '/metrics')
+        return path is not None and request.path == path and request.method == 'GET'
+
+    def metrics_response(self):
+        return HttpResponse(
+            request_latency.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+    def start(self):
+        rate = getattr(settings, 'INSTRUMENTATION_SAMPLE_RATE', 0.0)
+        metrics = RequestMetrics() if rate and random.random() < rate else None
+        return metrics, current_metrics.set(metrics), time.perf_counter()
+
+    def finish(self, request, response, metrics, token, started):
+        elapsed = time.perf_counter() - started
+        current_metrics.reset(token)
+        endpoint = endpoint_name(request)
+        request_latency.observe(endpoint, request.method, elapsed)
+        if metrics is not None:
+            response['Server-Timing'] = metrics.server_timing(elapsed)
+            instrumentation_logger.info(json.dumps({
+                'event': 'request',
+                'method': request.method,
+                'path': request.path,
+                'endpoint': endpoint,
+                'status': response.status_code,
+                'duration_ms': round(elapsed * 1000, 3),
+                **metrics.as_dict(),
+            }))
+        return response
+
+
+@sync_and_async_middleware
+def AsyncURLConfMiddleware(get_response):
+    """
+    Resolve requests served through the ASGI application with
+    ``ASYNC_ROOT_URLCONF``, which routes the driver read endpoints to their
+    async views. WSGI requests keep ``ROOT_URLCONF``.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            request.urlconf = settings.ASYNC_ROOT_URLCONF
+            return await get_response(request)
+    else:
+        def middleware(request):
+            return get_response(request)
+    return middleware
+
+
+class InlineMiddlewareMixin:
+    """
+    Run ``process_request`` and ``process_response`` on the event loop.
+
+    ``MiddlewareMixin`` calls both in a worker thread under ASGI, two thread
+    hops per middleware per request. Only for middleware whose hooks do no
+    I/O.
+    """
+
+    async def __acall__(self, request):
+        response = None
+        if hasattr(self, 'process_request'):
+            response = self.process_request(request)
+        response = response or await self.get_response(request)
+        if hasattr(self, 'process_response'):
+            response = self.process_response(request, response)
+        return response
+
+
+class SecurityMiddleware(InlineMiddlewareMixin, security.SecurityMiddleware):
+    pass
+
+
+class CommonMiddleware(InlineMiddlewareMixin, common.CommonMiddleware):
+    pass
+
+
+class XFrameOptionsMiddleware(InlineMiddlewareMixin, clickjacking.XFrameOptionsMiddleware):
+    pass
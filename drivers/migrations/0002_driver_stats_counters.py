@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:48
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    Driver = apps.get_model('drivers', 'Driver')
+    DriverStatsCounter = apps.get_model('drivers', 'DriverStatsCounter')
+    rows = (
+        Driver.objects.order_by()
+        .values('vehicle_type', 'is_active')
+        .annotate(count=Count('driver_id'))
+    )
+    DriverStatsCounter.objects.bulk_create(
+        DriverStatsCounter(**row) for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverStatsCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vehicle_type', models.CharField(max_length=20)),
+                ('is_active', models.BooleanField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'driver_stats_counters',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='driverstatscounter',
+            constraint=models.UniqueConstraint(fields=('vehicle_type', 'is_active'), name='unique_driver_stats_counter'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
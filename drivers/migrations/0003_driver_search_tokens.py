@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Copied from drivers.search as it was when the index was added, so later
+# changes to the module do not change what this migration writes
+SEARCH_FIELDS = ['name', 'phone', 'vehicle_plate']
+
+
+def field_tokens(value):
+    tokens = set()
+    for word in value.lower().split():
+        word = word[:100]
+        tokens.update(word[start:] for start in range(len(word)))
+    return tokens
+
+
+def populate_search_tokens(apps, schema_editor):
+    Driver = apps.get_model('drivers', 'Driver')
+    DriverSearchToken = apps.get_model('drivers', 'DriverSearchToken')
+    tokens = []
+    drivers = Driver.objects.order_by().values('driver_id', *SEARCH_FIELDS)
+    for values in drivers.iterator(chunk_size=1000):
+        tokens.extend(
+            DriverSearchToken(driver_id=values['driver_id'], field=field, token=token)
+            for field in SEARCH_FIELDS
+            for token in field_tokens(values[field] or '')
+        )
+        if len(tokens) >= 1000:
+            DriverSearchToken.objects.bulk_create(tokens)
+            tokens = []
+    DriverSearchToken.objects.bulk_create(tokens)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0002_driver_stats_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('name', 'Name'), ('phone', 'Phone'), ('vehicle_plate', 'Vehicle plate')], max_length=20)),
+                ('token', models.CharField(max_length=100)),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='drivers.driver')),
+            ],
+            options={
+                'db_table': 'driver_search_tokens',
+                'indexes': [models.Index(fields=['token'], name='driver_search_token_idx', opclasses=['varchar_pattern_ops'])],
+            },
+        ),
+        migrations.RunPython(populate_search_tokens, migrations.RunPython.noop),
+    ]
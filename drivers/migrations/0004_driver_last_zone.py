@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0003_driver_search_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='driver',
+            name='last_zone',
+            field=models.CharField(blank=True, default='', help_text='Zone where the driver was last seen', max_length=50),
+        ),
+    ]
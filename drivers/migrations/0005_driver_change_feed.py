@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:03
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0004_driver_last_zone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DriverTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('driver_id', models.IntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'driver_tombstones',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(fields=['updated_at', 'driver_id'], name='driver_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='drivertombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='driver_tombstone_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:19
+
+from django.db import migrations, models
+from django.db.models import Count
+from drivers.vehicle_types import VEHICLE_TYPES
+
+
+def canonicalize_vehicle_types(apps, schema_editor):
+    """
+    Store every known vehicle type in its canonical spelling, so filters can
+    match exactly, and recount the stats counters.
+    """
+    Driver = apps.get_model('drivers', 'Driver')
+    DriverStatsCounter = apps.get_model('drivers', 'DriverStatsCounter')
+    changed = 0
+    for vehicle_type in VEHICLE_TYPES:
+        changed += (
+            Driver.objects.filter(vehicle_type__iexact=vehicle_type)
+            .exclude(vehicle_type=vehicle_type)
+            .update(vehicle_type=vehicle_type)
+        )
+    if changed:
+        rows = (
+            Driver.objects.order_by()
+            .values('vehicle_type', 'is_active')
+            .annotate(count=Count('driver_id'))
+        )
+        DriverStatsCounter.objects.all().delete()
+        DriverStatsCounter.objects.bulk_create(
+            DriverStatsCounter(**row) for row in rows
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0005_driver_change_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(canonicalize_vehicle_types, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='driver',
+            name='drivers_is_acti_d38a80_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='driver',
+            name='drivers_vehicle_4e8406_idx',
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-driver_id', 'updated_at', 'is_active'], name='driver_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['-driver_id', 'updated_at', 'is_active'], name='driver_inactive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['vehicle_type', '-driver_id', 'updated_at', 'is_active'], name='driver_active_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['vehicle_type', '-driver_id', 'updated_at', 'is_active'], name='driver_inactive_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(fields=['vehicle_type', '-driver_id', 'updated_at'], name='driver_type_idx'),
+        ),
+    ]
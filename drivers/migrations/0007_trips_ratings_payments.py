@@ -0,0 +1,101 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:33
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def create_performance_rows(apps, schema_editor):
+    """
+    Give every existing driver an empty performance row.
+    """
+    Driver = apps.get_model('drivers', 'Driver')
+    DriverPerformance = apps.get_model('drivers', 'DriverPerformance')
+    driver_ids = Driver.objects.order_by().values_list('driver_id', flat=True)
+    DriverPerformance.objects.bulk_create(
+        (DriverPerformance(driver_id=driver_id) for driver_id in driver_ids.iterator()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0006_driver_vehicle_type_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trip',
+            fields=[
+                ('trip_id', models.AutoField(primary_key=True, serialize=False)),
+                ('rider_id', models.IntegerField(help_text='ID of the rider who requested the trip')),
+                ('pickup_zone', models.CharField(max_length=50)),
+                ('drop_zone', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('REQUESTED', 'Requested'), ('ACCEPTED', 'Accepted'), ('ONGOING', 'Ongoing'), ('COMPLETED', 'Completed'), ('CANCELLED', 'Cancelled')], max_length=20)),
+                ('requested_at', models.DateTimeField()),
+                ('distance_km', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('base_fare', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('surge_multiplier', models.DecimalField(decimal_places=2, default=1, max_digits=4)),
+                ('total_fare', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('driver', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='trips', to='drivers.driver')),
+            ],
+            options={
+                'db_table': 'trips',
+                'ordering': ['-trip_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Rating',
+            fields=[
+                ('rating_id', models.AutoField(primary_key=True, serialize=False)),
+                ('rider_rating', models.PositiveSmallIntegerField(blank=True, help_text='Rating the driver gave the rider (1-5)', null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)])),
+                ('driver_rating', models.PositiveSmallIntegerField(help_text='Rating the rider gave the driver (1-5)', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)])),
+                ('comment', models.CharField(blank=True, default='', max_length=255)),
+                ('trip', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rating', to='drivers.trip')),
+            ],
+            options={
+                'db_table': 'ratings',
+            },
+        ),
+        migrations.CreateModel(
+            name='Payment',
+            fields=[
+                ('payment_id', models.AutoField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('method', models.CharField(choices=[('CASH', 'Cash'), ('CARD', 'Card'), ('UPI', 'UPI'), ('WALLET', 'Wallet')], max_length=20)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SUCCESS', 'Success'), ('FAILED', 'Failed')], max_length=20)),
+                ('reference', models.CharField(max_length=40, unique=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='drivers.trip')),
+            ],
+            options={
+                'db_table': 'payments',
+            },
+        ),
+        migrations.CreateModel(
+            name='DriverPerformance',
+            fields=[
+                ('driver', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='performance', serialize=False, to='drivers.driver')),
+                ('trip_count', models.PositiveIntegerField(default=0)),
+                ('completed_trip_count', models.PositiveIntegerField(default=0)),
+                ('cancelled_trip_count', models.PositiveIntegerField(default=0)),
+                ('completion_rate', models.FloatField(default=0.0, help_text='Share of completed trips among completed and cancelled ones, 0 without any')),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('rating_total', models.PositiveIntegerField(default=0)),
+                ('average_rating', models.FloatField(default=0.0, help_text='Average rating given to the driver, 0 until rated')),
+                ('total_earnings', models.DecimalField(decimal_places=2, default=0, help_text="Sum of the successful payments of the driver's trips", max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'driver_performance',
+                'indexes': [models.Index(fields=['average_rating', 'driver'], name='performance_rating_idx'), models.Index(fields=['completion_rate', 'driver'], name='performance_completion_idx'), models.Index(fields=['total_earnings', 'driver'], name='performance_earnings_idx'), models.Index(fields=['trip_count', 'driver'], name='performance_trips_idx'), models.Index(fields=['updated_at'], name='performance_updated_at_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['driver', 'status'], name='trip_driver_status_idx'),
+        ),
+        migrations.RunPython(create_performance_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0007_trips_ratings_payments'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='driverstatscounter',
+            name='unique_driver_stats_counter',
+        ),
+        migrations.AddField(
+            model_name='driverstatscounter',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='driverstatscounter',
+            constraint=models.UniqueConstraint(fields=('vehicle_type', 'is_active', 'shard'), name='unique_driver_stats_counter_shard'),
+        ),
+    ]
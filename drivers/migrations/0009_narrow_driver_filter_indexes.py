@@ -0,0 +1,53 @@
+# Generated by Django 4.2.7 on 2026-10-17 03:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0008_driver_stats_counter_shards'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='driver',
+            name='driver_active_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='driver',
+            name='driver_inactive_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='driver',
+            name='driver_active_type_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='driver',
+            name='driver_inactive_type_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='driver',
+            name='driver_type_idx',
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(fields=['vehicle_type', '-driver_id'], name='driver_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-driver_id', 'is_active'], name='driver_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['-driver_id', 'is_active'], name='driver_inactive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['vehicle_type', '-driver_id', 'is_active'], name='driver_active_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='driver',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['vehicle_type', '-driver_id', 'is_active'], name='driver_inactive_type_idx'),
+        ),
+    ]
@@ -1,5 +1,131 @@
-from django.db import models
-from django.core.validators import RegexValidator
+from django.db import connections, models, router, transaction
+from django.db.models import Case, Q, Value, When
+from django.core.validators import MaxValueValidator, MinValueValidator, RegexValidator
+from django.utils import timezone
+from .signals import DriverChange, drivers_changed
+from .trip_choices import PAYMENT_METHOD_CHOICES, PAYMENT_STATUS_CHOICES, TRIP_STATUS_CHOICES
+from .vehicle_types import VEHICLE_TYPE_CHOICES
+
+
+class DriverQuerySet(models.QuerySet):
+    """
+    Custom queryset for Driver with write helpers that keep derived data in sync.
+    """
+    
+    update_chunk_size = 500
+    
+    def set_active(self, is_active, chunk_size=None):
+        """
+        Set ``is_active`` on every driver in the queryset that differs from it.
+        
+        Drivers are written with ``update_status`` in chunks of ``chunk_size``,
+        each in its own short transaction, so ``updated_at`` is bumped and
+        ``drivers_changed`` is sent. Returns the ids of the changed drivers.
+        """
+        chunk_size = chunk_size or self.update_chunk_size
+        driver_ids = list(
+            self.exclude(is_active=is_active)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        
+        changed = []
+        for start in range(0, len(driver_ids), chunk_size):
+            drivers = self.model.objects.using(self._db).update_status(
+                driver_ids[start:start + chunk_size],
+                is_active
+            )
+            changed.extend(driver.pk for driver in drivers)
+        return changed
+    
+    def update_status(self, driver_ids, is_active=None):
+        """
+        Set the status of the given drivers, or toggle it if ``is_active`` is None.
+        
+        Only drivers whose status actually changes are written, touching just
+        ``is_active`` and ``updated_at``. Where the database supports it this
+        is a single ``UPDATE ... RETURNING`` statement, so concurrent toggles
+        cannot lose updates and no extra SELECT is needed. Returns the changed
+        drivers, built from the returned columns, and sends ``drivers_changed``
+        for them.
+        """
+        using = self._db or router.db_for_write(self.model)
+        driver_ids = list(driver_ids)
+        if not driver_ids:
+            return []
+        
+        with transaction.atomic(using=using):
+            if supports_update_returning(connections[using]):
+                drivers = self._update_status_returning(using, driver_ids, is_active)
+            else:
+                drivers = self._update_status_locked(using, driver_ids, is_active)
+            
+            drivers_changed.send(
+                sender=self.model,
+                changes=[
+                    DriverChange(
+                        driver.pk,
+                        {**driver._loaded_values, 'is_active': not driver.is_active},
+                        driver._loaded_values
+                    )
+                    for driver in drivers
+                ]
+            )
+        return drivers
+    
+    def _update_status_returning(self, using, driver_ids, is_active):
+        connection = connections[using]
+        meta = self.model._meta
+        quote = connection.ops.quote_name
+        is_active_column = quote(meta.get_field('is_active').column)
+        updated_at = meta.get_field('updated_at')
+        
+        params = [updated_at.get_db_prep_save(timezone.now(), connection)]
+        where = [
+            f"{quote(meta.pk.column)} IN ({', '.join(['%s'] * len(driver_ids))})"
+        ]
+        params += driver_ids
+        if is_active is None:
+            new_status = f'NOT {is_active_column}'
+        else:
+            new_status = '%s'
+            params.insert(0, is_active)
+            where.append(f'{is_active_column} = %s')
+            params.append(not is_active)
+        
+        sql = (
+            f'UPDATE {quote(meta.db_table)} '
+            f'SET {is_active_column} = {new_status}, {quote(updated_at.column)} = %s '
+            f"WHERE {' AND '.join(where)} "
+            f"RETURNING {', '.join(quote(field.column) for field in meta.concrete_fields)}"
+        )
+        return list(self.model.objects.db_manager(using).raw(sql, params))
+    
+    def _update_status_locked(self, using, driver_ids, is_active):
+        queryset = self.model.objects.using(using).filter(pk__in=driver_ids)
+        if is_active is not None:
+            queryset = queryset.exclude(is_active=is_active)
+        ids = list(queryset.select_for_update().values_list('pk', flat=True))
+        
+        if is_active is None:
+            new_status = Case(When(is_active=True, then=Value(False)), default=Value(True))
+        else:
+            new_status = Value(is_active)
+        self.model.objects.using(using).filter(pk__in=ids).update(
+            is_active=new_status,
+            updated_at=timezone.now()
+        )
+        return list(self.model.objects.using(using).filter(pk__in=ids))
+
+
+def supports_update_returning(connection):
+    """
+    Return True if the database supports ``UPDATE ... RETURNING``.
+    """
+    if connection.vendor == 'postgresql':
+        return True
+    # SQLite added RETURNING in 3.35, together with INSERT ... RETURNING
+    return connection.vendor == 'sqlite' and connection.features.can_return_columns_from_insert
 
 
 class Driver(models.Model):
@@ -7,13 +133,10 @@ class Driver(models.Model):
     Model representing a driver in the ride-hailing system.
     """
     
-    VEHICLE_TYPE_CHOICES = [
-        ('Bike', 'Bike'),
-        ('Auto', 'Auto'),
-        ('Hatchback', 'Hatchback'),
-        ('Sedan', 'Sedan'),
-        ('SUV', 'SUV'),
-    ]
+    VEHICLE_TYPE_CHOICES = VEHICLE_TYPE_CHOICES
+    
+    # Fields whose before/after values are reported through drivers_changed
+    TRACKED_FIELDS = ['name', 'phone', 'vehicle_type', 'vehicle_plate', 'is_active', 'last_zone']
     
     driver_id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=100, help_text="Driver's full name")
@@ -46,18 +169,296 @@ class Driver(models.Model):
         help_text="Whether the driver is currently active"
     )
     
+    last_zone = models.CharField(
+        max_length=50,
+        blank=True,
+        default='',
+        help_text="Zone where the driver was last seen"
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = DriverQuerySet.as_manager()
+    
     class Meta:
         db_table = 'drivers'
         ordering = ['-driver_id']
         indexes = [
-            models.Index(fields=['is_active']),
-            models.Index(fields=['vehicle_type']),
+            # Vehicle type filter in the default -driver_id order. It comes
+            # before the partial indexes below, which are the same width:
+            # SQLite settles a tie on the index created last.
+            models.Index(fields=['vehicle_type', '-driver_id'], name='driver_type_idx'),
+            # Status and vehicle type filters in the default -driver_id order.
+            # The status is the partial index condition because Django
+            # filters booleans as a bare "WHERE is_active", which SQLite only
+            # matches against an index condition. is_active is included so a
+            # page's count is read from the index alone.
+            models.Index(
+                fields=['-driver_id', 'is_active'],
+                condition=Q(is_active=True),
+                name='driver_active_idx'
+            ),
+            models.Index(
+                fields=['-driver_id', 'is_active'],
+                condition=Q(is_active=False),
+                name='driver_inactive_idx'
+            ),
+            models.Index(
+                fields=['vehicle_type', '-driver_id', 'is_active'],
+                condition=Q(is_active=True),
+                name='driver_active_type_idx'
+            ),
+            models.Index(
+                fields=['vehicle_type', '-driver_id', 'is_active'],
+                condition=Q(is_active=False),
+                name='driver_inactive_type_idx'
+            ),
             models.Index(fields=['phone']),
+            # Keyset order of the change feed
+            models.Index(fields=['updated_at', 'driver_id'], name='driver_updated_at_idx'),
         ]
     
     def __str__(self):
         return f"{self.name} ({self.vehicle_type} - {self.vehicle_plate})"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded values so saves can report what changed
+        if not instance.get_deferred_fields().intersection(cls.TRACKED_FIELDS):
+            instance._loaded_values = instance.tracked_values()
+        return instance
+    
+    def tracked_values(self):
+        """
+        Return the current values of ``TRACKED_FIELDS``.
+        """
+        return {field: getattr(self, field) for field in self.TRACKED_FIELDS}
 
+
+class DriverStatsCounter(models.Model):
+    """
+    Number of drivers per vehicle type and status.
+    
+    Maintained incrementally from ``drivers_changed`` so driver statistics
+    can be answered without scanning the drivers table. A count is the sum
+    of its shards (see ``drivers.counters``).
+    """
+    
+    vehicle_type = models.CharField(max_length=20)
+    is_active = models.BooleanField()
+    shard = models.PositiveSmallIntegerField(default=0)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'driver_stats_counters'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['vehicle_type', 'is_active', 'shard'],
+                name='unique_driver_stats_counter_shard'
+            ),
+        ]
+    
+    def __str__(self):
+        status = 'active' if self.is_active else 'inactive'
+        return f"{self.vehicle_type} ({status}, shard {self.shard}): {self.count}"
+
+
+class DriverSearchToken(models.Model):
+    """
+    Suffix of a whitespace-delimited word of a driver's name, phone or plate.
+    
+    A search term matches a field exactly when some token of that field
+    starts with the lower-cased term, so substring search becomes an index
+    range scan. Maintained from ``drivers_changed``.
+    """
+    
+    FIELD_CHOICES = [
+        ('name', 'Name'),
+        ('phone', 'Phone'),
+        ('vehicle_plate', 'Vehicle plate'),
+    ]
+    
+    driver = models.ForeignKey(
+        Driver,
+        on_delete=models.CASCADE,
+        related_name='search_tokens'
+    )
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    token = models.CharField(max_length=100)
+    
+    class Meta:
+        db_table = 'driver_search_tokens'
+        indexes = [
+            # varchar_pattern_ops lets PostgreSQL serve LIKE 'term%' from the
+            # index; other backends ignore it and get a plain index
+            models.Index(
+                fields=['token'],
+                name='driver_search_token_idx',
+                opclasses=['varchar_pattern_ops']
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.field}: {self.token}"
+
+
+class DriverTombstone(models.Model):
+    """
+    Record of a deleted driver.
+    
+    Written from ``drivers_changed`` in the deleting transaction, so the
+    change feed can report deletes after the driver row is gone.
+    """
+    
+    driver_id = models.IntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'driver_tombstones'
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='driver_tombstone_deleted_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Driver {self.driver_id} deleted at {self.deleted_at}"
+
+
+class Trip(models.Model):
+    """
+    A ride requested by a rider and assigned to a driver.
+    """
+    
+    STATUS_CHOICES = TRIP_STATUS_CHOICES
+    
+    trip_id = models.AutoField(primary_key=True)
+    rider_id = models.IntegerField(help_text="ID of the rider who requested the trip")
+    driver = models.ForeignKey(
+        Driver,
+        on_delete=models.CASCADE,
+        related_name='trips',
+        # Covered by trip_driver_status_idx
+        db_index=False
+    )
+    pickup_zone = models.CharField(max_length=50)
+    drop_zone = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    requested_at = models.DateTimeField()
+    distance_km = models.DecimalField(max_digits=8, decimal_places=2)
+    base_fare = models.DecimalField(max_digits=10, decimal_places=2)
+    surge_multiplier = models.DecimalField(max_digits=4, decimal_places=2, default=1)
+    total_fare = models.DecimalField(max_digits=10, decimal_places=2)
+    
+    class Meta:
+        db_table = 'trips'
+        ordering = ['-trip_id']
+        indexes = [
+            # Per-driver aggregation of trip counts by status
+            models.Index(fields=['driver', 'status'], name='trip_driver_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Trip {self.trip_id} ({self.pickup_zone} -> {self.drop_zone}, {self.status})"
+
+
+class Rating(models.Model):
+    """
+    The ratings a rider and a driver gave each other after a trip.
+    """
+    
+    rating_id = models.AutoField(primary_key=True)
+    trip = models.OneToOneField(Trip, on_delete=models.CASCADE, related_name='rating')
+    rider_rating = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1), MaxValueValidator(5)],
+        help_text="Rating the driver gave the rider (1-5)"
+    )
+    driver_rating = models.PositiveSmallIntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(5)],
+        help_text="Rating the rider gave the driver (1-5)"
+    )
+    comment = models.CharField(max_length=255, blank=True, default='')
+    
+    class Meta:
+        db_table = 'ratings'
+    
+    def __str__(self):
+        return f"Trip {self.trip_id}: driver {self.driver_rating}/5"
+
+
+class Payment(models.Model):
+    """
+    A payment attempt for a trip.
+    """
+    
+    METHOD_CHOICES = PAYMENT_METHOD_CHOICES
+    STATUS_CHOICES = PAYMENT_STATUS_CHOICES
+    
+    payment_id = models.AutoField(primary_key=True)
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='payments')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    method = models.CharField(max_length=20, choices=METHOD_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    reference = models.CharField(max_length=40, unique=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'payments'
+    
+    def __str__(self):
+        return f"{self.reference}: {self.amount} ({self.method}, {self.status})"
+
+
+class DriverPerformance(models.Model):
+    """
+    Trip, rating and earnings aggregates of a driver.
+    
+    Every driver has a row, created with the driver from ``drivers_changed``
+    and recomputed by ``drivers.performance`` whenever the driver's trips,
+    ratings or payments are written, so rankings and driver reads never
+    aggregate trips.
+    """
+    
+    driver = models.OneToOneField(
+        Driver,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='performance'
+    )
+    trip_count = models.PositiveIntegerField(default=0)
+    completed_trip_count = models.PositiveIntegerField(default=0)
+    cancelled_trip_count = models.PositiveIntegerField(default=0)
+    completion_rate = models.FloatField(
+        default=0.0,
+        help_text="Share of completed trips among completed and cancelled ones, 0 without any"
+    )
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_total = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(
+        default=0.0,
+        help_text="Average rating given to the driver, 0 until rated"
+    )
+    total_earnings = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        help_text="Sum of the successful payments of the driver's trips"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'driver_performance'
+        indexes = [
+            # Rankings, in either direction, with driver_id as the tie-breaker
+            models.Index(fields=['average_rating', 'driver'], name='performance_rating_idx'),
+            models.Index(fields=['completion_rate', 'driver'], name='performance_completion_idx'),
+            models.Index(fields=['total_earnings', 'driver'], name='performance_earnings_idx'),
+            models.Index(fields=['trip_count', 'driver'], name='performance_trips_idx'),
+            # Latest refresh, which versions ranking responses
+            models.Index(fields=['updated_at'], name='performance_updated_at_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Driver {self.driver_id}: {self.average_rating:.2f} over {self.rating_count} ratings"
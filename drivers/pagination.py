@@ -0,0 +1,54 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class DriverCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the default ``-driver_id`` ordering.
+
+    Pages are fetched with ``WHERE driver_id < <cursor> LIMIT n``, so deep
+    pages cost the same as the first one and no ``COUNT(*)`` is issued.
+    """
+    ordering = '-driver_id'
+
+
+class DriverPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in cursor mode.
+
+    Requests carrying ``?pagination=cursor`` (or a ``cursor`` token from a
+    previous cursor page) are paginated with ``DriverCursorPagination``;
+    everything else keeps the ``count``/``page`` response format.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode_value = 'cursor'
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def use_cursor(self, request):
+        """
+        Return True if the request asks for cursor pagination.
+        """
+        cursor_param = DriverCursorPagination.cursor_query_param
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode_value
+            or cursor_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = DriverCursorPagination()
+            page = self.cursor_paginator.paginate_queryset(queryset, request, view)
+            self.display_page_controls = self.cursor_paginator.display_page_controls
+            return page
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
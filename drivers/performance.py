@@ -0,0 +1,303 @@
+"""
+Precomputed per-driver performance aggregates.
+
+Each driver's trip counts, completion rate, average rating and earnings are
+stored in ``DriverPerformance``, so rankings and driver reads never join or
+aggregate trips at request time. Rows are created with their driver from
+``drivers_changed``. Whenever trips, ratings or payments are written, the
+drivers they belong to are re-aggregated in the same transaction from the
+``trip_driver_status_idx`` index: ``load_trips`` refreshes each batch's
+drivers, and single-row saves and deletes are refreshed by the receivers
+below. Each refresh recounts only its own drivers' trips, so reloading a
+file or editing a trip never leaves drift behind. A delete refreshes each
+surviving driver once, however many of their trips, ratings and payments it
+cascades to.
+"""
+
+import threading
+from collections import Counter
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .cache import driver_cache
+from .models import Driver, DriverPerformance, Payment, Rating, Trip
+from .signals import drivers_changed
+from .trip_choices import CANCELLED, COMPLETED, SUCCESS
+
+
+REFRESH_CHUNK_SIZE = 500
+
+AGGREGATE_FIELDS = [
+    'trip_count',
+    'completed_trip_count',
+    'cancelled_trip_count',
+    'completion_rate',
+    'rating_count',
+    'rating_total',
+    'average_rating',
+    'total_earnings',
+]
+
+
+def compute(driver_ids):
+    """
+    Aggregate the trips, ratings and successful payments of ``driver_ids``.
+
+    Returns {driver_id: {field: value}} with an entry for every driver id.
+    """
+    values = {
+        driver_id: {
+            'trip_count': 0,
+            'completed_trip_count': 0,
+            'cancelled_trip_count': 0,
+            'rating_count': 0,
+            'rating_total': 0,
+            'total_earnings': Decimal('0'),
+        }
+        for driver_id in driver_ids
+    }
+
+    trips = (
+        Trip.objects.filter(driver_id__in=driver_ids)
+        .order_by()
+        .values('driver_id')
+        .annotate(
+            trip_count=Count('pk'),
+            completed_trip_count=Count('pk', filter=Q(status=COMPLETED)),
+            cancelled_trip_count=Count('pk', filter=Q(status=CANCELLED)),
+        )
+    )
+    for row in trips:
+        values[row.pop('driver_id')].update(row)
+
+    ratings = (
+        Rating.objects.filter(trip__driver_id__in=driver_ids)
+        .order_by()
+        .values('trip__driver_id')
+        .annotate(rating_count=Count('pk'), rating_total=Sum('driver_rating'))
+    )
+    for row in ratings:
+        values[row.pop('trip__driver_id')].update(row)
+
+    earnings = (
+        Payment.objects.filter(trip__driver_id__in=driver_ids, status=SUCCESS)
+        .order_by()
+        .values('trip__driver_id')
+        .annotate(total_earnings=Sum('amount'))
+    )
+    for row in earnings:
+        values[row.pop('trip__driver_id')].update(row)
+
+    for row in values.values():
+        finished = row['completed_trip_count'] + row['cancelled_trip_count']
+        row['completion_rate'] = row['completed_trip_count'] / finished if finished else 0.0
+        row['average_rating'] = row['rating_total'] / row['rating_count'] if row['rating_count'] else 0.0
+    return values
+
+
+def refresh(driver_ids):
+    """
+    Recompute the stored aggregates of ``driver_ids``.
+
+    Drivers without a performance row (such as ones being deleted) are
+    skipped. Returns the number of rows written.
+    """
+    driver_ids = sorted(set(driver_ids))
+    written = 0
+    for start in range(0, len(driver_ids), REFRESH_CHUNK_SIZE):
+        chunk = list(
+            DriverPerformance.objects.filter(driver_id__in=driver_ids[start:start + REFRESH_CHUNK_SIZE])
+            .values_list('driver_id', flat=True)
+        )
+        if not chunk:
+            continue
+        now = timezone.now()
+        rows = [
+            DriverPerformance(driver_id=driver_id, updated_at=now, **values)
+            for driver_id, values in compute(chunk).items()
+        ]
+        if connection.features.supports_update_conflicts_with_target:
+            # Every row exists, so this updates them all. Unlike bulk_update
+            # it needs no CASE expression per field and row.
+            DriverPerformance.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['driver'],
+                update_fields=AGGREGATE_FIELDS + ['updated_at'],
+            )
+        else:
+            DriverPerformance.objects.bulk_update(rows, AGGREGATE_FIELDS + ['updated_at'])
+        written += len(rows)
+
+    # Cached drivers carry their performance row
+    driver_cache.invalidate(driver_ids)
+    transaction.on_commit(lambda: driver_cache.invalidate(driver_ids))
+    return written
+
+
+def rebuild(batch_size=REFRESH_CHUNK_SIZE):
+    """
+    Recompute the performance row of every driver, creating missing rows.
+
+    Returns the number of drivers refreshed.
+    """
+    driver_ids = Driver.objects.order_by().values_list('driver_id', flat=True)
+    refreshed = 0
+    chunk = []
+    for driver_id in driver_ids.iterator(chunk_size=batch_size):
+        chunk.append(driver_id)
+        if len(chunk) >= batch_size:
+            refreshed += rebuild_chunk(chunk)
+            chunk = []
+    if chunk:
+        refreshed += rebuild_chunk(chunk)
+    return refreshed
+
+
+def rebuild_chunk(driver_ids):
+    with transaction.atomic():
+        create_rows(driver_ids)
+        return refresh(driver_ids)
+
+
+def create_rows(driver_ids):
+    """
+    Create empty performance rows for ``driver_ids`` that have none.
+    """
+    DriverPerformance.objects.bulk_create(
+        [DriverPerformance(driver_id=driver_id) for driver_id in driver_ids],
+        ignore_conflicts=True
+    )
+
+
+@receiver(drivers_changed)
+def create_performance_rows(sender, changes, **kwargs):
+    """
+    Create the performance rows of new drivers.
+    """
+    created = [
+        change.driver_id for change in changes
+        if change.before is None and change.after is not None
+    ]
+    if created:
+        create_rows(created)
+
+
+def trip_driver_ids(trip_ids):
+    """
+    Return the drivers of ``trip_ids``.
+    """
+    return set(
+        Trip.objects.filter(pk__in=trip_ids)
+        .values_list('driver_id', flat=True)
+    )
+
+
+@receiver(pre_save, sender=Trip)
+def capture_previous_driver(sender, instance, raw, **kwargs):
+    """
+    Remember the driver a trip had before it is saved, so reassigning a trip
+    refreshes both drivers.
+    """
+    if raw or instance._state.adding:
+        instance._previous_driver_id = None
+        return
+    instance._previous_driver_id = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list('driver_id', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Trip)
+def refresh_trip_driver(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    driver_ids = {instance.driver_id, getattr(instance, '_previous_driver_id', None)}
+    driver_ids.discard(None)
+    refresh(driver_ids)
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_save, sender=Payment)
+def refresh_rated_or_paid_driver(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    refresh(trip_driver_ids([instance.trip_id]))
+
+
+class Deletion:
+    """
+    The trips and drivers removed by one delete.
+
+    A delete sends every ``pre_delete`` before removing any row, so by the
+    time ``post_delete`` is sent for a rating, payment or trip, every trip
+    and driver going with it is known.
+    """
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.trip_ids = set()
+        # Trips of each driver not deleted yet
+        self.remaining_trips = Counter()
+        self.driver_ids = set()
+
+
+_deletion = threading.local()
+
+
+def current_deletion(origin, start=False):
+    """
+    Return the Deletion started by ``origin`` in this thread, starting one
+    if ``start`` is true, else None.
+    """
+    deletion = getattr(_deletion, 'value', None)
+    if deletion is not None and deletion.origin is origin:
+        return deletion
+    if not start:
+        return None
+    _deletion.value = Deletion(origin)
+    return _deletion.value
+
+
+@receiver(pre_delete, sender=Trip)
+def capture_deleted_trip(sender, instance, origin=None, **kwargs):
+    deletion = current_deletion(origin, start=True)
+    deletion.trip_ids.add(instance.pk)
+    deletion.remaining_trips[instance.driver_id] += 1
+
+
+@receiver(pre_delete, sender=Driver)
+def capture_deleted_driver(sender, instance, origin=None, **kwargs):
+    current_deletion(origin, start=True).driver_ids.add(instance.pk)
+
+
+@receiver(post_delete, sender=Trip)
+def refresh_deleted_trip_driver(sender, instance, origin=None, **kwargs):
+    """
+    Refresh a deleted trip's driver once their last trip in the delete is
+    gone, unless the driver is deleted too.
+    """
+    deletion = current_deletion(origin)
+    if deletion is None:
+        refresh([instance.driver_id])
+        return
+    deletion.remaining_trips[instance.driver_id] -= 1
+    if deletion.remaining_trips[instance.driver_id] <= 0 and instance.driver_id not in deletion.driver_ids:
+        refresh([instance.driver_id])
+
+
+@receiver(post_delete, sender=Rating)
+@receiver(post_delete, sender=Payment)
+def refresh_unrated_or_unpaid_driver(sender, instance, origin=None, **kwargs):
+    """
+    Refresh the driver of a deleted rating or payment, unless its trip is
+    deleted too and will refresh them.
+    """
+    deletion = current_deletion(origin)
+    if deletion is not None and instance.trip_id in deletion.trip_ids:
+        return
+    refresh(trip_driver_ids([instance.trip_id]))
@@ -0,0 +1,50 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .models import Driver
+from .signals import DriverChange, drivers_changed
+
+
+@receiver(pre_save, sender=Driver)
+def capture_previous_values(sender, instance, raw, **kwargs):
+    """
+    Remember the stored values of a driver that is about to be saved.
+    """
+    if raw:
+        return
+    
+    previous = getattr(instance, '_loaded_values', None)
+    if previous is None and instance.pk is not None:
+        previous = (
+            sender.objects.filter(pk=instance.pk)
+            .values(*sender.TRACKED_FIELDS)
+            .first()
+        )
+    instance._previous_values = previous
+
+
+@receiver(post_save, sender=Driver)
+def announce_save(sender, instance, created, raw, **kwargs):
+    """
+    Send drivers_changed for a saved driver.
+    """
+    if raw:
+        return
+    
+    after = instance.tracked_values()
+    before = None if created else instance._previous_values
+    instance._loaded_values = after
+    drivers_changed.send(
+        sender=sender,
+        changes=[DriverChange(instance.pk, before, after)]
+    )
+
+
+@receiver(post_delete, sender=Driver)
+def announce_delete(sender, instance, **kwargs):
+    """
+    Send drivers_changed for a deleted driver.
+    """
+    drivers_changed.send(
+        sender=sender,
+        changes=[DriverChange(instance.pk, instance.tracked_values(), None)]
+    )
@@ -0,0 +1,114 @@
+"""
+Indexed substring search over driver names, phones and vehicle plates.
+
+Every whitespace-delimited word of a searchable field is stored lower-cased
+in ``DriverSearchToken`` together with all of its suffixes. A search term
+without whitespace occurs in a field exactly when it is a prefix of one of
+those tokens, which gives the same results as ``icontains`` while being
+answered from an index.
+"""
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.dispatch import receiver
+from .models import Driver, DriverSearchToken
+from .signals import drivers_changed
+
+
+SEARCH_FIELDS = ['name', 'phone', 'vehicle_plate']
+
+# Sorts after any character, used as the upper bound of prefix range scans
+MAX_CHARACTER = chr(0x10FFFF)
+
+
+def field_tokens(value):
+    """
+    Return the set of lower-cased word suffixes of a field value.
+    """
+    tokens = set()
+    for word in value.lower().split():
+        word = word[:DriverSearchToken._meta.get_field('token').max_length]
+        tokens.update(word[start:] for start in range(len(word)))
+    return tokens
+
+
+def driver_tokens(driver_id, values):
+    """
+    Build the DriverSearchToken rows for a driver's searchable values.
+    """
+    return [
+        DriverSearchToken(driver_id=driver_id, field=field, token=token)
+        for field in SEARCH_FIELDS
+        for token in field_tokens(values[field] or '')
+    ]
+
+
+@receiver(drivers_changed)
+def update_search_index(sender, changes, **kwargs):
+    """
+    Re-index drivers whose searchable fields changed.
+    """
+    stale = []
+    tokens = []
+    for change in changes:
+        if change.after is None:
+            # Tokens of deleted drivers are removed by the cascade
+            continue
+        if change.before is not None:
+            if all(change.before[field] == change.after[field] for field in SEARCH_FIELDS):
+                continue
+            stale.append(change.driver_id)
+        tokens.extend(driver_tokens(change.driver_id, change.after))
+    
+    if stale:
+        DriverSearchToken.objects.filter(driver_id__in=stale).delete()
+    if tokens:
+        DriverSearchToken.objects.bulk_create(tokens)
+
+
+def rebuild(batch_size=1000):
+    """
+    Rebuild the whole search index from the drivers table.
+    
+    Runs in one transaction, so searches never see a partial index.
+    """
+    with transaction.atomic():
+        DriverSearchToken.objects.all().delete()
+        tokens = []
+        drivers = Driver.objects.order_by().values('driver_id', *SEARCH_FIELDS)
+        for values in drivers.iterator(chunk_size=batch_size):
+            tokens.extend(driver_tokens(values['driver_id'], values))
+            if len(tokens) >= batch_size:
+                DriverSearchToken.objects.bulk_create(tokens)
+                tokens = []
+        DriverSearchToken.objects.bulk_create(tokens)
+
+
+def prefix_lookup(term):
+    """
+    Return filter kwargs selecting tokens that start with ``term``.
+    """
+    if connection.vendor == 'postgresql':
+        # Served by the varchar_pattern_ops index
+        return {'token__startswith': term}
+    # A range keeps the scan on the index where LIKE is case-insensitive
+    return {'token__gte': term, 'token__lt': term + MAX_CHARACTER}
+
+
+def search_drivers(queryset, terms):
+    """
+    Filter ``queryset`` to drivers matching every search term in any field.
+    """
+    for term in terms:
+        term = term.lower()
+        matches = DriverSearchToken.objects.filter(**prefix_lookup(term))
+        
+        if len(term) == Driver._meta.get_field('phone').max_length and term.isdigit():
+            # A full phone number is served by the unique phone index
+            matches = matches.exclude(field='phone')
+            queryset = queryset.filter(
+                Q(phone=term) | Q(driver_id__in=matches.values('driver_id'))
+            )
+        else:
+            queryset = queryset.filter(driver_id__in=matches.values('driver_id'))
+    return queryset
@@ -1,12 +1,75 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from .models import Driver
+from .instrumentation import span
+from .models import Driver, DriverPerformance
+from .vehicle_types import canonical_vehicle_type
 
 
-class DriverSerializer(serializers.ModelSerializer):
+class VehicleTypeField(serializers.ChoiceField):
+    """
+    Vehicle type choice that accepts any capitalization ("sedan") and stores
+    the canonical spelling ("Sedan").
+    """
+    
+    def __init__(self, **kwargs):
+        kwargs.setdefault('choices', Driver.VEHICLE_TYPE_CHOICES)
+        super().__init__(**kwargs)
+    
+    def to_internal_value(self, data):
+        return super().to_internal_value(canonical_vehicle_type(data) or data)
+
+
+class SparseFieldsMixin:
+    """
+    Drop every field not named in the ``fields`` keyword argument.
+    """
+    
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields).difference(fields):
+                self.fields.pop(name)
+
+
+class TimedDataMixin:
+    """
+    Count building ``data`` as serializer time in request instrumentation.
+    """
+    
+    @property
+    def data(self):
+        with span('serialize'):
+            return super().data
+
+
+class DriverPerformanceSerializer(serializers.ModelSerializer):
+    """
+    Serializer for a driver's precomputed performance aggregates.
+    """
+    
+    class Meta:
+        model = DriverPerformance
+        fields = [
+            'trip_count',
+            'completed_trip_count',
+            'cancelled_trip_count',
+            'completion_rate',
+            'rating_count',
+            'average_rating',
+            'total_earnings',
+            'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class DriverSerializer(TimedDataMixin, SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for Driver model with all fields.
     """
     
+    # Null for a driver without a performance row
+    performance = DriverPerformanceSerializer(read_only=True)
+    
     class Meta:
         model = Driver
         fields = [
@@ -16,10 +79,12 @@ class DriverSerializer(serializers.ModelSerializer):
             'vehicle_type',
             'vehicle_plate',
             'is_active',
+            'last_zone',
+            'performance',
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['driver_id', 'created_at', 'updated_at']
+        read_only_fields = ['driver_id', 'performance', 'created_at', 'updated_at']
     
     def validate_phone(self, value):
         """
@@ -60,8 +125,19 @@ class DriverListSerializer(serializers.ModelSerializer):
 class DriverCreateUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating and updating drivers.
+    
+    Uniqueness of phone and vehicle plate is enforced by the database's
+    unique constraints instead of a lookup per field; a violation is mapped
+    back to the same field errors.
     """
     
+    UNIQUE_FIELD_MESSAGES = {
+        'phone': "A driver with this phone number already exists",
+        'vehicle_plate': "A driver with this vehicle plate already exists",
+    }
+    
+    vehicle_type = VehicleTypeField()
+    
     class Meta:
         model = Driver
         fields = [
@@ -69,46 +145,67 @@ class DriverCreateUpdateSerializer(serializers.ModelSerializer):
             'phone',
             'vehicle_type',
             'vehicle_plate',
-            'is_active'
+            'is_active',
+            'last_zone'
         ]
+        # Format is checked below, uniqueness by the database on save
+        extra_kwargs = {
+            'phone': {'validators': []},
+            'vehicle_plate': {'validators': []},
+        }
     
     def validate_phone(self, value):
         """
-        Validate phone number format and uniqueness.
+        Validate phone number format.
         """
         if not value.isdigit():
             raise serializers.ValidationError("Phone number must contain only digits")
         if len(value) != 10:
             raise serializers.ValidationError("Phone number must be exactly 10 digits")
-        
-        # Check uniqueness during update
-        if self.instance:
-            if Driver.objects.exclude(pk=self.instance.pk).filter(phone=value).exists():
-                raise serializers.ValidationError("A driver with this phone number already exists")
-        else:
-            if Driver.objects.filter(phone=value).exists():
-                raise serializers.ValidationError("A driver with this phone number already exists")
-        
         return value
     
     def validate_vehicle_plate(self, value):
         """
-        Validate vehicle plate format and uniqueness.
+        Validate vehicle plate format.
         """
         if not value or len(value.strip()) == 0:
             raise serializers.ValidationError("Vehicle plate cannot be empty")
+        return value.strip().upper()
+    
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            self.raise_unique_errors(validated_data)
+            raise
+    
+    def update(self, instance, validated_data):
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            self.raise_unique_errors(validated_data)
+            raise
+    
+    def raise_unique_errors(self, validated_data):
+        """
+        Find which unique fields caused an IntegrityError and raise field errors.
         
-        value = value.strip().upper()
-        
-        # Check uniqueness during update
-        if self.instance:
-            if Driver.objects.exclude(pk=self.instance.pk).filter(vehicle_plate=value).exists():
-                raise serializers.ValidationError("A driver with this vehicle plate already exists")
-        else:
-            if Driver.objects.filter(vehicle_plate=value).exists():
-                raise serializers.ValidationError("A driver with this vehicle plate already exists")
+        Only runs after a failed write, so successful writes need no lookups.
+        """
+        drivers = Driver.objects.all()
+        if self.instance is not None:
+            drivers = drivers.exclude(pk=self.instance.pk)
         
-        return value
+        errors = {
+            field: [message]
+            for field, message in self.UNIQUE_FIELD_MESSAGES.items()
+            if field in validated_data
+            and drivers.filter(**{field: validated_data[field]}).exists()
+        }
+        if errors:
+            raise serializers.ValidationError(errors)
 
 
 class DriverStatusSerializer(serializers.ModelSerializer):
@@ -120,3 +217,56 @@ class DriverStatusSerializer(serializers.ModelSerializer):
         model = Driver
         fields = ['is_active']
 
+
+class DriverBulkStatusFilterSerializer(serializers.Serializer):
+    """
+    Criteria selecting the drivers of a bulk status change.
+    """
+    
+    vehicle_type = VehicleTypeField(required=False)
+    is_active = serializers.BooleanField(required=False)
+    last_zone = serializers.CharField(required=False)
+    
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("At least one filter criterion is required")
+        return attrs
+
+
+class DriverBulkStatusSerializer(serializers.Serializer):
+    """
+    Serializer for changing the status of many drivers at once.
+    """
+    
+    MAX_DRIVER_IDS = 50000
+    
+    driver_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=MAX_DRIVER_IDS
+    )
+    filter = DriverBulkStatusFilterSerializer(required=False)
+    is_active = serializers.BooleanField()
+    
+    def validate(self, attrs):
+        """
+        Require exactly one of driver_ids and filter.
+        """
+        if ('driver_ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Provide either driver_ids or filter")
+        return attrs
+
+
+class DriverStatusBatchSerializer(serializers.Serializer):
+    """
+    Serializer for looking up the status of many drivers at once.
+    """
+    
+    MAX_DRIVER_IDS = 5000
+    
+    driver_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_DRIVER_IDS
+    )
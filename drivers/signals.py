@@ -0,0 +1,11 @@
+from collections import namedtuple
+from django.dispatch import Signal
+
+
+# A single driver write. ``before`` and ``after`` map Driver.TRACKED_FIELDS
+# to their values, and are None for creations and deletions respectively.
+DriverChange = namedtuple('DriverChange', ['driver_id', 'before', 'after'])
+
+# Sent with ``changes`` (a list of DriverChange) after any driver write,
+# including queryset updates and bulk loads that bypass Model.save().
+drivers_changed = Signal()
@@ -1,8 +1,54 @@
-from django.test import TestCase
+import asyncio
+import base64
+import json
+import os
+import tempfile
+import threading
+import time
+import warnings
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.module_loading import import_string
 from django.urls import reverse
+import numpy
 from rest_framework.test import APITestCase
 from rest_framework import status
-from .models import Driver
+from rest_framework.renderers import JSONRenderer
+from rest_framework.throttling import AnonRateThrottle
+from rest_framework.versioning import QueryParameterVersioning
+from . import counters, export
+from .analytics import MAX_WINDOW_HOURS, build_lock, trip_analytics
+from .availability import AvailableDriverIndex, available_drivers
+from .cache import driver_cache
+from .events import OVERFLOW, driver_events, iter_sse
+from .health import readiness
+from .instrumentation import request_latency
+from .models import (
+    Driver,
+    DriverPerformance,
+    DriverSearchToken,
+    DriverStatsCounter,
+    DriverTombstone,
+    Payment,
+    Rating,
+    Trip,
+)
+from .renderers import ORJSONRenderer
+from .serializers import DriverListSerializer, DriverSerializer
+from .signals import DriverChange, drivers_changed
+from .views import DriverViewSet
 
 
 class DriverModelTests(TestCase):
@@ -150,3 +196,2175 @@ class DriverAPITests(APITestCase):
         self.assertEqual(response.data['active_drivers'], 1)
         self.assertEqual(response.data['inactive_drivers'], 1)
 
+
+class LoadDriversCommandTests(TestCase):
+    """
+    Test cases for the load_drivers management command.
+    """
+    
+    CSV_HEADER = 'driver_id,name,phone,vehicle_type,vehicle_plate,is_active\n'
+    
+    def setUp(self):
+        Driver.objects.create(
+            driver_id=1,
+            name='Existing Driver',
+            phone='9000000001',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AA0001',
+            is_active=False
+        )
+    
+    def write_csv(self, lines):
+        handle = tempfile.NamedTemporaryFile(
+            'w', suffix='.csv', delete=False, encoding='utf-8'
+        )
+        handle.write(self.CSV_HEADER + ''.join(lines))
+        handle.close()
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+    
+    def run_command(self, *args):
+        out = StringIO()
+        call_command('load_drivers', *args, stdout=out)
+        return out.getvalue()
+    
+    def test_serial_load(self):
+        """Test loading drivers one row at a time"""
+        path = self.write_csv([
+            '1,Driver1,9000000001,Bike,KA01AA0001,True\n',
+            '2,Driver2,9000000002,SUV,KA01AA0002,False\n',
+        ])
+        output = self.run_command(path)
+        self.assertIn('Created: 1', output)
+        self.assertIn('Updated: 1', output)
+        self.assertIn('rows/sec', output)
+        self.assertTrue(Driver.objects.get(pk=1).is_active)
+    
+    def test_batched_load(self):
+        """Test loading drivers in bulk chunks"""
+        path = self.write_csv([
+            '1,Driver1,9000000001,Bike,KA01AA0001,True\n',
+            '2,Driver2,9000000002,SUV,KA01AA0002,False\n',
+            '3,Driver3,9000000003,Auto,KA01AA0003,yes\n',
+        ])
+        output = self.run_command(path, '--batch-size', '2')
+        self.assertIn('Created: 2', output)
+        self.assertIn('Updated: 1', output)
+        self.assertEqual(Driver.objects.count(), 3)
+        driver = Driver.objects.get(pk=1)
+        self.assertEqual(driver.vehicle_type, 'Bike')
+        self.assertTrue(driver.is_active)
+        self.assertTrue(Driver.objects.get(pk=3).is_active)
+        self.assertEqual(counters.rebuild(), {})
+    
+    def test_batched_load_keeps_zones(self):
+        """Test that reloading a driver in bulk keeps their zone in the row and in the change"""
+        Driver.objects.filter(pk=1).update(is_active=True, last_zone='HSR')
+        available_drivers.clear()
+        self.addCleanup(available_drivers.clear)
+        self.assertEqual(available_drivers.candidates('HSR'), [(1, 'Sedan')])
+        changes = []
+        
+        def capture(sender, **kwargs):
+            changes.extend(kwargs['changes'])
+        
+        drivers_changed.connect(capture)
+        self.addCleanup(drivers_changed.disconnect, capture)
+        path = self.write_csv(['1,Renamed,9000000001,Sedan,KA01AA0001,True\n'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_command(path, '--batch-size', '10')
+        
+        self.assertEqual(Driver.objects.get(pk=1).last_zone, 'HSR')
+        self.assertEqual([change.after['last_zone'] for change in changes], ['HSR'])
+        self.assertEqual(available_drivers.candidates('HSR'), [(1, 'Sedan')])
+    
+    def test_batched_load_reports_row_errors(self):
+        """Test that bad rows in a batch are reported and the rest are loaded"""
+        path = self.write_csv([
+            'x,Bad Id,9000000004,Bike,KA01AA0004,True\n',
+            '5,Duplicate Phone,9000000001,Bike,KA01AA0005,True\n',
+            '6,Driver6,9000000006,Sedan,KA01AA0006,True\n',
+        ])
+        output = self.run_command(path, '--batch-size', '10')
+        self.assertIn('Error processing row 2', output)
+        self.assertIn('Error processing row 3', output)
+        self.assertIn('Created: 1', output)
+        self.assertIn('Errors: 2', output)
+        self.assertTrue(Driver.objects.filter(pk=6).exists())
+        self.assertFalse(Driver.objects.filter(pk=5).exists())
+    
+    def test_vehicle_types_canonicalized(self):
+        """Test that vehicle types are stored in their canonical spelling"""
+        path = self.write_csv([
+            '2,Driver2,9000000002,suv,KA01AA0002,True\n',
+            '3,Driver3,9000000003,Rickshaw,KA01AA0003,True\n',
+        ])
+        output = self.run_command(path, '--batch-size', '10')
+        self.assertIn('Vehicle type must be one of', output)
+        self.assertEqual(Driver.objects.get(pk=2).vehicle_type, 'SUV')
+        self.assertFalse(Driver.objects.filter(pk=3).exists())
+    
+    def test_parallel_load_matches_serial_summary(self):
+        """Test that the worker pool reports the same summary as the serial path"""
+        path = self.write_csv([
+            '1,Driver1,9000000001,Bike,ka01aa0001,True\n',
+            '2,Driver2,98765,SUV,KA01AA0002,False\n',
+            '3,Driver3,9000000003,Auto,KA01AA0003,yes\n',
+        ])
+        output = self.run_command(path, '--workers', '2', '--batch-size', '2')
+        self.assertIn('Error processing row 3', output)
+        self.assertIn('Created: 1', output)
+        self.assertIn('Updated: 1', output)
+        self.assertIn('Errors: 1', output)
+        self.assertEqual(Driver.objects.get(pk=1).vehicle_plate, 'KA01AA0001')
+
+
+class DriverCursorPaginationTests(APITestCase):
+    """
+    Test cases for the opt-in cursor pagination mode.
+    """
+    
+    def setUp(self):
+        for i in range(15):
+            Driver.objects.create(
+                name=f'Driver {i}',
+                phone=f'98765432{i:02d}',
+                vehicle_type='Sedan' if i % 2 else 'SUV',
+                vehicle_plate=f'KA01AB12{i:02d}',
+                is_active=i % 3 != 0
+            )
+    
+    def test_default_pagination_unchanged(self):
+        """Test that page-number pagination is still the default"""
+        response = self.client.get(reverse('driver-list'))
+        self.assertEqual(response.data['count'], 15)
+    
+    def test_cursor_pages_cover_all_drivers(self):
+        """Test walking every cursor page in -driver_id order"""
+        url = reverse('driver-list')
+        response = self.client.get(url, {'pagination': 'cursor'})
+        self.assertNotIn('count', response.data)
+        ids = [row['driver_id'] for row in response.data['results']]
+        
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids += [row['driver_id'] for row in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        
+        expected = list(Driver.objects.order_by('-driver_id').values_list('driver_id', flat=True))
+        self.assertEqual(ids, expected)
+    
+    def test_cursor_pages_run_one_query(self):
+        """Test that cursor pages issue neither a count nor a version query"""
+        for url, params in [
+            (reverse('driver-list'), {'pagination': 'cursor'}),
+            (reverse('driver-active'), {'pagination': 'cursor', 'vehicle_type': 'Sedan'}),
+            (reverse('driver-list'), {'pagination': 'cursor', 'search': 'driver'}),
+        ]:
+            with self.subTest(url=url, params=params):
+                with self.assertNumQueries(1):
+                    response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertNotIn('ETag', response)
+    
+    @override_settings(DRIVER_CHANGES_SETTLE_SECONDS=0)
+    def test_page_number_version_is_not_filtered(self):
+        """Test that page-number lists version from indexes, not the filtered rows"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('driver-list'), {'search': 'driver'})
+        self.assertIn('ETag', response)
+        versions = [query['sql'] for query in queries.captured_queries if 'MAX(' in query['sql']]
+        self.assertEqual(len(versions), 2)
+        for sql in versions:
+            self.assertNotIn('WHERE', sql)
+    
+    def test_cursor_pagination_with_filters(self):
+        """Test cursor mode on the active endpoint combined with filters"""
+        url = reverse('driver-active')
+        response = self.client.get(url, {'pagination': 'cursor', 'vehicle_type': 'Sedan'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = Driver.objects.filter(is_active=True, vehicle_type='Sedan').count()
+        self.assertEqual(len(response.data['results']), expected)
+        self.assertIsNone(response.data['next'])
+
+
+class DriverStatsCounterTests(APITestCase):
+    """
+    Test cases for the incrementally maintained driver statistics.
+    """
+    
+    def setUp(self):
+        self.driver = Driver.objects.create(
+            name='Driver One',
+            phone='9876543210',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AB1234',
+            is_active=True
+        )
+        Driver.objects.create(
+            name='Driver Two',
+            phone='9876543211',
+            vehicle_type='SUV',
+            vehicle_plate='KA01AB1235',
+            is_active=False
+        )
+    
+    def assertStatsMatchTable(self):
+        response = self.client.get(reverse('driver-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_drivers'], Driver.objects.count())
+        self.assertEqual(
+            response.data['active_drivers'],
+            Driver.objects.filter(is_active=True).count()
+        )
+        self.assertEqual(counters.rebuild(), {})
+        return response.data
+    
+    def test_stats_without_table_scan(self):
+        """Test that stats are answered from the counters table only"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('driver-stats'))
+        self.assertEqual(len(queries), 1)
+        self.assertIn('driver_stats_counters', queries[0]['sql'])
+    
+    def test_stats_follow_api_writes(self):
+        """Test that create, update, status changes and delete adjust the counters"""
+        self.client.post(reverse('driver-list'), {
+            'name': 'New Driver',
+            'phone': '9876543212',
+            'vehicle_type': 'Bike',
+            'vehicle_plate': 'KA01AB1236',
+            'is_active': True
+        }, format='json')
+        self.client.patch(
+            reverse('driver-detail', kwargs={'pk': self.driver.driver_id}),
+            {'vehicle_type': 'Auto'},
+            format='json'
+        )
+        self.client.post(reverse('driver-toggle-status', kwargs={'pk': self.driver.driver_id}))
+        self.client.delete(reverse('driver-detail', kwargs={'pk': self.driver.driver_id}))
+        
+        data = self.assertStatsMatchTable()
+        self.assertEqual(data['vehicle_type_distribution'], {'Bike': 1, 'SUV': 1})
+        self.assertEqual(data['active_vehicle_type_distribution'], {'Bike': 1})
+    
+    def test_set_active_adjusts_counters(self):
+        """Test that queryset status updates, as used by the admin, adjust the counters"""
+        self.assertEqual(len(Driver.objects.all().set_active(True)), 1)
+        data = self.assertStatsMatchTable()
+        self.assertEqual(data['active_drivers'], 2)
+    
+    @mock.patch('drivers.counters.random.randrange', return_value=0)
+    def test_counters_updated_in_key_order(self, randrange):
+        """Test that opposite status flips lock the counter rows in the same order"""
+        orders = []
+        for is_active in [False, True]:
+            with CaptureQueriesContext(connection) as queries:
+                Driver.objects.update_status([self.driver.driver_id], is_active)
+            # First updates of a shard are retried once its row is created
+            orders.append(list(dict.fromkeys(
+                query['sql'].split('WHERE')[1] for query in queries
+                if query['sql'].startswith('UPDATE "driver_stats_counters"')
+            )))
+        self.assertEqual(len(orders[0]), 2)
+        self.assertEqual(orders[0], orders[1])
+    
+    def test_sharded_counters(self):
+        """Test that counts spread over shards add up and cancel out"""
+        for shard in range(3):
+            with mock.patch('drivers.counters.random.randrange', return_value=shard):
+                Driver.objects.update_status([self.driver.driver_id])
+        self.assertGreater(DriverStatsCounter.objects.filter(vehicle_type='Sedan').count(), 2)
+        data = self.assertStatsMatchTable()
+        self.assertEqual(data['active_vehicle_type_distribution'], {})
+    
+        with mock.patch('drivers.counters.random.randrange', return_value=1):
+            Driver.objects.update_status([self.driver.driver_id])
+        data = self.assertStatsMatchTable()
+        self.assertEqual(data['active_vehicle_type_distribution'], {'Sedan': 1})
+    
+    def test_reconcile_command_reports_drift(self):
+        """Test that the reconcile command repairs and reports drifted counters"""
+        DriverStatsCounter.objects.filter(vehicle_type='Sedan').update(count=5)
+        out = StringIO()
+        call_command('reconcile_driver_stats', stdout=out)
+        self.assertIn('Sedan (active): stored count off by +4', out.getvalue())
+        self.assertEqual(counters.get_stats()['total_drivers'], 2)
+
+
+class DriverSearchIndexTests(APITestCase):
+    """
+    Test cases for the indexed driver search.
+    """
+    
+    def setUp(self):
+        self.driver1 = Driver.objects.create(
+            name='Ravi Kumar',
+            phone='9876543210',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AB1234',
+            is_active=True
+        )
+        self.driver2 = Driver.objects.create(
+            name='Anita Rao',
+            phone='9123456789',
+            vehicle_type='SUV',
+            vehicle_plate='MH12XY9876',
+            is_active=False
+        )
+    
+    def search(self, **params):
+        response = self.client.get(reverse('driver-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(row['driver_id'] for row in response.data['results'])
+    
+    def test_search_matches_icontains(self):
+        """Test that indexed search returns the same drivers as icontains"""
+        for term in ['ravi', 'UMA', 'ao', '98765', '9876543210', 'xy98', 'a', '12', 'zzz']:
+            expected = sorted(
+                Driver.objects.filter(
+                    Q(name__icontains=term)
+                    | Q(phone__icontains=term)
+                    | Q(vehicle_plate__icontains=term)
+                ).values_list('driver_id', flat=True)
+            )
+            self.assertEqual(self.search(search=term), expected, term)
+    
+    def test_search_terms_are_combined(self):
+        """Test that every search term must match and q is accepted as an alias"""
+        self.assertEqual(self.search(q='anita mh12'), [self.driver2.driver_id])
+        self.assertEqual(self.search(q='anita ka01'), [])
+    
+    def test_search_index_follows_updates(self):
+        """Test that renamed and deleted drivers are re-indexed"""
+        self.driver1.name = 'Suresh Babu'
+        self.driver1.save()
+        self.assertEqual(self.search(q='ravi'), [])
+        self.assertEqual(self.search(q='babu'), [self.driver1.driver_id])
+        
+        self.driver2.delete()
+        self.assertEqual(self.search(q='anita'), [])
+        self.assertFalse(DriverSearchToken.objects.filter(driver_id=self.driver2.driver_id).exists())
+    
+    def test_search_uses_token_index(self):
+        """Test that search goes through the token table rather than LIKE scans"""
+        with CaptureQueriesContext(connection) as queries:
+            self.search(q='kumar')
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertIn('driver_search_tokens', sql)
+        self.assertNotIn('LIKE', sql)
+
+
+class AvailableDriverTests(APITestCase):
+    """
+    Test cases for the zone-aware available driver index.
+    """
+    
+    def setUp(self):
+        available_drivers.clear()
+        self.addCleanup(available_drivers.clear)
+        self.sedan = Driver.objects.create(
+            name='Sedan Driver',
+            phone='9876543210',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AB1234',
+            last_zone='HSR',
+            is_active=True
+        )
+        self.suv = Driver.objects.create(
+            name='SUV Driver',
+            phone='9876543211',
+            vehicle_type='SUV',
+            vehicle_plate='KA01AB1235',
+            last_zone='HSR',
+            is_active=True
+        )
+        self.inactive = Driver.objects.create(
+            name='Inactive Driver',
+            phone='9876543212',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AB1236',
+            last_zone='HSR',
+            is_active=False
+        )
+    
+    def available(self, **params):
+        response = self.client.get(reverse('driver-available'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['driver_id'] for row in response.data['results']]
+    
+    def test_available_drivers_by_zone_and_vehicle_type(self):
+        """Test that only active drivers in the zone are offered"""
+        self.assertEqual(self.available(zone='hsr'), [self.sedan.driver_id, self.suv.driver_id])
+        self.assertEqual(self.available(zone='HSR', vehicle_type='Sedan'), [self.sedan.driver_id])
+        self.assertEqual(self.available(zone='HSR', limit=1), [self.sedan.driver_id])
+        self.assertEqual(self.available(zone='BTM'), [])
+    
+    def test_stale_index_reloaded_in_background(self):
+        """Test that a stale index is served while it is reloaded outside the lookup"""
+        index = AvailableDriverIndex(refresh_seconds=0)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(index.candidates('HSR')), 2)
+        with mock.patch.object(index, 'start_reload') as start_reload:
+            with self.assertNumQueries(0):
+                self.assertEqual(len(index.candidates('HSR')), 2)
+        start_reload.assert_called_once_with()
+    
+    def test_changes_during_load_are_kept(self):
+        """Test that changes applied while the table is read survive the reload"""
+        index = AvailableDriverIndex()
+        index.load()
+        rows = index.rows
+        deactivated = {**self.sedan.tracked_values(), 'is_active': False}
+        
+        def read():
+            # Read before the deactivation, which is applied mid-load
+            read_rows = list(rows())
+            index.apply([DriverChange(self.sedan.driver_id, self.sedan.tracked_values(), deactivated)])
+            return read_rows
+        
+        with mock.patch.object(index, 'rows', side_effect=read):
+            index.load()
+        self.assertEqual(index.candidates('HSR'), [(self.suv.driver_id, 'SUV')])
+    
+    def test_available_requires_zone_and_valid_limit(self):
+        """Test parameter validation"""
+        url = reverse('driver-available')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'zone': 'HSR', 'limit': 'many'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_index_follows_status_changes(self):
+        """Test that committed status changes update the index without a reload"""
+        self.available(zone='HSR')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('driver-deactivate', kwargs={'pk': self.sedan.driver_id}))
+            self.client.post(reverse('driver-activate', kwargs={'pk': self.inactive.driver_id}))
+        with self.assertNumQueries(0):
+            ids = self.available(zone='HSR', vehicle_type='Sedan')
+        self.assertEqual(ids, [self.inactive.driver_id])
+    
+    def test_load_driver_zones_command(self):
+        """Test setting last known zones from trip history"""
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8')
+        handle.write(
+            'trip_id,rider_id,driver_id,pickup_zone,drop_zone,status,requested_at\n'
+            f'1,1,{self.sedan.driver_id},HSR,BTM,COMPLETED,2025-01-02 10:00:00\n'
+            f'2,1,{self.sedan.driver_id},JP Nagar,HSR,COMPLETED,2025-01-01 10:00:00\n'
+            f'3,1,{self.suv.driver_id},Whitefield,BTM,ONGOING,2025-01-03 10:00:00\n'
+        )
+        handle.close()
+        self.addCleanup(os.remove, handle.name)
+        
+        call_command('load_driver_zones', handle.name, stdout=StringIO())
+        self.assertEqual(Driver.objects.get(pk=self.sedan.driver_id).last_zone, 'BTM')
+        self.assertEqual(Driver.objects.get(pk=self.suv.driver_id).last_zone, 'Whitefield')
+
+
+class DriverStatusUpdateTests(APITestCase):
+    """
+    Test cases for the single-statement status write path.
+    """
+    
+    def setUp(self):
+        self.driver = Driver.objects.create(
+            name='Driver One',
+            phone='9876543210',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AB1234',
+            is_active=True
+        )
+    
+    def test_toggle_is_a_single_update(self):
+        """Test that a toggle issues one UPDATE ... RETURNING and no SELECT"""
+        url = reverse('driver-toggle-status', kwargs={'pk': self.driver.driver_id})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['is_active'])
+        self.assertEqual(response.data['name'], 'Driver One')
+        
+        statements = [
+            query['sql'] for query in queries
+            if query['sql'].startswith(('SELECT', 'UPDATE', 'INSERT', 'DELETE'))
+            and 'driver_stats_counters' not in query['sql']
+        ]
+        self.assertEqual(len(statements), 1)
+        self.assertIn('RETURNING', statements[0])
+        self.assertIn('"updated_at"', statements[0].split('WHERE')[0])
+        self.assertNotIn('"name"', statements[0].split('WHERE')[0])
+    
+    def test_toggle_twice_restores_status(self):
+        """Test that toggling twice flips the stored status twice"""
+        Driver.objects.update_status([self.driver.driver_id])
+        Driver.objects.update_status([self.driver.driver_id])
+        self.driver.refresh_from_db()
+        self.assertTrue(self.driver.is_active)
+    
+    def test_status_update_without_returning_support(self):
+        """Test the locked fallback used by databases without UPDATE ... RETURNING"""
+        with mock.patch('drivers.models.supports_update_returning', return_value=False):
+            changed = Driver.objects.update_status([self.driver.driver_id])
+            self.assertEqual([driver.is_active for driver in changed], [False])
+            self.assertEqual(Driver.objects.update_status([self.driver.driver_id], False), [])
+        self.assertEqual(counters.rebuild(), {})
+    
+    def test_activate_is_conditional(self):
+        """Test that activating an active driver writes nothing"""
+        updated_at = self.driver.updated_at
+        response = self.client.post(reverse('driver-activate', kwargs={'pk': self.driver.driver_id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_active'])
+        self.driver.refresh_from_db()
+        self.assertEqual(self.driver.updated_at, updated_at)
+        
+        response = self.client.post(reverse('driver-deactivate', kwargs={'pk': self.driver.driver_id}))
+        self.assertFalse(response.data['is_active'])
+        self.assertEqual(counters.get_stats()['inactive_drivers'], 1)
+    
+    def test_status_change_for_missing_driver(self):
+        """Test that status changes on unknown drivers return 404"""
+        response = self.client.post(reverse('driver-toggle-status', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class DriverStatusRaceTests(TransactionTestCase):
+    """
+    Test cases for status writes racing from separate connections.
+    """
+    
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('In-memory SQLite databases refuse concurrent writes')
+    
+    def test_concurrent_toggles_do_not_lose_updates(self):
+        """Test that toggles racing from several threads are all applied"""
+        driver = Driver.objects.create(
+            name='Driver One',
+            phone='9876543210',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AB1234',
+            is_active=True
+        )
+        toggles = 8
+        barrier = threading.Barrier(toggles)
+        errors = []
+        
+        def toggle():
+            try:
+                barrier.wait()
+                Driver.objects.update_status([driver.driver_id])
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+        
+        threads = [threading.Thread(target=toggle) for _ in range(toggles)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(errors, [])
+        driver.refresh_from_db()
+        self.assertTrue(driver.is_active)
+        self.assertEqual(counters.rebuild(), {})
+
+
+class DriverBulkStatusTests(APITestCase):
+    """
+    Test cases for the bulk status change endpoint.
+    """
+    
+    def setUp(self):
+        self.drivers = [
+            Driver.objects.create(
+                name=f'Driver {i}',
+                phone=f'98765432{i:02d}',
+                vehicle_type='Sedan' if i < 3 else 'SUV',
+                vehicle_plate=f'KA01AB12{i:02d}',
+                last_zone='HSR' if i % 2 else 'BTM',
+                is_active=i != 0
+            )
+            for i in range(5)
+        ]
+        self.url = reverse('driver-bulk-status')
+    
+    def test_bulk_status_by_ids(self):
+        """Test per-ID results when deactivating a list of drivers"""
+        ids = [driver.driver_id for driver in self.drivers[:3]]
+        with mock.patch.object(DriverViewSet, 'bulk_status_chunk_size', 2):
+            response = self.client.post(
+                self.url,
+                {'driver_ids': ids + [999], 'is_active': False},
+                format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results']['updated'], ids[1:])
+        self.assertEqual(response.data['results']['unchanged'], ids[:1])
+        self.assertEqual(response.data['results']['not_found'], [999])
+        self.assertEqual(Driver.objects.filter(is_active=False).count(), 3)
+        self.assertEqual(counters.rebuild(), {})
+    
+    def test_bulk_status_by_filter(self):
+        """Test deactivating every driver in a zone"""
+        response = self.client.post(
+            self.url,
+            {'filter': {'last_zone': 'HSR'}, 'is_active': False},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['counts']['updated'], 2)
+        self.assertFalse(Driver.objects.filter(last_zone='HSR', is_active=True).exists())
+    
+    def test_bulk_status_validation(self):
+        """Test that exactly one selector and a non-empty filter are required"""
+        for data in [
+            {'is_active': False},
+            {'driver_ids': [1], 'filter': {'last_zone': 'HSR'}, 'is_active': False},
+            {'filter': {}, 'is_active': False},
+            {'driver_ids': [1]},
+        ]:
+            response = self.client.post(self.url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, data)
+
+
+class DriverStatusBatchTests(APITestCase):
+    """
+    Test cases for the batched driver status lookup.
+    """
+    
+    def setUp(self):
+        self.drivers = [
+            Driver.objects.create(
+                name=f'Driver {i}',
+                phone=f'98765432{i:02d}',
+                vehicle_type='Sedan',
+                vehicle_plate=f'KA01AB12{i:02d}',
+                is_active=i % 2 == 0
+            )
+            for i in range(3)
+        ]
+        self.url = reverse('driver-status-batch')
+    
+    def test_status_batch_get(self):
+        """Test looking up several drivers with one query"""
+        ids = [driver.driver_id for driver in self.drivers]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'ids': ','.join(map(str, ids + [999]))})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(set(response.data['drivers']), {str(driver_id) for driver_id in ids})
+        self.assertTrue(response.data['drivers'][str(ids[0])]['is_active'])
+        self.assertFalse(response.data['drivers'][str(ids[1])]['is_active'])
+        self.assertEqual(response.data['missing'], [999])
+    
+    def test_status_batch_post(self):
+        """Test looking up drivers with a JSON body"""
+        response = self.client.post(
+            self.url,
+            {'driver_ids': [self.drivers[0].driver_id]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['missing'], [])
+    
+    def test_status_batch_validation(self):
+        """Test that IDs must be integers and bounded in number"""
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'ids': '1,abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {'driver_ids': list(range(1, 5002))}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DriverWriteQueryTests(APITestCase):
+    """
+    Test cases pinning the queries issued by create, update, status changes
+    and delete, including the work done once they commit.
+    """
+    
+    def setUp(self):
+        # One counter shard per key, so no write has to create its row
+        patcher = mock.patch.object(counters.random, 'randrange', return_value=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        DriverStatsCounter.objects.create(vehicle_type='Sedan', is_active=False, shard=0)
+        self.driver = Driver.objects.create(
+            name='Driver One',
+            phone='9876543210',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AB1234',
+            is_active=True
+        )
+        self.data = {
+            'name': 'Driver Two',
+            'phone': '9876543211',
+            'vehicle_type': 'Sedan',
+            'vehicle_plate': 'ka01ab1235',
+            'is_active': True
+        }
+    
+    def driver_table_queries(self, queries):
+        """Return the captured statements reading or writing the drivers table"""
+        return [
+            query['sql'] for query in queries
+            if any(
+                marker in query['sql']
+                for marker in ['FROM "drivers"', 'INTO "drivers"', 'UPDATE "drivers"']
+            )
+        ]
+    
+    def test_create_issues_a_single_insert(self):
+        """Test that create runs one INSERT and no uniqueness or re-fetch queries"""
+        # Savepoint, driver, counter, performance row, search tokens, release
+        with self.assertNumQueries(6) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('driver-list'), self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['vehicle_plate'], 'KA01AB1235')
+        self.assertIsNotNone(response.data['created_at'])
+        statements = self.driver_table_queries(queries)
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith('INSERT'))
+    
+    def test_update_issues_one_select_and_one_update(self):
+        """Test that update loads the row once and does not re-fetch it"""
+        url = reverse('driver-detail', kwargs={'pk': self.driver.driver_id})
+        # Load, savepoint, update, search token swap, release
+        with self.assertNumQueries(6) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url, {'name': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'Renamed')
+        statements = self.driver_table_queries(queries)
+        self.assertEqual([sql.split()[0] for sql in statements], ['SELECT', 'UPDATE'])
+    
+    def test_status_change_queries(self):
+        """Test that a status change is one UPDATE plus a counter update per key"""
+        url = reverse('driver-deactivate', kwargs={'pk': self.driver.driver_id})
+        with self.assertNumQueries(5) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statements = self.driver_table_queries(queries)
+        self.assertEqual([sql.split()[0] for sql in statements], ['UPDATE'])
+    
+    def test_delete_queries(self):
+        """Test that delete collects the driver and its trips once"""
+        url = reverse('driver-detail', kwargs={'pk': self.driver.driver_id})
+        # Load, trips, two cascades, delete, counter, tombstone
+        with self.assertNumQueries(7), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+    
+    def test_duplicate_values_map_to_field_errors(self):
+        """Test that unique constraint violations become field validation errors"""
+        self.data.update(phone='9876543210', vehicle_plate='KA01AB1234')
+        response = self.client.post(reverse('driver-list'), self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data['phone'],
+            ['A driver with this phone number already exists']
+        )
+        self.assertEqual(
+            response.data['vehicle_plate'],
+            ['A driver with this vehicle plate already exists']
+        )
+        self.assertEqual(Driver.objects.count(), 1)
+        self.assertEqual(counters.get_stats()['total_drivers'], 1)
+    
+    def test_update_to_duplicate_value(self):
+        """Test that updating to another driver's phone is rejected"""
+        other = Driver.objects.create(
+            name='Other',
+            phone='9876543219',
+            vehicle_type='SUV',
+            vehicle_plate='KA01AB1239'
+        )
+        url = reverse('driver-detail', kwargs={'pk': other.driver_id})
+        response = self.client.patch(url, {'phone': '9876543210'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('phone', response.data)
+        response = self.client.patch(url, {'phone': '9876543219', 'name': 'Same Phone'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class DriverExportTests(APITestCase):
+    """
+    Test cases for the streaming driver export.
+    """
+    
+    def setUp(self):
+        for i in range(3):
+            Driver.objects.create(
+                name=f'Driver {i}',
+                phone=f'98765432{i:02d}',
+                vehicle_type='Sedan' if i else 'SUV',
+                vehicle_plate=f'KA01AB12{i:02d}',
+                is_active=True
+            )
+    
+    def export(self, **params):
+        response = self.client.get(reverse('driver-export'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b''.join(response.streaming_content).decode()
+    
+    def test_ndjson_export_matches_serializer(self):
+        """Test that NDJSON rows carry the same values as DriverSerializer"""
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        expected = json.loads(json.dumps(
+            DriverSerializer(
+                Driver.objects.order_by('-driver_id'),
+                many=True,
+                fields=export.EXPORT_FIELDS
+            ).data
+        ))
+        self.assertEqual(rows, expected)
+    
+    def test_csv_export_applies_filters(self):
+        """Test CSV output with filter and search parameters"""
+        response, body = self.export(format='csv', vehicle_type='Sedan', search='Driver')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = body.splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['driver_id', 'name'])
+        self.assertEqual(len(lines), 3)
+    
+    def test_export_rejects_unknown_format(self):
+        """Test that unsupported formats are rejected"""
+        response = self.client.get(reverse('driver-export'), {'format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DriverListFastPathTests(APITestCase):
+    """
+    Test cases for the serializer-free list path and the orjson renderer.
+    """
+    
+    def setUp(self):
+        names = ['Ravi Kumar', 'Zoë   Line', 'Driver "Quoted"']
+        for i, name in enumerate(names):
+            Driver.objects.create(
+                name=name,
+                phone=f'98765432{i:02d}',
+                vehicle_type='Sedan',
+                vehicle_plate=f'KA01AB12{i:02d}',
+                is_active=i != 1
+            )
+    
+    def test_list_output_is_byte_compatible(self):
+        """Test that list responses match DriverListSerializer + JSONRenderer byte for byte"""
+        response = self.client.get(reverse('driver-list'), HTTP_ACCEPT='application/json')
+        drivers = Driver.objects.order_by('-driver_id')
+        expected = JSONRenderer().render({
+            'count': 3,
+            'next': None,
+            'previous': None,
+            'results': DriverListSerializer(drivers, many=True).data,
+        })
+        self.assertEqual(response.content, expected)
+    
+    def test_active_output_is_byte_compatible(self):
+        """Test the active endpoint against the serializer output"""
+        response = self.client.get(reverse('driver-active'), HTTP_ACCEPT='application/json')
+        drivers = Driver.objects.filter(is_active=True).order_by('-driver_id')
+        expected = JSONRenderer().render(DriverListSerializer(drivers, many=True).data)
+        self.assertIn(expected[1:-1], response.content)
+    
+    def test_orjson_renderer_matches_json_renderer(self):
+        """Test that ORJSONRenderer reproduces JSONRenderer for serializer output"""
+        data = DriverSerializer(Driver.objects.all(), many=True).data
+        extra = {'when': timezone.now(), 'naive': datetime(2025, 1, 1, 10, 30), 1: 'int key'}
+        for value in [data, extra, {'line': ' '}]:
+            self.assertEqual(ORJSONRenderer().render(value), JSONRenderer().render(value))
+
+
+class DriverSparseFieldsTests(APITestCase):
+    """
+    Test cases for ?fields= sparse fieldsets and MessagePack responses.
+    """
+    
+    def setUp(self):
+        self.driver = Driver.objects.create(
+            name='Ravi Kumar',
+            phone='9876543210',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AB1234',
+            is_active=True
+        )
+    
+    def test_list_selects_only_requested_fields(self):
+        """Test that list narrows both the SELECT and the results"""
+        url = reverse('driver-list') + '?fields=name,driver_id'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'],
+            [{'driver_id': self.driver.driver_id, 'name': 'Ravi Kumar'}]
+        )
+        select = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"phone"', select)
+        self.assertNotIn('"vehicle_plate"', select)
+    
+    def test_cursor_list_without_ordering_field(self):
+        """Test that cursor pages work when the ordering column is not requested"""
+        url = reverse('driver-list') + '?pagination=cursor&fields=name'
+        response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'name': 'Ravi Kumar'}])
+    
+    def test_retrieve_reads_full_row_once(self):
+        """Test that retrieve caches the full row and narrows only the response"""
+        driver_cache.cache.clear()
+        url = reverse('driver-detail', kwargs={'pk': self.driver.driver_id})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': 'phone'})
+        
+        self.assertEqual(response.data, {'phone': '9876543210'})
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"name"', queries.captured_queries[0]['sql'])
+        
+        # Other fieldsets are served from the same cached row
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'fields': 'name,vehicle_type'})
+        self.assertEqual(response.data, {'name': 'Ravi Kumar', 'vehicle_type': 'Sedan'})
+    
+    def test_status_fields(self):
+        """Test ?fields= on the status and batch status endpoints"""
+        url = reverse('driver-driver-status', kwargs={'pk': self.driver.driver_id})
+        response = self.client.get(url + '?fields=is_active')
+        self.assertEqual(response.data, {'is_active': True})
+        
+        url = reverse('driver-status-batch')
+        response = self.client.get(url + f'?ids={self.driver.driver_id}&fields=name')
+        self.assertEqual(
+            response.data['drivers'],
+            {str(self.driver.driver_id): {'name': 'Ravi Kumar'}}
+        )
+    
+    def test_write_response_fields(self):
+        """Test that write actions narrow their response"""
+        url = reverse('driver-deactivate', kwargs={'pk': self.driver.driver_id})
+        response = self.client.post(url + '?fields=driver_id,is_active')
+        self.assertEqual(
+            response.data,
+            {'driver_id': self.driver.driver_id, 'is_active': False}
+        )
+    
+    def test_unknown_field_is_rejected(self):
+        """Test that unknown field names return 400"""
+        response = self.client.get(reverse('driver-list') + '?fields=name,password')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
+    
+    def test_messagepack_response(self):
+        """Test that Accept: application/msgpack returns MessagePack"""
+        import msgpack
+        
+        url = reverse('driver-detail', kwargs={'pk': self.driver.driver_id})
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(
+            msgpack.unpackb(response.content),
+            json.loads(self.client.get(url, HTTP_ACCEPT='application/json').content)
+        )
+
+
+class DriverCacheTests(APITestCase):
+    """
+    Test cases for the read-through driver cache.
+    """
+    
+    def setUp(self):
+        driver_cache.cache.clear()
+        driver_cache.reset_stats()
+        self.driver = Driver.objects.create(
+            name='Ravi Kumar',
+            phone='9876543210',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AB1234',
+            is_active=True
+        )
+        self.url = reverse('driver-detail', kwargs={'pk': self.driver.driver_id})
+    
+    def test_repeat_reads_skip_database(self):
+        """Test that a cached driver is served without queries"""
+        self.client.get(self.url)
+        status_url = reverse('driver-driver-status', kwargs={'pk': self.driver.driver_id})
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+            self.client.get(status_url)
+        
+        self.assertEqual(response.data['name'], 'Ravi Kumar')
+        stats = self.client.get(reverse('driver-cache-stats')).data
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+    
+    def test_api_writes_invalidate(self):
+        """Test that update and status actions evict the cached driver"""
+        self.client.get(self.url)
+        self.client.patch(self.url, {'name': 'Ravi K'}, format='json')
+        self.assertEqual(self.client.get(self.url).data['name'], 'Ravi K')
+        
+        self.client.post(reverse('driver-deactivate', kwargs={'pk': self.driver.driver_id}))
+        self.assertFalse(self.client.get(self.url).data['is_active'])
+        
+        self.client.delete(self.url)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_bulk_writes_invalidate(self):
+        """Test that queryset status changes and load_drivers evict cached drivers"""
+        self.client.get(self.url)
+        Driver.objects.filter(pk=self.driver.pk).set_active(False)
+        self.assertFalse(self.client.get(self.url).data['is_active'])
+        
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8')
+        handle.write(
+            'driver_id,name,phone,vehicle_type,vehicle_plate,is_active\n'
+            f'{self.driver.driver_id},Loaded Name,9876543210,Sedan,KA01AB1234,True\n'
+        )
+        handle.close()
+        self.addCleanup(os.remove, handle.name)
+        call_command('load_drivers', handle.name, '--batch-size', '10', stdout=StringIO())
+        
+        self.assertEqual(self.client.get(self.url).data['name'], 'Loaded Name')
+    
+    def test_row_read_before_commit_not_served(self):
+        """Test that a miss racing a write does not leave the old row cached"""
+        first = QuerySet.first
+        
+        def read_then_write(queryset):
+            # The write commits after the miss read the row but before it is cached
+            values = first(queryset)
+            with self.captureOnCommitCallbacks(execute=True):
+                Driver.objects.update_status([self.driver.pk], False)
+            return values
+        
+        with mock.patch.object(QuerySet, 'first', read_then_write):
+            self.assertTrue(driver_cache.get(self.driver.driver_id).is_active)
+        self.assertFalse(driver_cache.get(self.driver.driver_id).is_active)
+
+
+class DriverConditionalGetTests(APITestCase):
+    """
+    Test cases for ETag / Last-Modified handling.
+    """
+    
+    def setUp(self):
+        driver_cache.cache.clear()
+        self.driver = Driver.objects.create(
+            name='Ravi Kumar',
+            phone='9876543210',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AB1234',
+            is_active=True
+        )
+        self.url = reverse('driver-detail', kwargs={'pk': self.driver.driver_id})
+    
+    def test_driver_not_modified(self):
+        """Test that a matching If-None-Match returns 304 without queries once cached"""
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        
+        self.client.post(reverse('driver-deactivate', kwargs={'pk': self.driver.driver_id}))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_status_if_modified_since(self):
+        """Test If-Modified-Since on the status endpoint"""
+        url = reverse('driver-driver-status', kwargs={'pk': self.driver.driver_id})
+        last_modified = self.client.get(url)['Last-Modified']
+        
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    @override_settings(DRIVER_CHANGES_SETTLE_SECONDS=0)
+    def test_list_collection_version(self):
+        """Test that list ETags change on creates, updates and deletes"""
+        url = reverse('driver-list')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        self.driver.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 0)
+    
+    @override_settings(DRIVER_CHANGES_SETTLE_SECONDS=60)
+    def test_unsettled_list_is_not_versioned(self):
+        """Test that lists carry no ETag while a later-committing write could still land"""
+        response = self.client.get(reverse('driver-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', response)
+        
+        Driver.objects.filter(pk=self.driver.pk).update(updated_at=timezone.now() - timedelta(minutes=2))
+        self.assertIn('ETag', self.client.get(reverse('driver-list')))
+    
+    def test_stats_not_modified(self):
+        """Test that stats ETags follow the counters"""
+        url = reverse('driver-stats')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+        
+        self.driver.delete()
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_200_OK
+        )
+    
+    def test_etag_varies_by_format(self):
+        """Test that JSON and MessagePack representations have different ETags"""
+        json_etag = self.client.get(self.url, HTTP_ACCEPT='application/json')['ETag']
+        msgpack_etag = self.client.get(self.url, HTTP_ACCEPT='application/msgpack')['ETag']
+        self.assertNotEqual(json_etag, msgpack_etag)
+
+
+@override_settings(DRIVER_CHANGES_SETTLE_SECONDS=0)
+class DriverChangeFeedTests(APITestCase):
+    """
+    Test cases for the driver change feed.
+    """
+    
+    def setUp(self):
+        self.url = reverse('driver-changes')
+        self.drivers = [
+            Driver.objects.create(
+                name=f'Driver {i}',
+                phone=f'90000000{i:02d}',
+                vehicle_type='Sedan',
+                vehicle_plate=f'KA01AA00{i:02d}',
+                is_active=True
+            )
+            for i in range(3)
+        ]
+    
+    def test_pages_through_changes(self):
+        """Test that cursors page through every change exactly once"""
+        response = self.client.get(self.url, {'limit': 2})
+        self.assertEqual(
+            [change['driver_id'] for change in response.data['results']],
+            [driver.driver_id for driver in self.drivers[:2]]
+        )
+        self.assertTrue(response.data['has_more'])
+        
+        response = self.client.get(self.url, {'limit': 2, 'since': response.data['next_cursor']})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertFalse(response.data['has_more'])
+        
+        cursor = response.data['next_cursor']
+        response = self.client.get(self.url, {'since': cursor})
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['next_cursor'], cursor)
+    
+    def test_reports_updates_and_deletes(self):
+        """Test that updates and deletes after the cursor are returned in order"""
+        cursor = self.client.get(self.url).data['next_cursor']
+        
+        self.client.post(reverse('driver-deactivate', kwargs={'pk': self.drivers[1].driver_id}))
+        self.client.delete(reverse('driver-detail', kwargs={'pk': self.drivers[0].driver_id}))
+        
+        response = self.client.get(self.url, {'since': cursor, 'fields': 'is_active'})
+        self.assertEqual(response.data['results'], [
+            {'op': 'upsert', 'driver_id': self.drivers[1].driver_id, 'driver': {'is_active': False}},
+            {'op': 'delete', 'driver_id': self.drivers[0].driver_id, 'driver': None},
+        ])
+        self.assertEqual(DriverTombstone.objects.count(), 1)
+    
+    def test_changes_leave_out_performance(self):
+        """Test that upserts carry the driver row only, as performance refreshes are not fed"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertNotIn('performance', response.data['results'][0]['driver'])
+        self.assertFalse([query for query in queries if 'driver_performance' in query['sql']])
+        response = self.client.get(self.url, {'fields': 'performance'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    @override_settings(DRIVER_CHANGES_SETTLE_SECONDS=60)
+    def test_recent_changes_are_held_back(self):
+        """Test that changes inside the settle window are not handed out yet"""
+        self.assertEqual(self.client.get(self.url).data['results'], [])
+    
+    def test_invalid_cursor(self):
+        """Test that malformed cursors return 400"""
+        response = self.client.get(self.url, {'since': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DriverStreamTests(TestCase):
+    """
+    Test cases for the driver status event stream.
+    """
+    
+    def setUp(self):
+        self.driver = Driver.objects.create(
+            name='Ravi Kumar',
+            phone='9876543210',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AB1234',
+            is_active=True,
+            last_zone='HSR'
+        )
+    
+    def deactivate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Driver.objects.filter(pk=self.driver.pk).set_active(False)
+    
+    async def test_stream_pushes_status_changes(self):
+        """Test that committed status changes are pushed to listeners"""
+        response = await self.async_client.get('/api/v1/drivers/stream/?zone=hsr')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 1000\n\n')
+        
+        await sync_to_async(self.deactivate)()
+        
+        event = await asyncio.wait_for(anext(stream), 1)
+        self.assertEqual(event.split(b'\n')[0], b'event: status')
+        self.assertEqual(json.loads(event.split(b'data: ')[1]), {
+            'driver_id': self.driver.driver_id,
+            'is_active': False,
+            'vehicle_type': 'Sedan',
+            'last_zone': 'HSR',
+        })
+    
+    def test_refused_under_wsgi(self):
+        """Test that WSGI requests are refused instead of buffering the stream"""
+        started = time.monotonic()
+        response = self.client.get('/api/v1/drivers/stream/')
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        self.assertIn('ASGI', response.json()['error'])
+    
+    async def test_filters_and_unsubscribe(self):
+        """Test that filtered-out events are skipped and closed streams unsubscribe"""
+        stream = iter_sse(vehicle_type='Bike')
+        await anext(stream)
+        self.assertEqual(driver_events.subscriber_count, 1)
+        
+        await sync_to_async(self.deactivate)()
+        bike_event = {'driver_id': 99, 'is_active': True, 'vehicle_type': 'Bike', 'last_zone': ''}
+        driver_events.publish([bike_event])
+        
+        # The Sedan driver's change was skipped
+        event = await asyncio.wait_for(anext(stream), 1)
+        self.assertEqual(json.loads(event.split('data: ')[1]), bike_event)
+        
+        await stream.aclose()
+        self.assertEqual(driver_events.subscriber_count, 0)
+    
+    async def test_slow_subscriber_overflows(self):
+        """Test that a full queue is replaced by a single overflow marker"""
+        subscriber = driver_events.subscribe()
+        try:
+            event = {'driver_id': 1, 'is_active': True, 'vehicle_type': 'Sedan', 'last_zone': ''}
+            for _ in range(driver_events.max_queue_size + 1):
+                subscriber.offer(event)
+            
+            self.assertEqual(subscriber.queue.qsize(), 1)
+            self.assertIs(subscriber.queue.get_nowait(), OVERFLOW)
+        finally:
+            driver_events.unsubscribe(subscriber)
+
+
+class AsyncDriverReadTests(TestCase):
+    """
+    Test cases for the async read views served through the ASGI application.
+    """
+    
+    def setUp(self):
+        driver_cache.cache.clear()
+        self.drivers = [
+            Driver.objects.create(
+                name=f'Driver {i}',
+                phone=f'90000000{i:02d}',
+                vehicle_type='Sedan' if i % 2 else 'Bike',
+                vehicle_plate=f'KA01AA00{i:02d}',
+                is_active=i % 3 != 0
+            )
+            for i in range(12)
+        ]
+    
+    async def assertSameResponse(self, path, headers=None):
+        expected = await sync_to_async(self.client.get)(path, headers=headers)
+        response = await self.async_client.get(path, headers=headers)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response.get('ETag'), expected.get('ETag'))
+        self.assertEqual(response['Content-Type'], expected['Content-Type'])
+        return response
+    
+    async def test_responses_match_sync_views(self):
+        """Test that async read views return the same responses as the sync ones"""
+        driver_id = self.drivers[0].driver_id
+        paths = [
+            '/api/v1/drivers/',
+            '/api/v1/drivers/?page=2',
+            '/api/v1/drivers/?page=9',
+            '/api/v1/drivers/?vehicle_type=Sedan&ordering=name&fields=name,is_active',
+            '/api/v1/drivers/?pagination=cursor',
+            '/api/v1/drivers/?fields=password',
+            '/api/v1/drivers/active/',
+            '/api/v1/drivers/inactive/?search=driver',
+            '/api/v1/drivers/stats/',
+            f'/api/v1/drivers/{driver_id}/',
+            f'/api/v1/drivers/{driver_id}/status/?fields=is_active',
+            '/api/v1/drivers/99999/',
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                await self.assertSameResponse(path)
+        
+        await self.assertSameResponse(
+            f'/api/v1/drivers/{driver_id}/',
+            headers={'Accept': 'application/msgpack'}
+        )
+    
+    async def test_served_without_sync_views(self):
+        """Test that ASGI reads do not go through the sync viewset"""
+        with mock.patch.object(DriverViewSet, 'list', side_effect=AssertionError):
+            response = await self.async_client.get('/api/v1/drivers/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['count'], 12)
+    
+    async def test_not_modified(self):
+        """Test conditional GETs on the async views"""
+        url = f'/api/v1/drivers/{self.drivers[0].driver_id}/status/'
+        etag = (await self.async_client.get(url))['ETag']
+        response = await self.async_client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    async def test_throttling_and_versioning(self):
+        """Test that async reads run the view's throttles and versioning"""
+        class OneRequestThrottle(AnonRateThrottle):
+            rate = '1/minute'
+        
+        class VersionOne(QueryParameterVersioning):
+            allowed_versions = {'1'}
+        
+        await sync_to_async(cache.clear)()
+        url = f'/api/v1/drivers/{self.drivers[0].driver_id}/'
+        with mock.patch.object(DriverViewSet, 'throttle_classes', [OneRequestThrottle]):
+            self.assertEqual((await self.async_client.get(url)).status_code, status.HTTP_200_OK)
+            response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        
+        with mock.patch.object(DriverViewSet, 'versioning_class', VersionOne):
+            self.assertEqual((await self.async_client.get(url + '?version=1')).status_code, status.HTTP_200_OK)
+            response = await self.async_client.get(url + '?version=2')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    async def test_authenticated_reads(self):
+        """Test that credentials are checked off the event loop"""
+        response = await self.async_client.get(
+            '/api/v1/drivers/',
+            headers={'Authorization': 'Basic ' + base64.b64encode(b'nobody:wrong').decode()}
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    async def test_writes_use_sync_views(self):
+        """Test that other methods on async routes reach the sync viewset"""
+        driver_id = self.drivers[0].driver_id
+        response = await self.async_client.patch(
+            f'/api/v1/drivers/{driver_id}/',
+            {'name': 'Renamed'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = await self.async_client.get(f'/api/v1/drivers/{driver_id}/')
+        self.assertEqual(json.loads(response.content)['name'], 'Renamed')
+
+
+class ASGIApplicationTests(TransactionTestCase):
+    """
+    Test cases for the /api/ dispatch in asgi.py.
+    
+    The handler queries from its own thread, so tests are not wrapped in a
+    transaction that would lock the tables it reads.
+    """
+    
+    def setUp(self):
+        # Importing asgi.py sets Django up, which reconfigures logging
+        from driver_service.asgi import application
+        self.application = application
+    
+    async def request(self, path, query_string=b''):
+        communicator = ApplicationCommunicator(self.application, {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': query_string,
+            'headers': [(b'host', b'localhost')],
+        })
+        await communicator.send_input({'type': 'http.request'})
+        start = await communicator.receive_output(5)
+        body = await communicator.receive_output(5)
+        await communicator.wait(5)
+        return start, body
+    
+    def test_middleware_setting_restored(self):
+        """Test that the API stack is built from ASYNC_API_MIDDLEWARE and settings.MIDDLEWARE is restored"""
+        from driver_service import asgi
+        middleware = list(settings.MIDDLEWARE)
+        
+        with mock.patch('django.core.handlers.base.import_string', side_effect=import_string) as loaded:
+            asgi.APIHandler()
+        self.assertEqual(
+            [call.args[0] for call in loaded.call_args_list],
+            list(reversed(settings.ASYNC_API_MIDDLEWARE))
+        )
+        self.assertEqual(settings.MIDDLEWARE, middleware)
+    
+    async def test_export_streamed(self):
+        """Test that the export is sent in chunks without collecting a sync iterator"""
+        for number in range(3):
+            await Driver.objects.acreate(
+                name=f'Driver {number}',
+                phone=f'900000000{number}',
+                vehicle_type='Sedan',
+                vehicle_plate=f'KA01AB000{number}',
+            )
+        communicator = ApplicationCommunicator(self.application, {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/api/v1/drivers/export/',
+            'query_string': b'format=csv',
+            'headers': [(b'host', b'localhost')],
+        })
+        with mock.patch.object(export, 'EXPORT_CHUNK_SIZE', 2), warnings.catch_warnings():
+            # Django warns when it has to read a sync iterator into memory
+            warnings.simplefilter('error')
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(5)
+            chunks = [await communicator.receive_output(5)]
+            while chunks[-1].get('more_body'):
+                chunks.append(await communicator.receive_output(5))
+            await communicator.wait(5)
+        self.assertEqual(start['status'], status.HTTP_200_OK)
+        body = b''.join(chunk.get('body', b'') for chunk in chunks).decode()
+        self.assertEqual(len(body.splitlines()), 4)
+        self.assertGreater(len(chunks), 2)
+    
+    async def test_stream_first_chunk_is_prompt(self):
+        """Test that the status stream starts sending before it ends"""
+        communicator = ApplicationCommunicator(self.application, {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/api/v1/drivers/stream/',
+            'query_string': b'',
+            'headers': [(b'host', b'localhost')],
+        })
+        await communicator.send_input({'type': 'http.request'})
+        start = await communicator.receive_output(2)
+        self.assertEqual(start['status'], status.HTTP_200_OK)
+        body = await communicator.receive_output(2)
+        self.assertEqual(body['body'], b'retry: 1000\n\n')
+        self.assertTrue(body['more_body'])
+        communicator.stop()
+    
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=1.0)
+    async def test_api_request_measured_once(self):
+        """Test that an API request is timed and logged once, with its queries"""
+        request_latency.reset()
+        with self.assertLogs('drivers.instrumentation', 'INFO') as logs:
+            start, body = await self.request('/api/v1/drivers/stats/')
+        self.assertEqual(start['status'], status.HTTP_200_OK)
+        
+        requests = [record for record in logs.records if '"event": "request"' in record.getMessage()]
+        self.assertEqual(len(requests), 1)
+        self.assertIn(
+            'driver_service_request_duration_seconds_count{endpoint="driver-stats",method="GET"} 1',
+            request_latency.render()
+        )
+        # The stats endpoint reads the counters table
+        headers = {name.decode(): value.decode() for name, value in start['headers']}
+        self.assertIn('desc="1 queries"', headers['Server-Timing'])
+        self.assertEqual(json.loads(requests[0].getMessage())['db_queries'], 1)
+    
+    async def test_api_middleware(self):
+        """Test that API requests use the lean middleware stack"""
+        start, body = await self.request('/api/v1/drivers/', b'fields=password')
+        headers = {name.decode(): value.decode() for name, value in start['headers']}
+        self.assertEqual(start['status'], status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', json.loads(body['body']))
+        # Security and clickjacking headers are still set, sessions are not used
+        self.assertEqual(headers['X-Frame-Options'], 'DENY')
+        self.assertEqual(headers['X-Content-Type-Options'], 'nosniff')
+        self.assertNotIn('Cookie', headers.get('Vary', ''))
+
+
+class HealthCheckTests(TestCase):
+    """
+    Test cases for the /healthz and /readyz probes.
+    """
+    
+    def setUp(self):
+        readiness.reset()
+    
+    @override_settings(ALLOWED_HOSTS=['drivers.example.com'])
+    def test_healthz(self):
+        """Test that liveness needs no database and accepts any host"""
+        with self.assertNumQueries(0):
+            response = self.client.get('/healthz')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {'status': 'ok'})
+        self.assertEqual(response['Cache-Control'], 'no-store')
+    
+    def test_readyz_cached(self):
+        """Test that readiness reuses a recent result"""
+        with mock.patch.object(readiness, 'query', wraps=readiness.query) as query:
+            for _ in range(3):
+                response = self.client.get('/readyz')
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.json(), {'status': 'ok'})
+        self.assertEqual(query.call_count, 1)
+    
+    def test_readyz_database_error(self):
+        """Test that a failing database makes the pod unready"""
+        with mock.patch.object(readiness, 'query', return_value='connection refused'):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.json(), {'status': 'unavailable', 'error': 'connection refused'})
+    
+    def test_readyz_timeout(self):
+        """Test that a slow database answer is reported after the timeout"""
+        def slow_query():
+            time.sleep(0.5)
+        
+        with mock.patch.object(readiness, 'timeout', 0.05), \
+                mock.patch.object(readiness, 'query', side_effect=slow_query):
+            started = time.monotonic()
+            response = self.client.get('/readyz')
+            self.assertLess(time.monotonic() - started, 0.4)
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertIn('did not respond', response.json()['error'])
+            readiness._future.result()
+    
+    async def test_readyz_async(self):
+        """Test readiness under the async handler"""
+        response = await self.async_client.get('/readyz')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class RequestInstrumentationTests(APITestCase):
+    """
+    Test cases for request timing, Server-Timing and /metrics.
+    """
+    
+    def setUp(self):
+        request_latency.reset()
+        Driver.objects.create(
+            name='Driver One',
+            phone='9876543210',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AB1234',
+            is_active=True
+        )
+    
+    def test_unsampled_request(self):
+        """Test that requests are not broken down by default"""
+        response = self.client.get('/api/v1/drivers/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Server-Timing', response)
+    
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=1.0)
+    def test_sampled_request(self):
+        """Test that sampled requests report their breakdown"""
+        with self.assertLogs('drivers.instrumentation', 'INFO') as logs:
+            response = self.client.get('/api/v1/drivers/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = response['Server-Timing']
+        for name in ('db;', 'serialize;', 'render;', 'total;'):
+            self.assertIn(name, timing)
+        line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(line['event'], 'request')
+        self.assertEqual(line['endpoint'], 'driver-list')
+        self.assertEqual(line['status'], 200)
+        self.assertGreater(line['db_queries'], 0)
+        self.assertIn('serialize_ms', line)
+        self.assertIn('render_ms', line)
+    
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_query_logged(self):
+        """Test that queries over the threshold are logged"""
+        with self.assertLogs('drivers.instrumentation', 'WARNING') as logs:
+            self.client.get('/api/v1/drivers/')
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line['event'], 'slow_query')
+        self.assertIn('drivers', line['sql'])
+    
+    def test_metrics(self):
+        """Test that latency histograms are served in Prometheus format"""
+        self.client.get('/api/v1/drivers/')
+        self.client.get('/api/v1/drivers/')
+        self.client.get('/api/v1/drivers/stats/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE driver_service_request_duration_seconds histogram', body)
+        self.assertIn(
+            'driver_service_request_duration_seconds_count{endpoint="driver-list",method="GET"} 2',
+            body
+        )
+        self.assertIn(
+            'driver_service_request_duration_seconds_bucket{endpoint="driver-stats",method="GET",le="+Inf"} 1',
+            body
+        )
+    
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=1.0)
+    async def test_sampled_async_request(self):
+        """Test the breakdown under the async handler"""
+        response = await self.async_client.get('/api/v1/drivers/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('db;', response['Server-Timing'])
+
+
+class DriverVehicleTypeIndexTests(APITestCase):
+    """
+    Test cases for canonical vehicle types and the status/vehicle type indexes.
+    """
+    
+    def setUp(self):
+        for i in range(20):
+            Driver.objects.create(
+                name=f'Driver {i}',
+                phone=f'90000000{i:02d}',
+                vehicle_type=['Sedan', 'SUV', 'Bike', 'Auto'][i % 4],
+                vehicle_plate=f'KA01AA00{i:02d}',
+                is_active=i % 3 != 0
+            )
+    
+    def test_filters_ignore_case(self):
+        """Test that vehicle type filters accept any capitalization"""
+        expected = Driver.objects.filter(vehicle_type='SUV').count()
+        for url in ['/api/v1/drivers/by_vehicle_type/', '/api/v1/drivers/']:
+            with self.subTest(url=url):
+                response = self.client.get(url, {'vehicle_type': 'suv'})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data['count'], expected)
+    
+    def test_unknown_vehicle_type(self):
+        """Test that unknown vehicle types are rejected"""
+        response = self.client.get('/api/v1/drivers/by_vehicle_type/', {'vehicle_type': 'Rickshaw'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Sedan', response.data['error'])
+        response = self.client.get('/api/v1/drivers/', {'vehicle_type': 'Rickshaw'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_create_canonicalizes_vehicle_type(self):
+        """Test that writes store the canonical vehicle type"""
+        response = self.client.post('/api/v1/drivers/', {
+            'name': 'New Driver',
+            'phone': '9100000000',
+            'vehicle_type': 'hatchback',
+            'vehicle_plate': 'KA02BB0001',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Driver.objects.get(phone='9100000000').vehicle_type, 'Hatchback')
+    
+    def query_plans(self, url, params):
+        """
+        Return the SQLite query plans of the driver queries run for a GET.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if 'FROM "drivers"' in query['sql']:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    plans.append(' / '.join(row[-1] for row in cursor.fetchall()))
+        return plans
+    
+    @skipUnless(connection.vendor == 'sqlite', 'Query plans are checked on SQLite')
+    def test_query_plans(self):
+        """Test that filtered lists are index range scans without a sort"""
+        cases = [
+            ('/api/v1/drivers/active/', {}, 'driver_active_idx'),
+            ('/api/v1/drivers/inactive/', {'vehicle_type': 'sedan'}, 'driver_inactive_type_idx'),
+            ('/api/v1/drivers/', {'is_active': 'true', 'vehicle_type': 'Bike'}, 'driver_active_type_idx'),
+            ('/api/v1/drivers/by_vehicle_type/', {'vehicle_type': 'SUV'}, 'driver_type_idx'),
+        ]
+        for url, params, index in cases:
+            with self.subTest(url=url, params=params):
+                plans = self.query_plans(url, params)
+                # The collection version is read from the end of an index
+                self.assertIn('COVERING INDEX driver_updated_at_idx', plans[0])
+                filtered = plans[1:]
+                self.assertTrue(filtered)
+                for plan in filtered:
+                    self.assertIn(f'INDEX {index}', plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
+                # The page count never reads the table
+                self.assertIn(f'COVERING INDEX {index}', filtered[0])
+
+
+class DriverPerformanceTests(APITestCase):
+    """
+    Test cases for trips, ratings and payments and the per-driver aggregates.
+    """
+    
+    TRIPS = (
+        'trip_id,rider_id,driver_id,pickup_zone,drop_zone,status,requested_at,'
+        'distance_km,base_fare,surge_multiplier,total_fare\n'
+        '1,1,1,HSR,Indiranagar,COMPLETED,2024-01-01 10:00:00,5.00,75.00,1.0,75.00\n'
+        '2,2,1,HSR,Whitefield,completed,2024-01-01 11:00:00,12.50,180.00,1.5,270.00\n'
+        '3,3,1,Koramangala,HSR,CANCELLED,2024-01-01 12:00:00,3.00,40.00,1.0,40.00\n'
+        '4,1,2,HSR,HSR,ONGOING,2024-01-01 13:00:00,2.00,30.00,1.0,30.00\n'
+        '5,1,99,HSR,HSR,COMPLETED,2024-01-01 14:00:00,2.00,30.00,1.0,30.00\n'
+    )
+    RATINGS = (
+        'rating_id,trip_id,rider_rating,driver_rating,comment\n'
+        '1,1,4,5,Smooth ride\n'
+        '2,2,,4,\n'
+    )
+    PAYMENTS = (
+        'payment_id,trip_id,amount,method,status,reference,created_at\n'
+        '1,1,75.00,UPI,SUCCESS,REF-1,2024-01-01 10:30:00\n'
+        '2,2,270.00,CARD,FAILED,REF-2,2024-01-01 11:30:00\n'
+        '3,2,270.00,CASH,SUCCESS,REF-3,2024-01-01 11:40:00\n'
+    )
+    
+    def setUp(self):
+        driver_cache.cache.clear()
+        self.driver1 = Driver.objects.create(
+            driver_id=1,
+            name='Driver One',
+            phone='9876543210',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AB1234'
+        )
+        self.driver2 = Driver.objects.create(
+            driver_id=2,
+            name='Driver Two',
+            phone='9876543211',
+            vehicle_type='SUV',
+            vehicle_plate='KA01AB1235'
+        )
+    
+    def write_csv(self, content):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8')
+        handle.write(content)
+        handle.close()
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+    
+    def load(self):
+        out = StringIO()
+        call_command(
+            'load_trips',
+            '--trips', self.write_csv(self.TRIPS),
+            '--ratings', self.write_csv(self.RATINGS),
+            '--payments', self.write_csv(self.PAYMENTS),
+            '--batch-size', '2',
+            stdout=out
+        )
+        return out.getvalue()
+    
+    def performance(self, driver):
+        return DriverPerformance.objects.get(pk=driver.pk)
+    
+    def test_new_drivers_get_a_row(self):
+        """Test that every driver starts with empty aggregates"""
+        response = self.client.get(reverse('driver-detail', kwargs={'pk': self.driver1.pk}))
+        self.assertEqual(response.data['performance']['trip_count'], 0)
+        self.assertEqual(response.data['performance']['average_rating'], 0.0)
+        self.assertEqual(response.data['performance']['total_earnings'], '0.00')
+    
+    def test_load_trips(self):
+        """Test loading trips, ratings and payments and aggregating them"""
+        output = self.load()
+        self.assertIn('Driver 99 does not exist', output)
+        self.assertEqual(Trip.objects.count(), 4)
+        self.assertEqual(Trip.objects.get(pk=2).status, 'COMPLETED')
+        self.assertIsNone(Rating.objects.get(pk=2).rider_rating)
+        
+        performance = self.performance(self.driver1)
+        self.assertEqual(performance.trip_count, 3)
+        self.assertEqual(performance.completed_trip_count, 2)
+        self.assertEqual(performance.cancelled_trip_count, 1)
+        self.assertAlmostEqual(performance.completion_rate, 2 / 3)
+        self.assertEqual(performance.rating_count, 2)
+        self.assertEqual(performance.average_rating, 4.5)
+        self.assertEqual(performance.total_earnings, Decimal('345.00'))
+        # In-progress trips do not count against the completion rate
+        self.assertEqual(self.performance(self.driver2).completion_rate, 0.0)
+        
+        # Reloading replaces rows and leaves the aggregates unchanged
+        self.assertIn('Updated: 4', self.load())
+        self.assertEqual(self.performance(self.driver1).trip_count, 3)
+        self.assertEqual(performance.total_earnings, self.performance(self.driver1).total_earnings)
+    
+    def test_orm_writes_refresh(self):
+        """Test that saving and deleting trips, ratings and payments refreshes aggregates"""
+        self.load()
+        trip = Trip.objects.get(pk=4)
+        Rating.objects.create(trip=trip, driver_rating=3)
+        Payment.objects.create(trip=trip, amount=Decimal('30.00'), method='UPI', status='SUCCESS', reference='REF-4')
+        performance = self.performance(self.driver2)
+        self.assertEqual((performance.rating_count, performance.average_rating), (1, 3.0))
+        self.assertEqual(performance.total_earnings, Decimal('30.00'))
+        
+        # Reassigning a trip refreshes both drivers
+        trip.driver = self.driver1
+        trip.save()
+        self.assertEqual(self.performance(self.driver1).trip_count, 4)
+        self.assertEqual(self.performance(self.driver2).trip_count, 0)
+        self.assertEqual(self.performance(self.driver2).rating_count, 0)
+        
+        Rating.objects.filter(trip_id=1).get().delete()
+        self.assertEqual(self.performance(self.driver1).average_rating, 3.5)
+    
+    def test_cascading_deletes_refresh_once(self):
+        """Test that a delete refreshes each surviving driver once, not once per row"""
+        self.load()
+        with CaptureQueriesContext(connection) as queries:
+            Trip.objects.filter(pk__in=[1, 2, 4]).delete()
+        refreshes = [query for query in queries if query['sql'].startswith('INSERT INTO "driver_performance"')]
+        self.assertEqual(len(refreshes), 2)
+        performance = self.performance(self.driver1)
+        self.assertEqual((performance.trip_count, performance.rating_count), (1, 0))
+        self.assertEqual(performance.total_earnings, Decimal('0'))
+        self.assertEqual(self.performance(self.driver2).trip_count, 0)
+        
+        # Nothing is refreshed for a deleted driver
+        with CaptureQueriesContext(connection) as queries:
+            self.driver1.delete()
+        self.assertFalse([
+            query for query in queries
+            if query['sql'].startswith('SELECT') and 'driver_performance' in query['sql']
+        ])
+        self.assertFalse(Trip.objects.filter(driver_id=1).exists())
+    
+    def test_ranking(self):
+        """Test ordering drivers by their aggregates"""
+        self.load()
+        url = reverse('driver-list')
+        cases = [
+            ('-average_rating', [1, 2]),
+            ('average_rating', [2, 1]),
+            ('-total_earnings', [1, 2]),
+            ('trip_count', [2, 1]),
+        ]
+        for ordering, expected in cases:
+            with self.subTest(ordering=ordering):
+                for params in ({}, {'pagination': 'cursor'}):
+                    response = self.client.get(url, {'ordering': ordering, **params})
+                    self.assertEqual(
+                        [driver['driver_id'] for driver in response.data['results']],
+                        expected
+                    )
+                    self.assertNotIn('average_rating', response.data['results'][0])
+    
+    @override_settings(DRIVER_CHANGES_SETTLE_SECONDS=0)
+    def test_ranking_etag_follows_aggregates(self):
+        """Test that a ranking's ETag changes when the aggregates do"""
+        url = reverse('driver-list')
+        etag = self.client.get(url, {'ordering': '-average_rating'})['ETag']
+        self.load()
+        self.assertNotEqual(self.client.get(url, {'ordering': '-average_rating'})['ETag'], etag)
+    
+    def test_cached_retrieve_includes_performance(self):
+        """Test that cached reads carry the aggregates and see refreshes"""
+        self.load()
+        url = reverse('driver-detail', kwargs={'pk': self.driver2.pk})
+        response = self.client.get(url)
+        self.assertEqual(response.data['performance']['trip_count'], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url)['ETag'], response['ETag'])
+        
+        Rating.objects.create(trip_id=4, driver_rating=2)
+        refreshed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(refreshed.status_code, status.HTTP_200_OK)
+        self.assertEqual(refreshed.data['performance']['average_rating'], 2.0)
+    
+    def test_write_responses_omit_performance(self):
+        """Test that create, update and status writes never read the aggregates back"""
+        detail = reverse('driver-detail', kwargs={'pk': self.driver1.pk})
+        writes = [
+            lambda: self.client.post(reverse('driver-list'), {
+                'name': 'Driver Three',
+                'phone': '9876500003',
+                'vehicle_type': 'Hatchback',
+                'vehicle_plate': 'KA01XY0003'
+            }, format='json'),
+            lambda: self.client.patch(detail, {'name': 'Renamed'}, format='json'),
+            lambda: self.client.post(reverse('driver-toggle-status', kwargs={'pk': self.driver1.pk})),
+            lambda: self.client.post(reverse('driver-activate', kwargs={'pk': self.driver1.pk})),
+        ]
+        for write in writes:
+            with CaptureQueriesContext(connection) as queries:
+                response = write()
+            self.assertLess(response.status_code, 300)
+            self.assertNotIn('performance', response.data)
+            self.assertFalse([
+                query['sql'] for query in queries
+                if query['sql'].startswith('SELECT') and 'driver_performance' in query['sql']
+            ])
+    
+        response = self.client.post(reverse('driver-activate', kwargs={'pk': self.driver1.pk}) + '?fields=performance')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('performance', self.client.get(detail).data)
+    
+    async def test_async_retrieve_includes_performance(self):
+        """Test that the async detail view serializes the aggregates"""
+        response = await self.async_client.get(f'/api/v1/drivers/{self.driver1.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['performance']['rating_count'], 0)
+    
+    @skipUnless(connection.vendor == 'sqlite', 'Query plans are checked on SQLite')
+    def test_ranking_query_plan(self):
+        """Test that a ranking page walks its index without sorting or reading trips"""
+        self.load()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('driver-list'), {'ordering': '-average_rating', 'pagination': 'cursor'})
+        page = [query['sql'] for query in queries.captured_queries if 'LIMIT' in query['sql']][0]
+        self.assertNotIn('"trips"', page)
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + page)
+            plan = ' / '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('INDEX performance_rating_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+    
+    def test_rebuild(self):
+        """Test that rebuild_driver_performance corrects drifted rows"""
+        self.load()
+        DriverPerformance.objects.filter(pk=self.driver1.pk).update(trip_count=0, average_rating=1.0)
+        DriverPerformance.objects.filter(pk=self.driver2.pk).delete()
+        call_command('rebuild_driver_performance', stdout=StringIO())
+        self.assertEqual(self.performance(self.driver1).trip_count, 3)
+        self.assertEqual(self.performance(self.driver1).average_rating, 4.5)
+        self.assertEqual(self.performance(self.driver2).trip_count, 1)
+
+
+class TripAnalyticsTests(APITestCase):
+    """
+    Test cases for the columnar trip analytics and the analytics endpoint.
+    """
+    
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(ANALYTICS_CACHE_DIR=directory.name, ANALYTICS_REFRESH_SECONDS=300)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        trip_analytics.clear()
+        self.addCleanup(trip_analytics.clear)
+        self.url = reverse('driver-analytics')
+        
+        self.driver1 = Driver.objects.create(
+            driver_id=1,
+            name='Driver One',
+            phone='9876543210',
+            vehicle_type='Sedan',
+            vehicle_plate='KA01AB1234'
+        )
+        self.driver2 = Driver.objects.create(
+            driver_id=2,
+            name='Driver Two',
+            phone='9876543211',
+            vehicle_type='SUV',
+            vehicle_plate='KA01AB1235'
+        )
+        trips = [
+            (1, self.driver1, 'HSR', 'COMPLETED', '10:15', '5.00', '1.0', '75.00'),
+            (2, self.driver1, 'HSR', 'COMPLETED', '10:45', '10.00', '1.5', '225.00'),
+            (3, self.driver1, 'BTM', 'CANCELLED', '12:00', '3.00', '2.0', '40.00'),
+            (4, self.driver2, 'BTM', 'ONGOING', '13:30', '2.00', '1.0', '30.00'),
+        ]
+        for trip_id, driver, zone, trip_status, time_of_day, distance, surge, fare in trips:
+            Trip.objects.create(
+                trip_id=trip_id,
+                rider_id=1,
+                driver=driver,
+                pickup_zone=zone,
+                drop_zone=zone,
+                status=trip_status,
+                requested_at=timezone.make_aware(datetime.fromisoformat(f'2024-01-01 {time_of_day}')),
+                distance_km=Decimal(distance),
+                base_fare=Decimal(fare),
+                surge_multiplier=Decimal(surge),
+                total_fare=Decimal(fare)
+            )
+        payments = [
+            (1, '75.00', 'UPI', 'SUCCESS'),
+            (2, '225.00', 'CARD', 'FAILED'),
+            (2, '225.00', 'CASH', 'SUCCESS'),
+            (4, '30.00', 'UPI', 'PENDING'),
+        ]
+        for reference, (trip_id, amount, method, payment_status) in enumerate(payments):
+            Payment.objects.create(
+                trip_id=trip_id,
+                amount=Decimal(amount),
+                method=method,
+                status=payment_status,
+                reference=f'REF-{reference}'
+            )
+        trip_analytics.build()
+        # Refreshes run inline in the tests, not in a background thread
+        patcher = mock.patch.object(trip_analytics, 'start_refresh')
+        self.start_refresh = patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_report(self):
+        """Test the demand, surge, fare, payment and utilisation aggregates"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        report = response.data
+        self.assertEqual(report['window']['hours'], 4)
+        self.assertEqual(report['window']['start'], '2024-01-01T10:00:00+05:30')
+        self.assertEqual(
+            (report['trips'], report['completed_trips'], report['cancelled_trips']),
+            (4, 2, 1)
+        )
+        self.assertEqual(report['zones'], ['BTM', 'HSR'])
+        self.assertEqual(report['demand']['HSR'][10], 2)
+        self.assertEqual(report['demand']['BTM'][12:14], [1, 1])
+        self.assertEqual(sum(map(sum, report['demand'].values())), 4)
+        
+        self.assertEqual(report['surge']['average'], 1.375)
+        self.assertEqual(report['surge']['by_zone'], {'BTM': 1.5, 'HSR': 1.25})
+        self.assertEqual(report['surge']['by_hour'][10], 1.25)
+        self.assertIsNone(report['surge']['by_hour'][0])
+        
+        # Only completed trips are fared
+        self.assertEqual(report['fare_per_km'], {'average': 20.0, 'by_zone': {'BTM': None, 'HSR': 20.0}})
+        
+        self.assertEqual(report['payments']['count'], 4)
+        self.assertEqual(report['payments']['success_rate'], 0.5)
+        self.assertEqual(report['payments']['collected'], 300.0)
+        self.assertEqual(report['payments']['by_method']['CASH'], 225.0)
+        self.assertEqual(report['payments']['by_method']['CARD'], 0.0)
+        self.assertEqual(report['payments']['by_zone'], {'BTM': 0.0, 'HSR': 300.0})
+        
+        # Two trips in one hour make one busy hour; cancelled trips make none
+        utilisation = report['utilisation']
+        self.assertEqual((utilisation['drivers'], utilisation['average']), (2, 0.25))
+        self.assertEqual(
+            utilisation['top'][0],
+            {'driver_id': 1, 'busy_hours': 1, 'utilisation': 0.25}
+        )
+    
+    def test_window(self):
+        """Test reporting on the last hours before the latest trip"""
+        response = self.client.get(self.url, {'window_hours': 2})
+        self.assertEqual(response.data['window']['start'], '2024-01-01T12:00:00+05:30')
+        self.assertEqual(response.data['trips'], 2)
+        self.assertEqual(response.data['payments']['count'], 1)
+        self.assertEqual(response.data['payments']['collected'], 0.0)
+        
+        for window_hours in ['0', 'week', str(MAX_WINDOW_HOURS + 1)]:
+            with self.subTest(window_hours=window_hours):
+                response = self.client.get(self.url, {'window_hours': window_hours})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_sparse_fields(self):
+        """Test narrowing the report with ?fields="""
+        response = self.client.get(self.url, {'fields': 'trips,surge'})
+        self.assertEqual(set(response.data), {'trips', 'surge'})
+    
+    def test_cached_report(self):
+        """Test that repeated reports read neither trips nor the database"""
+        response = self.client.get(self.url)
+        with mock.patch('drivers.analytics.summarize') as summarize:
+            with self.assertNumQueries(0):
+                cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        summarize.assert_not_called()
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    @override_settings(ANALYTICS_REFRESH_SECONDS=0)
+    def test_rebuilt_after_writes(self):
+        """Test that a stale snapshot is served while it is rebuilt outside the request"""
+        etag = self.client.get(self.url)['ETag']
+        version = trip_analytics.snapshot().version
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(self.url)['ETag'], etag)
+        self.start_refresh.assert_not_called()
+        
+        Trip.objects.filter(pk=4).get().delete()
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response['ETag'], etag)
+        self.start_refresh.assert_called_once_with()
+        
+        self.assertNotEqual(trip_analytics.refresh().version, version)
+        response = self.client.get(self.url)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['trips'], 3)
+        # Already current
+        self.assertIsNone(trip_analytics.refresh())
+    
+    def test_unavailable_until_built(self):
+        """Test that reports are unavailable until a first snapshot is built"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        trip_analytics.clear()
+        with override_settings(ANALYTICS_CACHE_DIR=directory.name):
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(response['Retry-After'], '30')
+            self.start_refresh.assert_called_once_with()
+            
+            trip_analytics.refresh()
+            self.assertEqual(self.client.get(self.url).data['trips'], 4)
+    
+    def test_builds_are_serialized(self):
+        """Test that refreshes skip while another build holds the lock and keep the previous snapshot"""
+        directory = settings.ANALYTICS_CACHE_DIR
+        first = trip_analytics.snapshot().version
+        Trip.objects.filter(pk=4).get().delete()
+        with build_lock(directory):
+            with self.assertNumQueries(0):
+                self.assertIsNone(trip_analytics.refresh())
+        
+        second = trip_analytics.refresh().version
+        self.assertEqual(set(os.listdir(directory)) - {'.lock', 'CURRENT'}, {first, second})
+        Trip.objects.filter(pk=3).get().delete()
+        third = trip_analytics.build().version
+        self.assertEqual(set(os.listdir(directory)) - {'.lock', 'CURRENT'}, {second, third})
+    
+    def test_memory_mapped_snapshot(self):
+        """Test that a built snapshot is memory-mapped from the cache directory"""
+        built = trip_analytics.build()
+        trip_analytics.clear()
+        with self.assertNumQueries(2):
+            snapshot = trip_analytics.snapshot()
+        self.assertEqual(snapshot.version, built.version)
+        self.assertIsInstance(snapshot.trips['requested_at'], numpy.memmap)
+        self.assertEqual(snapshot.payments['trip_row'].tolist(), [0, 1, 1, 3])
+    
+    def test_build_command(self):
+        """Test build_trip_analytics"""
+        out = StringIO()
+        call_command('build_trip_analytics', stdout=out)
+        self.assertIn('Trips: 4', out.getvalue())
+        self.assertIn('Payments: 4', out.getvalue())
+        
+        out = StringIO()
+        call_command('build_trip_analytics', '--json', '--window-hours', '2', stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['trips'], 2)
+    
+    def test_no_trips(self):
+        """Test the report of an empty trips table"""
+        Trip.objects.all().delete()
+        trip_analytics.build()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['trips'], 0)
+        self.assertIsNone(response.data['window'])
+        self.assertEqual(response.data['utilisation']['drivers'], 0)
@@ -0,0 +1,40 @@
+"""
+The statuses of trips and payments, and the payment methods.
+
+Values are stored exactly as listed here, upper-case as in the seed data.
+This module has no Django imports, so CSV parsing can use it.
+"""
+
+TRIP_STATUS_CHOICES = [
+    ('REQUESTED', 'Requested'),
+    ('ACCEPTED', 'Accepted'),
+    ('ONGOING', 'Ongoing'),
+    ('COMPLETED', 'Completed'),
+    ('CANCELLED', 'Cancelled'),
+]
+
+TRIP_STATUSES = [value for value, label in TRIP_STATUS_CHOICES]
+
+# Trips that will not change any more; the completion rate is taken over these
+COMPLETED = 'COMPLETED'
+CANCELLED = 'CANCELLED'
+
+PAYMENT_METHOD_CHOICES = [
+    ('CASH', 'Cash'),
+    ('CARD', 'Card'),
+    ('UPI', 'UPI'),
+    ('WALLET', 'Wallet'),
+]
+
+PAYMENT_METHODS = [value for value, label in PAYMENT_METHOD_CHOICES]
+
+PAYMENT_STATUS_CHOICES = [
+    ('PENDING', 'Pending'),
+    ('SUCCESS', 'Success'),
+    ('FAILED', 'Failed'),
+]
+
+PAYMENT_STATUSES = [value for value, label in PAYMENT_STATUS_CHOICES]
+
+# Only successful payments count towards a driver's earnings
+SUCCESS = 'SUCCESS'
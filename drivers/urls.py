@@ -4,6 +4,6 @@ from . import views
 app_name = 'drivers'
 
 urlpatterns = [
-    # Additional custom URLs can be added here if needed
+    # Matched before the router, which would read "stream" as a driver ID
+    path('drivers/stream/', views.driver_stream, name='driver-stream'),
 ]
-
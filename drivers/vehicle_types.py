@@ -0,0 +1,30 @@
+"""
+The vehicle types a driver can have.
+
+Vehicle types are stored exactly as listed in ``VEHICLE_TYPE_CHOICES``, so
+they can be filtered with an exact (index-friendly) match. Input is mapped
+to that spelling with ``canonical_vehicle_type``. This module has no Django
+imports, so CSV worker processes can use it.
+"""
+
+VEHICLE_TYPE_CHOICES = [
+    ('Bike', 'Bike'),
+    ('Auto', 'Auto'),
+    ('Hatchback', 'Hatchback'),
+    ('Sedan', 'Sedan'),
+    ('SUV', 'SUV'),
+]
+
+VEHICLE_TYPES = [value for value, label in VEHICLE_TYPE_CHOICES]
+
+_canonical = {value.casefold(): value for value in VEHICLE_TYPES}
+
+
+def canonical_vehicle_type(value):
+    """
+    Return the stored spelling of ``value`` ("sedan" -> "Sedan"), or None if
+    it is not a known vehicle type.
+    """
+    if not isinstance(value, str):
+        return None
+    return _canonical.get(value.strip().casefold())
@@ -1,16 +1,33 @@
+import hashlib
+import json
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Max
+from django.http import Http404, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Count, Q
-from .models import Driver
+from . import counters, export, feed
+from .analytics import MAX_WINDOW_HOURS, SnapshotUnavailable, trip_analytics
+from .availability import available_drivers
+from .cache import driver_cache
+from .events import iter_sse
+from .filters import DriverFilterSet, DriverOrderingFilter, DriverSearchFilter, orders_by_performance
+from .instrumentation import span
+from .models import Driver, DriverPerformance, DriverTombstone
+from .pagination import DriverPagination
 from .serializers import (
     DriverSerializer,
     DriverListSerializer,
     DriverCreateUpdateSerializer,
-    DriverStatusSerializer
+    DriverStatusSerializer,
+    DriverBulkStatusSerializer,
+    DriverStatusBatchSerializer
 )
+from .vehicle_types import VEHICLE_TYPES, canonical_vehicle_type
 
 
 class DriverViewSet(viewsets.ModelViewSet):
@@ -28,16 +45,232 @@ class DriverViewSet(viewsets.ModelViewSet):
     - active: Get all active drivers
     - inactive: Get all inactive drivers
     - by_vehicle_type: Get drivers by vehicle type
+    - available: Get available drivers in a zone
     - toggle_status: Toggle driver active status
+    - bulk_status: Set the status of many drivers at once
+    - export: Stream all matching drivers as NDJSON or CSV
     - stats: Get driver statistics
+    - analytics: Get demand, surge, fare, payment and utilisation aggregates of trips
+    - status_batch: Get the status of many drivers at once
+    - cache_stats: Get driver cache hit/miss counters
+    - changes: Get drivers created, updated or deleted after a cursor
     """
     
     queryset = Driver.objects.all()
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['is_active', 'vehicle_type']
+    pagination_class = DriverPagination
+    filter_backends = [DjangoFilterBackend, DriverSearchFilter, DriverOrderingFilter]
+    filterset_class = DriverFilterSet
     search_fields = ['name', 'phone', 'vehicle_plate']
-    ordering_fields = ['driver_id', 'name', 'created_at', 'vehicle_type']
+    ordering_fields = [
+        'driver_id',
+        'name',
+        'created_at',
+        'vehicle_type',
+        'performance__average_rating',
+        'performance__completion_rate',
+        'performance__total_earnings',
+        'performance__trip_count',
+    ]
+    # ?ordering= names of the DriverPerformance columns
+    ordering_aliases = {
+        'average_rating': 'performance__average_rating',
+        'completion_rate': 'performance__completion_rate',
+        'total_earnings': 'performance__total_earnings',
+        'trip_count': 'performance__trip_count',
+    }
     ordering = ['-driver_id']
+    available_default_limit = 10
+    available_max_limit = 500
+    bulk_status_chunk_size = 1000
+    changes_default_limit = 500
+    changes_max_limit = 1000
+    export_formats = ['ndjson', 'csv']
+    fields_query_param = 'fields'
+    # driver_status response keys and the columns they are read from
+    driver_status_fields = {
+        'driver_id': 'driver_id',
+        'name': 'name',
+        'is_active': 'is_active',
+        'vehicle_type': 'vehicle_type',
+        'vehicle_plate': 'vehicle_plate',
+        'last_updated': 'updated_at',
+    }
+    # Read actions served through the per-driver cache
+    cached_actions = ['retrieve', 'details', 'driver_status']
+    # Fields of create, update and status responses, and of the change feed.
+    # Writes never change a driver's performance, and reading it back would
+    # cost a SELECT per write; performance refreshes do not move a driver's
+    # feed position, so mirrors would keep stale aggregates.
+    row_fields = [name for name in DriverSerializer.Meta.fields if name != 'performance']
+    
+    def perform_content_negotiation(self, request, force=False):
+        if self.action == 'export':
+            # ?format= picks the export encoding here, not a renderer
+            force = True
+        return super().perform_content_negotiation(request, force)
+    
+    def get_object(self):
+        """
+        Read drivers for ``cached_actions`` through the driver cache.
+        """
+        if self.action not in self.cached_actions:
+            return super().get_object()
+        
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            driver_id = int(self.kwargs[lookup_url_kwarg])
+        except (TypeError, ValueError):
+            raise Http404
+        
+        driver = driver_cache.get(driver_id, self.get_queryset())
+        if driver is None:
+            raise Http404
+        
+        self.check_object_permissions(self.request, driver)
+        return driver
+    
+    def get_sparse_fields(self, available):
+        """
+        Return the names requested with ``?fields=``, in ``available`` order,
+        or None if the parameter is absent.
+        """
+        value = self.request.query_params.get(self.fields_query_param)
+        if value is None:
+            return None
+        
+        requested = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = sorted(requested.difference(available))
+        if unknown or not requested:
+            raise ParseError({
+                "error": (
+                    f"{self.fields_query_param} must be a comma-separated list of: "
+                    f"{', '.join(available)}"
+                )
+            })
+        return [name for name in available if name in requested]
+    
+    def get_row_fields(self):
+        """
+        Return the ``row_fields`` requested with ``?fields=``, or all of them.
+        
+        These responses leave out ``performance``; read it with a GET.
+        """
+        return self.get_sparse_fields(self.row_fields) or self.row_fields
+    
+    def make_etag(self, version):
+        """
+        Return a weak ETag for ``version`` in the negotiated format.
+        """
+        return f'W/"{version}.{self.request.accepted_renderer.format}"'
+    
+    def driver_validators(self, driver):
+        """
+        Return the ETag and Last-Modified timestamp of a driver's current row
+        and performance row.
+        
+        ``driver`` comes from the driver cache, which attaches the
+        performance row, so this needs no query.
+        """
+        updated_at = driver.updated_at.timestamp()
+        performance = getattr(driver, 'performance', None)
+        if performance is None:
+            return self.make_etag(f'{driver.driver_id}.{updated_at:.6f}'), int(updated_at)
+        performance_updated_at = performance.updated_at.timestamp()
+        return (
+            self.make_etag(f'{driver.driver_id}.{updated_at:.6f}.{performance_updated_at:.6f}'),
+            int(max(updated_at, performance_updated_at))
+        )
+    
+    def collection_aggregates(self, queryset):
+        """
+        Return the ``(queryset, aggregates)`` pairs that version a
+        collection of drivers.
+        
+        Every write bumps a driver's ``updated_at`` and every delete writes
+        a tombstone, so the latest of each changes whenever any collection
+        does. Both are read from the end of an index rather than from the
+        filtered rows, so versioning costs the same for every filter and
+        page; the price is that a write to any driver changes every list's
+        ETag. Rankings also follow the latest performance refresh.
+        """
+        aggregates = [
+            (Driver.objects.all(), {'last_updated': Max('updated_at')}),
+            (DriverTombstone.objects.all(), {'last_deleted': Max('deleted_at')}),
+        ]
+        if orders_by_performance(queryset.query.order_by):
+            aggregates.append((DriverPerformance.objects.all(), {'performance_updated': Max('updated_at')}))
+        return aggregates
+    
+    def collection_version(self, queryset):
+        version = {}
+        for rows, aggregates in self.collection_aggregates(queryset):
+            version.update(rows.aggregate(**aggregates))
+        return version
+    
+    def collection_etag(self, version):
+        """
+        Return an ETag for a ``collection_version`` result, or None while
+        its latest change is not settled.
+        
+        A transaction that stamped its rows earlier but commits later does
+        not move the maxima, so, as in the change feed, a collection is only
+        versioned once ``DRIVER_CHANGES_SETTLE_SECONDS`` have passed.
+        """
+        horizon = feed.settle_horizon()
+        if any(value is not None and value > horizon for value in version.values()):
+            return None
+        return self.make_etag('.'.join(
+            f'{value.timestamp() if value else 0:.6f}' for value in version.values()
+        ))
+    
+    def versions_collection(self):
+        """
+        Return True if list responses carry a collection ETag.
+        
+        Cursor pages are keyset reads that cost the same at any depth;
+        they are left unversioned rather than add queries to every page.
+        """
+        return self.paginator is None or not self.paginator.use_cursor(self.request)
+    
+    def stats_etag(self, stats):
+        return self.make_etag(hashlib.md5(json.dumps(stats, sort_keys=True).encode()).hexdigest())
+    
+    def not_modified(self, etag, last_modified):
+        """
+        Return a 304 Not Modified response if the request's If-None-Match or
+        If-Modified-Since matches, else None.
+        """
+        return get_conditional_response(
+            self.request,
+            etag=etag,
+            last_modified=last_modified
+        )
+    
+    def set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+    
+    def conditional(self, etag, last_modified, respond):
+        """
+        Answer 304 Not Modified if the request's validators match, without
+        building the body; otherwise return ``respond()``. Both carry the
+        validators.
+        """
+        response = self.not_modified(etag, last_modified)
+        if response is None:
+            response = respond()
+        return self.set_validators(response, etag, last_modified)
+    
+    def sparse(self, data, available=None):
+        """
+        Narrow a response dict to the keys requested with ``?fields=``.
+        """
+        fields = self.get_sparse_fields(available or list(data))
+        if fields is None:
+            return data
+        return {name: data[name] for name in fields}
     
     def get_serializer_class(self):
         """
@@ -49,19 +282,99 @@ class DriverViewSet(viewsets.ModelViewSet):
             return DriverCreateUpdateSerializer
         elif self.action == 'toggle_status':
             return DriverStatusSerializer
+        elif self.action == 'bulk_status':
+            return DriverBulkStatusSerializer
+        elif self.action == 'status_batch':
+            return DriverStatusBatchSerializer
         return DriverSerializer
     
+    def list(self, request, *args, **kwargs):
+        """
+        List drivers.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.list_response(queryset)
+    
+    def list_response(self, queryset):
+        """
+        Paginate and respond with the DriverListSerializer fields of ``queryset``.
+        
+        Rows are fetched as dicts of exactly those columns (or the ``?fields=``
+        subset), skipping model instances and serializer fields; the JSON is
+        the same as DriverListSerializer's because the values are already
+        plain types.
+        """
+        fields, columns, rows = self.list_rows(queryset)
+        
+        def respond():
+            page = self.paginate_queryset(rows)
+            if page is not None:
+                return self.get_paginated_response(self.trim_rows(page, fields, columns))
+            return Response(self.trim_rows(rows, fields, columns))
+        
+        if not self.versions_collection():
+            return respond()
+        etag = self.collection_etag(self.collection_version(queryset))
+        if etag is None:
+            return respond()
+        return self.conditional(etag, None, respond)
+    
+    def list_rows(self, queryset):
+        """
+        Return the response fields, the selected columns and the ``values()``
+        queryset of a list response.
+        """
+        available = DriverListSerializer.Meta.fields
+        fields = self.get_sparse_fields(available) or available
+        # Cursor pages read their position from the ordering columns
+        ordering = [name.lstrip('-') for name in queryset.query.order_by]
+        columns = list(dict.fromkeys([*fields, *ordering]))
+        if orders_by_performance(ordering):
+            # Every driver has a performance row; an inner join lets the
+            # database walk the ranking index instead of sorting every driver
+            queryset = queryset.filter(performance__isnull=False)
+        return fields, columns, queryset.values(*columns)
+    
+    def trim_rows(self, rows, fields, columns):
+        """
+        Drop the columns that were only selected for ordering.
+        """
+        with span('serialize'):
+            if len(columns) == len(fields):
+                return list(rows)
+            return [{name: row[name] for name in fields} for row in rows]
+    
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Get a driver.
+        """
+        return self.instance_response()
+    
+    def instance_response(self):
+        """
+        Respond with the DriverSerializer fields (or ``?fields=`` subset) of
+        the requested driver.
+        """
+        fields = self.get_sparse_fields(DriverSerializer.Meta.fields)
+        driver = self.get_object()
+        etag, last_modified = self.driver_validators(driver)
+        return self.conditional(
+            etag,
+            last_modified,
+            lambda: Response(DriverSerializer(driver, fields=fields).data)
+        )
+    
     def create(self, request, *args, **kwargs):
         """
         Create a new driver.
         """
+        fields = self.get_row_fields()
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         
-        # Return full driver details
-        driver = Driver.objects.get(pk=serializer.instance.pk)
-        response_serializer = DriverSerializer(driver)
+        # Return full driver details from the saved instance
+        response_serializer = DriverSerializer(serializer.instance, fields=fields)
         
         return Response(
             response_serializer.data,
@@ -73,14 +386,14 @@ class DriverViewSet(viewsets.ModelViewSet):
         Update a driver (full update).
         """
         partial = kwargs.pop('partial', False)
+        fields = self.get_row_fields()
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
         
-        # Return full driver details
-        driver = Driver.objects.get(pk=instance.pk)
-        response_serializer = DriverSerializer(driver)
+        # Return full driver details from the saved instance
+        response_serializer = DriverSerializer(serializer.instance, fields=fields)
         
         return Response(response_serializer.data)
     
@@ -95,13 +408,7 @@ class DriverViewSet(viewsets.ModelViewSet):
         # Apply search and filters
         active_drivers = self.filter_queryset(active_drivers)
         
-        page = self.paginate_queryset(active_drivers)
-        if page is not None:
-            serializer = DriverListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = DriverListSerializer(active_drivers, many=True)
-        return Response(serializer.data)
+        return self.list_response(active_drivers)
     
     @action(detail=False, methods=['get'])
     def inactive(self, request):
@@ -114,13 +421,7 @@ class DriverViewSet(viewsets.ModelViewSet):
         # Apply search and filters
         inactive_drivers = self.filter_queryset(inactive_drivers)
         
-        page = self.paginate_queryset(inactive_drivers)
-        if page is not None:
-            serializer = DriverListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = DriverListSerializer(inactive_drivers, many=True)
-        return Response(serializer.data)
+        return self.list_response(inactive_drivers)
     
     @action(detail=False, methods=['get'])
     def by_vehicle_type(self, request):
@@ -136,17 +437,81 @@ class DriverViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        drivers = self.queryset.filter(vehicle_type__iexact=vehicle_type)
+        canonical = canonical_vehicle_type(vehicle_type)
+        if canonical is None:
+            return Response(
+                {"error": f"vehicle_type must be one of: {', '.join(VEHICLE_TYPES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Exact match on the stored spelling, so the vehicle type index is used
+        drivers = self.queryset.filter(vehicle_type=canonical)
         
         # Apply search and filters
         drivers = self.filter_queryset(drivers)
         
-        page = self.paginate_queryset(drivers)
-        if page is not None:
-            serializer = DriverListSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        return self.list_response(drivers)
+    
+    @action(detail=False, methods=['get'])
+    def available(self, request):
+        """
+        Get active drivers in a zone from the in-memory availability index.
+        GET /api/v1/drivers/available/?zone=HSR&vehicle_type=Sedan&limit=10
+        """
+        zone = request.query_params.get('zone', None)
+        vehicle_type = request.query_params.get('vehicle_type', None)
         
-        serializer = DriverListSerializer(drivers, many=True)
+        if not zone:
+            return Response(
+                {"error": "zone parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = int(request.query_params.get('limit', self.available_default_limit))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.available_max_limit:
+            return Response(
+                {"error": f"limit must be between 1 and {self.available_max_limit}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        fields = self.get_sparse_fields(['driver_id', 'vehicle_type'])
+        candidates = available_drivers.candidates(zone, vehicle_type, limit)
+        results = [
+            {'driver_id': driver_id, 'vehicle_type': driver_vehicle_type}
+            for driver_id, driver_vehicle_type in candidates
+        ]
+        if fields is not None:
+            results = [{name: result[name] for name in fields} for result in results]
+        
+        return Response({
+            'zone': zone,
+            'vehicle_type': vehicle_type,
+            'count': len(candidates),
+            'results': results
+        })
+    
+    def change_status(self, pk, is_active):
+        """
+        Set (or toggle, if ``is_active`` is None) a driver's status with a
+        single conditional UPDATE and respond with the returned row.
+        """
+        try:
+            driver_id = int(pk)
+        except (TypeError, ValueError):
+            raise Http404
+        
+        fields = self.get_row_fields()
+        changed = Driver.objects.update_status([driver_id], is_active)
+        if changed:
+            driver = changed[0]
+        else:
+            # Missing driver or already in the requested status
+            driver = self.get_object()
+        
+        serializer = DriverSerializer(driver, fields=fields)
         return Response(serializer.data)
     
     @action(detail=True, methods=['post', 'patch'])
@@ -155,12 +520,7 @@ class DriverViewSet(viewsets.ModelViewSet):
         Toggle driver active status.
         POST /api/drivers/{id}/toggle_status/
         """
-        driver = self.get_object()
-        driver.is_active = not driver.is_active
-        driver.save()
-        
-        serializer = DriverSerializer(driver)
-        return Response(serializer.data)
+        return self.change_status(pk, None)
     
     @action(detail=True, methods=['post', 'patch'])
     def activate(self, request, pk=None):
@@ -168,12 +528,7 @@ class DriverViewSet(viewsets.ModelViewSet):
         Activate a driver.
         POST /api/drivers/{id}/activate/
         """
-        driver = self.get_object()
-        driver.is_active = True
-        driver.save()
-        
-        serializer = DriverSerializer(driver)
-        return Response(serializer.data)
+        return self.change_status(pk, True)
     
     @action(detail=True, methods=['post', 'patch'])
     def deactivate(self, request, pk=None):
@@ -181,12 +536,92 @@ class DriverViewSet(viewsets.ModelViewSet):
         Deactivate a driver.
         POST /api/drivers/{id}/deactivate/
         """
-        driver = self.get_object()
-        driver.is_active = False
-        driver.save()
+        return self.change_status(pk, False)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_status(self, request):
+        """
+        Set the status of many drivers, selected by ID or by filter.
+        POST /api/v1/drivers/bulk_status/
+        """
+        fields = self.get_sparse_fields(['is_active', 'counts', 'results'])
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        is_active = serializer.validated_data['is_active']
+        chunk_size = self.bulk_status_chunk_size
         
-        serializer = DriverSerializer(driver)
-        return Response(serializer.data)
+        updated = []
+        unchanged = []
+        not_found = []
+        if 'driver_ids' in serializer.validated_data:
+            driver_ids = list(dict.fromkeys(serializer.validated_data['driver_ids']))
+            for start in range(0, len(driver_ids), chunk_size):
+                chunk = driver_ids[start:start + chunk_size]
+                changed = {
+                    driver.pk for driver in Driver.objects.update_status(chunk, is_active)
+                }
+                rest = [driver_id for driver_id in chunk if driver_id not in changed]
+                existing = set(
+                    Driver.objects.filter(pk__in=rest).values_list('pk', flat=True)
+                ) if rest else set()
+                
+                for driver_id in chunk:
+                    if driver_id in changed:
+                        updated.append(driver_id)
+                    elif driver_id in existing:
+                        unchanged.append(driver_id)
+                    else:
+                        not_found.append(driver_id)
+        else:
+            drivers = Driver.objects.filter(**serializer.validated_data['filter'])
+            updated = drivers.set_active(is_active, chunk_size=chunk_size)
+        
+        return Response(self.sparse({
+            'is_active': is_active,
+            'counts': {
+                'updated': len(updated),
+                'unchanged': len(unchanged),
+                'not_found': len(not_found),
+            },
+            'results': {
+                'updated': updated,
+                'unchanged': unchanged,
+                'not_found': not_found,
+            }
+        }, fields))
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream every driver matching the filters as NDJSON or CSV.
+        GET /api/v1/drivers/export/?format=ndjson|csv
+        """
+        export_format = request.query_params.get('format', 'ndjson')
+        if export_format not in self.export_formats:
+            return Response(
+                {"error": f"format must be one of: {', '.join(self.export_formats)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        fields = self.get_sparse_fields(export.EXPORT_FIELDS) or export.EXPORT_FIELDS
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .values_list(*fields)
+            .iterator(chunk_size=export.EXPORT_CHUNK_SIZE)
+        )
+        
+        if export_format == 'csv':
+            lines, content_type = export.iter_csv(rows, fields), 'text/csv'
+        else:
+            lines, content_type = export.iter_ndjson(rows, fields), 'application/x-ndjson'
+        if isinstance(request._request, ASGIRequest):
+            # Sent as it is encoded rather than collected first
+            lines = export.aiter_chunks(lines)
+        
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        if export_format == 'csv':
+            response['Content-Disposition'] = 'attachment; filename="drivers.csv"'
+        return response
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
@@ -194,35 +629,101 @@ class DriverViewSet(viewsets.ModelViewSet):
         Get driver statistics.
         GET /api/drivers/stats/
         """
-        total_drivers = self.queryset.count()
-        active_drivers = self.queryset.filter(is_active=True).count()
-        inactive_drivers = self.queryset.filter(is_active=False).count()
-        
-        # Count by vehicle type
-        vehicle_type_stats = self.queryset.values('vehicle_type').annotate(
-            count=Count('vehicle_type')
-        ).order_by('-count')
-        
-        # Count active drivers by vehicle type
-        active_vehicle_stats = self.queryset.filter(is_active=True).values('vehicle_type').annotate(
-            count=Count('vehicle_type')
-        ).order_by('-count')
-        
-        stats = {
-            'total_drivers': total_drivers,
-            'active_drivers': active_drivers,
-            'inactive_drivers': inactive_drivers,
-            'vehicle_type_distribution': {
-                item['vehicle_type']: item['count'] 
-                for item in vehicle_type_stats
-            },
-            'active_vehicle_type_distribution': {
-                item['vehicle_type']: item['count'] 
-                for item in active_vehicle_stats
-            }
-        }
+        # Served from incrementally maintained counters, no table scan
+        stats = self.sparse(counters.get_stats())
+        
+        return self.conditional(self.stats_etag(stats), None, lambda: Response(stats))
+    
+    @action(detail=False, methods=['get'])
+    def analytics(self, request):
+        """
+        Get zone by hour demand, average surge, fare per km, payments and
+        driver utilisation of the trips in the last ``window_hours``.
+        GET /api/v1/drivers/analytics/?window_hours=168
+        """
+        window_hours = request.query_params.get('window_hours', None)
+        if window_hours is not None:
+            try:
+                window_hours = int(window_hours)
+            except ValueError:
+                window_hours = 0
+            if not 1 <= window_hours <= MAX_WINDOW_HOURS:
+                return Response(
+                    {"error": f"window_hours must be between 1 and {MAX_WINDOW_HOURS}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
         
-        return Response(stats)
+        # Computed from the columnar trip snapshot and cached per snapshot
+        try:
+            with span('analytics'):
+                report = trip_analytics.report(window_hours)
+        except SnapshotUnavailable:
+            return Response(
+                {"error": "Trip analytics are being built, retry shortly"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '30'}
+            )
+        report = self.sparse(report)
+        
+        return self.conditional(self.stats_etag(report), None, lambda: Response(report))
+    
+    @action(detail=False, methods=['get'], url_path='changes')
+    def changes(self, request):
+        """
+        Get drivers created, updated or deleted after a cursor.
+        GET /api/v1/drivers/changes/?since=<cursor>&limit=500
+        """
+        since = request.query_params.get('since', None)
+        if since:
+            try:
+                since = feed.decode_cursor(since)
+            except feed.InvalidCursor:
+                return Response(
+                    {"error": "since must be a cursor returned by a previous request"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            since = None
+        
+        try:
+            limit = int(request.query_params.get('limit', self.changes_default_limit))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.changes_max_limit:
+            return Response(
+                {"error": f"limit must be between 1 and {self.changes_max_limit}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        fields = self.get_row_fields()
+        driver_changes, has_more = feed.get_changes(since, limit)
+        
+        results = []
+        for position, driver_id, driver in driver_changes:
+            results.append({
+                'op': 'delete' if driver is None else 'upsert',
+                'driver_id': driver_id,
+                'driver': None if driver is None else DriverSerializer(driver, fields=fields).data,
+            })
+        
+        if driver_changes:
+            next_cursor = feed.encode_cursor(driver_changes[-1][0])
+        else:
+            next_cursor = request.query_params.get('since') or None
+        
+        return Response({
+            'results': results,
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        })
+    
+    @action(detail=False, methods=['get'], url_path='cache/stats')
+    def cache_stats(self, request):
+        """
+        Get this process's driver cache hit/miss counters.
+        GET /api/v1/drivers/cache/stats/
+        """
+        return Response(self.sparse(driver_cache.stats()))
     
     @action(detail=True, methods=['get'])
     def details(self, request, pk=None):
@@ -230,9 +731,7 @@ class DriverViewSet(viewsets.ModelViewSet):
         Get detailed information about a driver.
         GET /api/drivers/{id}/details/
         """
-        driver = self.get_object()
-        serializer = DriverSerializer(driver)
-        return Response(serializer.data)
+        return self.instance_response()
     
     @action(detail=True, methods=['get'], url_path='status')
     def driver_status(self, request, pk=None):
@@ -240,16 +739,86 @@ class DriverViewSet(viewsets.ModelViewSet):
         Get the status of a specific driver.
         GET /api/v1/drivers/{id}/status
         """
+        fields = self.get_status_fields()
         driver = self.get_object()
+        etag, last_modified = self.driver_validators(driver)
         
-        status_data = {
-            'driver_id': driver.driver_id,
-            'name': driver.name,
-            'is_active': driver.is_active,
-            'vehicle_type': driver.vehicle_type,
-            'vehicle_plate': driver.vehicle_plate,
-            'last_updated': driver.updated_at
+        return self.conditional(
+            etag,
+            last_modified,
+            lambda: Response(self.status_data(driver, fields))
+        )
+    
+    def get_status_fields(self):
+        available = list(self.driver_status_fields)
+        return self.get_sparse_fields(available) or available
+    
+    def status_data(self, driver, fields):
+        return {
+            name: getattr(driver, self.driver_status_fields[name])
+            for name in fields
         }
+    
+    @action(detail=False, methods=['get', 'post'], url_path='status/batch')
+    def status_batch(self, request):
+        """
+        Get the status of many drivers with a single query.
+        GET /api/v1/drivers/status/batch/?ids=1,2,3
+        POST /api/v1/drivers/status/batch/ {"driver_ids": [1, 2, 3]}
+        """
+        if request.method == 'GET':
+            ids = request.query_params.get('ids', '')
+            data = {'driver_ids': [value for value in ids.split(',') if value.strip()]}
+        else:
+            data = request.data
         
-        return Response(status_data)
+        available = [name for name in self.driver_status_fields if name != 'driver_id']
+        fields = self.get_sparse_fields(available) or available
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        driver_ids = list(dict.fromkeys(serializer.validated_data['driver_ids']))
+        
+        rows = Driver.objects.filter(pk__in=driver_ids).values_list(
+            'driver_id',
+            *[self.driver_status_fields[name] for name in fields]
+        )
+        drivers = {
+            str(driver_id): dict(zip(fields, values))
+            for driver_id, *values in rows
+        }
+        
+        return Response({
+            'drivers': drivers,
+            'missing': [driver_id for driver_id in driver_ids if str(driver_id) not in drivers]
+        })
+
 
+async def driver_stream(request):
+    """
+    Stream driver status transitions as Server-Sent Events.
+    GET /api/v1/drivers/stream/?vehicle_type=Sedan&zone=HSR
+    
+    Served by the ASGI application; each idle listener is a parked
+    coroutine rather than a worker thread. Under WSGI, Django reads an
+    async stream to the end before sending any of it, so the stream is
+    refused there.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"error": "The status stream is only served by the ASGI application"},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    
+    response = StreamingHttpResponse(
+        iter_sse(
+            vehicle_type=request.GET.get('vehicle_type') or None,
+            zone=request.GET.get('zone') or None
+        ),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
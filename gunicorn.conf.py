@@ -0,0 +1,83 @@
+"""
+Gunicorn configuration for production.
+
+gunicorn reads this file from the working directory, so the container only
+runs ``gunicorn``. By default each worker serves ``driver_service.wsgi`` with
+a pool of threads. Set ``GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker``
+to serve ``driver_service.asgi`` instead (async read views and the status
+stream). Under ASGI, Django 4.2 does not reuse persistent database
+connections, so ASGI workers run with ``CONN_MAX_AGE=0``, one worker per
+CPU by default.
+
+The application is loaded once in the master before the workers are forked,
+so workers share its memory copy-on-write and start without importing
+Django again.
+"""
+
+import gc
+import os
+from decouple import config as env  # "config" is a gunicorn setting
+
+
+def cpu_count():
+    """
+    Return the CPUs this process may use, honouring a cgroup CPU limit (for
+    example a Kubernetes ``limits.cpu``), rounded up to at least 1.
+    """
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return max(1, -(-int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{env('PORT', default=8000, cast=int)}"
+worker_class = env('GUNICORN_WORKER_CLASS', default='gthread')
+
+if worker_class == 'gthread':
+    wsgi_app = 'driver_service.wsgi:application'
+    workers = env('WEB_CONCURRENCY', default=cpu_count() * 2 + 1, cast=int)
+    threads = env('GUNICORN_THREADS', default=4, cast=int)
+else:
+    wsgi_app = 'driver_service.asgi:application'
+    # One event loop per CPU; threads only size sync workers
+    workers = env('WEB_CONCURRENCY', default=cpu_count(), cast=int)
+    # Django 4.2 closes connections at the end of each request only when
+    # CONN_MAX_AGE is 0 under ASGI; any other value leaks them. Read by
+    # settings.py when the app is loaded below.
+    os.environ['DB_CONN_MAX_AGE'] = '0'
+
+preload_app = True
+
+# Recycle workers now and then so slow leaks cannot build up, staggered so
+# they do not all restart together
+max_requests = env('GUNICORN_MAX_REQUESTS', default=10000, cast=int)
+max_requests_jitter = max_requests // 10
+
+timeout = env('GUNICORN_TIMEOUT', default=30, cast=int)
+# Status streams are closed after DRIVER_STREAM_MAX_SECONDS; let running ones
+# end on their own during a graceful shutdown
+graceful_timeout = env('GUNICORN_GRACEFUL_TIMEOUT', default=30, cast=int)
+keepalive = 5
+
+accesslog = env('GUNICORN_ACCESS_LOG', default=None)
+errorlog = '-'
+loglevel = env('GUNICORN_LOG_LEVEL', default='info')
+
+
+def when_ready(server):
+    # Keep the preloaded objects out of the workers' garbage collection, so
+    # collections do not touch (and copy) the shared pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Never share a database connection opened in the master
+    from django.db import connections
+    connections.close_all()